@@ -0,0 +1 @@
+"""Benchmarks of scd4x_gpio_integration against a simulated SCD4x bus, shared with the tests."""
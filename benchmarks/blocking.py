@@ -0,0 +1,211 @@
+"""Event loop blocking and shutdown time with slow and hung transceivers.
+
+Every transaction, open and close of the fake transceivers blocks the calling thread on purpose,
+and records whether it was called on the event loop thread. Sixteen simulated SCD41 on four buses
+are set up, read for a few intervals and stopped, once entry by entry and once together through
+async_stop_coordinators, each time with one bus hanging before the stop. Throughout, the
+longest time the loop thread spent in one callback is measured in CPU time of the thread, along
+with how late the loop wakes up a task sleeping a millisecond. The wake up lag also counts the
+time the loop waits for the GIL and the OS scheduler, so it is reported against an idle loop. The
+run fails if a transceiver ran on the loop or a callback kept the loop busy for longer than
+--max-block. The timeouts of the stop phases are scaled down so a run takes seconds. Run from
+the repository root with the development requirements installed:
+
+    python3 benchmarks/blocking.py [--entries 16] [--block 0.02] [--max-block 0.005]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from asyncio import events
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration import scd4x_api  # noqa: E402
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel  # noqa: E402
+from custom_components.scd4x_gpio_integration.const import DOMAIN, DATA_BUS_MANAGER  # noqa: E402
+from custom_components.scd4x_gpio_integration.coordinator import (  # noqa: E402
+    SCD4XDataUpdateCoordinator, async_stop_coordinators,
+)
+
+SENSORS_PER_BUS = 4
+MUX_ADDRESS = 0x70
+INTERVAL = 0.5
+STOP_DURATION = 0.5
+PHASE_TIMEOUT = 1.0
+LAG_SAMPLE_INTERVAL = 0.001
+
+
+class BlockingI2cBus(SimulatedI2cBus):
+    """Simulated bus blocking for block seconds in every call, or until released once hung."""
+
+    def __init__(self, block: float, loop_thread: int) -> None:
+        super().__init__()
+        self.block = block
+        self.loop_calls = 0
+        self._loop_thread = loop_thread
+        self._released = threading.Event()
+        self._released.set()
+
+    def hang(self) -> None:
+        self._released.clear()
+
+    def release(self) -> None:
+        self._released.set()
+
+    def _blocking(self) -> None:
+        if threading.get_ident() == self._loop_thread:
+            self.loop_calls += 1
+        time.sleep(self.block)
+        self._released.wait()
+
+    def open(self) -> None:
+        self._blocking()
+        super().open()
+
+    def close(self) -> None:
+        self._blocking()
+        super().close()
+
+    def transceive(self, slave_address, tx_data, rx_length, read_delay, timeout):
+        self._blocking()
+        return super().transceive(slave_address, tx_data, rx_length, read_delay, timeout)
+
+
+class LoopMonitor:
+    """Longest callback of the loop thread in CPU time, and how late the loop wakes up a sleeping task.
+
+    Steps of the task starting the monitor, the benchmark itself, are not measured.
+    """
+
+    def __init__(self) -> None:
+        self.max_block = 0.0
+        self.max_lag = 0.0
+        self._task = None
+        self._owner = None
+        self._run = events.Handle._run
+
+    def start(self) -> None:
+        self.max_block = 0.0
+        self.max_lag = 0.0
+        self._owner = asyncio.current_task()
+        monitor_run = self._run_handle
+        # A function, so it binds to the handle it is called on.
+        events.Handle._run = lambda handle: monitor_run(handle)
+        self._task = asyncio.get_running_loop().create_task(self._async_sample())
+
+    async def stop(self) -> tuple[float, float]:
+        events.Handle._run = self._run
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return self.max_block, self.max_lag
+
+    def _run_handle(self, handle: events.Handle) -> None:
+        start = time.thread_time()
+        self._run(handle)
+        if getattr(handle._callback, "__self__", None) is not self._owner:  # pylint: disable=protected-access
+            self.max_block = max(self.max_block, time.thread_time() - start)
+
+    async def _async_sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            self.max_lag = max(self.max_lag, loop.time() - start - LAG_SAMPLE_INTERVAL)
+
+
+async def run(name: str, entries: int, block: float, together: bool) -> tuple[float, int]:
+    loop_thread = threading.get_ident()
+    buses: dict[str, BlockingI2cBus] = {}
+    for index in range(entries):
+        path = f"/dev/i2c-{index // SENSORS_PER_BUS + 1}"
+        bus = buses.setdefault(path, BlockingI2cBus(block, loop_thread))
+        bus.add_device(SimulatedScd4x(serial=index + 1, interval=INTERVAL, stop_duration=STOP_DURATION),
+                       MUX_ADDRESS, index % SENSORS_PER_BUS)
+
+    phases = []
+    monitor = LoopMonitor()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: buses[path])}
+        coordinators = []
+        for index in range(entries):
+            coordinator = SCD4XDataUpdateCoordinator(hass, f"/dev/i2c-{index // SENSORS_PER_BUS + 1}", None, 10, None,
+                                                     mux_channel=MuxChannel(MUX_ADDRESS, index % SENSORS_PER_BUS))
+            coordinator.api.scheduler.interval = INTERVAL
+            coordinators.append(coordinator)
+
+        monitor.start()
+        await asyncio.gather(*[coordinator.async_setup() for coordinator in coordinators])
+        phases.append(await monitor.stop())
+
+        monitor.start()
+        for coordinator in coordinators:
+            coordinator.async_start_acquisition()
+        await asyncio.sleep(4 * INTERVAL)
+        phases.append(await monitor.stop())
+
+        # Readings and stops on the hung bus time out.
+        logging.disable(logging.WARNING)
+        buses["/dev/i2c-1"].hang()
+        monitor.start()
+        start = time.perf_counter()
+        if together:
+            await async_stop_coordinators(coordinators)
+        else:
+            for coordinator in coordinators:
+                await coordinator.async_stop()
+        duration = time.perf_counter() - start
+        phases.append(await monitor.stop())
+        logging.disable(logging.NOTSET)
+
+        for bus in buses.values():
+            bus.release()
+        await hass.async_stop(force=True)
+
+    loop_calls = sum(bus.loop_calls for bus in buses.values())
+    print(f"{name:>12} " + " ".join(f"{block * 1000:>6.2f} {lag * 1000:>6.2f}" for block, lag in phases)
+          + f" {duration:>9.2f} {loop_calls:>10}")
+    return max(block for block, _ in phases), loop_calls
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=16)
+    parser.add_argument("--block", type=float, default=0.02, help="seconds every transceiver call blocks")
+    parser.add_argument("--max-block", type=float, default=0.005, help="longest acceptable callback in s")
+    args = parser.parse_args()
+
+    scd4x_api.STOP_TIMEOUT = PHASE_TIMEOUT
+    scd4x_api.RELEASE_TIMEOUT = PHASE_TIMEOUT
+
+    monitor = LoopMonitor()
+    monitor.start()
+    await asyncio.sleep(4 * INTERVAL)
+    _, idle_lag = await monitor.stop()
+    print(f"wake up lag of the idle loop {idle_lag * 1000:.2f} ms\n")
+
+    print(f"{'':>12} {'setup':>13} {'reading':>13} {'stopping':>13} {'stop time':>9} {'loop calls':>10}")
+    print(f"{'stop':>12}" + " busy ms lag ms" * 3 + f" {'s':>9} {'':>10}")
+    failed = False
+    for name, together in (("one by one", False), ("together", True)):
+        max_block, loop_calls = await run(name, args.entries, args.block, together)
+        failed |= loop_calls > 0 or max_block > args.max_block
+    if failed:
+        print(f"\nFAILED: a transceiver ran on the event loop or a callback kept it busy for more than "
+              f"{args.max_block * 1000:.0f} ms")
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,72 @@
+"""Throughput of eight SCD4x behind one TCA9548A multiplexer, shared bus manager vs one bus per entry.
+
+Run from the repository root with the development requirements installed:
+
+    python3 benchmarks/bus_sharing.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel  # noqa: E402
+from custom_components.scd4x_gpio_integration.metrics import Metrics  # noqa: E402
+from custom_components.scd4x_gpio_integration.scd4x_api import create_device, read_measurement_if_ready  # noqa: E402
+
+SENSORS = 8
+CYCLES = 50
+MUX_ADDRESS = 0x70
+BUS_LATENCY = 0.0002
+
+
+def create_bus() -> SimulatedI2cBus:
+    bus = SimulatedI2cBus(latency=BUS_LATENCY)
+    for channel in range(SENSORS):
+        device = SimulatedScd4x(serial=channel + 1, interval=0, co2=400 + channel)
+        device.handle(0x21B1, b"")
+        bus.add_device(device, MUX_ADDRESS, channel)
+    return bus
+
+
+async def run(shared: bool) -> None:
+    bus = create_bus()
+    factory = lambda path: bus
+    channels = [MuxChannel(MUX_ADDRESS, channel) for channel in range(SENSORS)]
+    if shared:
+        manager = I2cBusManager(factory)
+        workers = [await manager.async_acquire("/dev/i2c-1") for _ in channels]
+    else:
+        workers = [await I2cBusManager(factory).async_acquire("/dev/i2c-1") for _ in channels]
+    devices = [create_device(worker, Metrics()) for worker in workers]
+
+    wrong = 0
+    start = time.perf_counter()
+    for _ in range(CYCLES):
+        results = await asyncio.gather(*[
+            worker.async_run_batched(read_measurement_if_ready, device, channel=channel)
+            for worker, device, channel in zip(workers, devices, channels)
+        ], return_exceptions=True)
+        for channel, result in zip(channels, results):
+            if isinstance(result, BaseException) or result is None or result[0] != 400 + channel.channel:
+                wrong += 1
+    elapsed = time.perf_counter() - start
+
+    for worker in set(workers):
+        await worker.async_close()
+
+    reads = CYCLES * SENSORS
+    print(f"{'shared' if shared else 'per entry':>10} {reads / elapsed:>10.0f} {bus.channel_switches / CYCLES:>16.1f} "
+          f"{bus.interleaved:>12} {wrong:>11}")
+
+
+async def main() -> None:
+    print(f"{'bus':>10} {'reads/s':>10} {'switches/cycle':>16} {'interleaved':>12} {'bad reads':>11}")
+    await run(shared=False)
+    await run(shared=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
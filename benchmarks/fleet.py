@@ -0,0 +1,174 @@
+"""Device operations in flight and update latency of 32 config entries, staggered vs independent polling.
+
+Four simulated buses carry eight SCD4x each, behind one TCA9548A per bus, and all sensors start
+measuring at the same moment, as after a restart of Home Assistant. Independent polling reads
+every entry right after its sample like a coordinator on its own timer does. Staggered polling
+goes through the shared FleetScheduler. The depth is the number of device operations submitted
+to the bus workers and not finished yet, sampled every millisecond. Operation times run from the
+submission, including the wait for a permit, to the result; update times include the data ready
+polling of the acquisition scheduler. The interval of the sensors is
+scaled down so a run takes seconds. Run from the repository root with the development requirements
+installed:
+
+    python3 benchmarks/fleet.py [--entries 32] [--interval 1.0] [--cycles 10]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from benchmarks.simulator import (  # noqa: E402
+    CMD_START_PERIODIC_MEASUREMENT, CMD_STOP_PERIODIC_MEASUREMENT, SimulatedI2cBus, SimulatedScd4x,
+)
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator  # noqa: E402
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel  # noqa: E402
+from custom_components.scd4x_gpio_integration.const import (  # noqa: E402
+    DOMAIN, DATA_BUS_MANAGER, DATA_FLEET_SCHEDULER,
+)
+from custom_components.scd4x_gpio_integration.fleet import FleetScheduler  # noqa: E402
+
+SENSORS_PER_BUS = 8
+MUX_ADDRESS = 0x70
+BUS_LATENCY = 0.0005
+DEPTH_SAMPLE_INTERVAL = 0.001
+
+
+class TimedScheduler(FleetScheduler):
+    """Records the duration of every device operation, including the wait for a permit."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.durations: list[float] = []
+
+    @asynccontextmanager
+    async def operation(self):
+        start = time.perf_counter()
+        try:
+            async with super().operation():
+                yield
+        finally:
+            self.durations.append(time.perf_counter() - start)
+
+
+class IndependentScheduler(TimedScheduler):
+    """Every entry reads as soon as its sample is expected, without a cap, like separate timers."""
+
+    def __init__(self, period: float) -> None:
+        super().__init__(period, max_in_flight=1 << 16)
+
+    def delay(self, member, earliest: float, interval: float) -> float:
+        return earliest
+
+
+class TimedCoordinator(SCD4XDataUpdateCoordinator):
+    """Records the duration of every update."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+
+    async def _async_read_sample(self) -> None:
+        start = time.perf_counter()
+        try:
+            await super()._async_read_sample()
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def sample_depth(fleet: FleetScheduler, depths: list[int], running: asyncio.Event) -> None:
+    while running.is_set():
+        depths.append(fleet.in_flight)
+        await asyncio.sleep(DEPTH_SAMPLE_INTERVAL)
+
+
+async def run(name: str, fleet: TimedScheduler, entries: int, interval: float, cycles: int) -> None:
+    buses = {}
+    devices = []
+    for index in range(entries):
+        path = f"/dev/i2c-{index // SENSORS_PER_BUS + 1}"
+        bus = buses.setdefault(path, SimulatedI2cBus(latency=BUS_LATENCY))
+        device = SimulatedScd4x(serial=index + 1, interval=interval, co2=400 + index)
+        bus.add_device(device, MUX_ADDRESS, index % SENSORS_PER_BUS)
+        devices.append(device)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {
+            DATA_BUS_MANAGER: I2cBusManager(lambda path: buses[path]),
+            DATA_FLEET_SCHEDULER: fleet,
+        }
+        coordinators = []
+        for index in range(entries):
+            coordinator = TimedCoordinator(hass, f"/dev/i2c-{index // SENSORS_PER_BUS + 1}", None, 10, None,
+                                           mux_channel=MuxChannel(MUX_ADDRESS, index % SENSORS_PER_BUS))
+            coordinator.api.scheduler.interval = interval
+            await coordinator.async_setup()
+            coordinators.append(coordinator)
+
+        # Restart all sensors together, so they share one phase.
+        for device in devices:
+            device.handle(CMD_STOP_PERIODIC_MEASUREMENT, b"")
+            device.handle(CMD_START_PERIODIC_MEASUREMENT, b"")
+        for coordinator in coordinators:
+            coordinator.api.scheduler.reset()
+            coordinator.async_start_acquisition()
+
+        # Skip the first readings, which learn the phase of the sensors.
+        await asyncio.sleep(2 * interval)
+        for coordinator in coordinators:
+            coordinator.latencies.clear()
+        fleet.peak_in_flight = 0
+        fleet.durations.clear()
+
+        depths: list[int] = []
+        running = asyncio.Event()
+        running.set()
+        sampler = asyncio.create_task(sample_depth(fleet, depths, running))
+        await asyncio.sleep(cycles * interval)
+        running.clear()
+        await sampler
+        durations = list(fleet.durations)
+        latencies = [latency for coordinator in coordinators for latency in coordinator.latencies]
+
+        # Reads still in flight fail once their coordinator is stopped.
+        logging.disable(logging.ERROR)
+        for coordinator in coordinators:
+            await coordinator.async_stop()
+        await hass.async_stop(force=True)
+        logging.disable(logging.NOTSET)
+
+    busy = [depth for depth in depths if depth]
+    print(f"{name:>12} {len(latencies):>8} {statistics.mean(busy) if busy else 0:>11.2f} {fleet.peak_in_flight:>11} "
+          f"{percentile(durations, 0.5) * 1000:>7.1f} {percentile(durations, 0.99) * 1000:>7.1f} "
+          f"{percentile(latencies, 0.5) * 1000:>11.1f} {percentile(latencies, 0.99) * 1000:>11.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=1.0, help="simulated measurement interval in s")
+    parser.add_argument("--cycles", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'polling':>12} {'updates':>8} {'mean depth':>11} {'peak depth':>11} {'op p50':>7} {'op p99':>7} "
+          f"{'update p50':>11} {'update p99':>11}")
+    await run("independent", IndependentScheduler(args.interval), args.entries, args.interval, args.cycles)
+    await run("staggered", TimedScheduler(args.interval), args.entries, args.interval, args.cycles)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
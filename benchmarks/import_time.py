@@ -0,0 +1,74 @@
+"""Module load cost of the integration, before and at the setup of the first config entry.
+
+Each stage runs in a fresh interpreter with -X importtime. The Home Assistant modules a running
+instance has loaded anyway are imported first, so the figures are the cost the integration adds:
+the self time of every module loaded after them, and how many of those belong to the sensirion
+driver. The median of several runs is reported. Run from the repository root with the development
+requirements installed:
+
+    python3 benchmarks/import_time.py [--runs 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PACKAGE = "custom_components.scd4x_gpio_integration"
+MARKER = "--- integration ---"
+
+# Loaded by Home Assistant before it asks an integration for its config flow or sets up an entry.
+PRELOADED = [
+    "voluptuous", "async_timeout", "homeassistant.core", "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation", "homeassistant.helpers.event", "homeassistant.helpers.selector",
+    "homeassistant.helpers.storage", "homeassistant.helpers.update_coordinator", "homeassistant.helpers.entity",
+    "homeassistant.helpers.entity_platform", "homeassistant.components.sensor", "homeassistant.util.unit_conversion",
+]
+
+STAGES = {
+    "integration": [PACKAGE],
+    "config flow": [PACKAGE, f"{PACKAGE}.config_flow"],
+    "entry setup": [PACKAGE, f"{PACKAGE}.coordinator", f"{PACKAGE}.sensor"],
+}
+
+
+def measure(modules: list[str]) -> tuple[float, int, int]:
+    """Self time in ms of the modules loaded for modules, their count and the count of sensirion modules."""
+    code = (f"import importlib, sys\n"
+            f"for name in {PRELOADED!r}: importlib.import_module(name)\n"
+            f"sys.stderr.write({MARKER!r} + '\\n')\n"
+            f"for name in {modules!r}:\n"
+            f"    try:\n"
+            f"        importlib.import_module(name)\n"
+            f"    except ImportError:\n"
+            f"        pass\n")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    lines = result.stderr.split(MARKER, 1)[1].splitlines()
+    total = 0
+    loaded = 0
+    sensirion = 0
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line.removeprefix("import time:").split("|")
+        total += int(self_time)
+        loaded += 1
+        sensirion += name.strip().startswith("sensirion")
+    return total / 1000, loaded, sensirion
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'stage':>12} {'ms':>8} {'modules':>8} {'sensirion':>10}")
+    for stage, modules in STAGES.items():
+        runs = [measure(modules) for _ in range(args.runs)]
+        print(f"{stage:>12} {statistics.median(run[0] for run in runs):>8.1f} {runs[0][1]:>8} {runs[0][2]:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare the ring buffer moving average with the former Queue based implementation.
+
+Run from the repository root with the development requirements installed:
+
+    python3 benchmarks/moving_average.py
+"""
+import os
+import statistics
+import sys
+import timeit
+from queue import Queue
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.scd4x_gpio_integration.moving_average import RingAverage  # noqa: E402
+
+WINDOWS = [1, 60, 1000, 10000]
+UPDATES = 20000
+
+
+def calculate_moving_average(queue: Queue, new_value: float) -> float:
+    """Moving average as implemented before the ring buffer."""
+    if queue.full():
+        queue.get()
+
+    queue.put(new_value)
+    return statistics.mean(queue.queue)
+
+
+def bench_queue(window: int) -> float:
+    queue = Queue(window)
+    values = [400.0 + (i % 97) for i in range(UPDATES)]
+    return timeit.timeit(lambda: [calculate_moving_average(queue, value) for value in values], number=1)
+
+
+def bench_ring(window: int) -> float:
+    average = RingAverage(window)
+    values = [400.0 + (i % 97) for i in range(UPDATES)]
+    return timeit.timeit(lambda: [average.add(value, 0.0) for value in values], number=1)
+
+
+def main() -> None:
+    print(f"{'window':>8} {'queue us/update':>16} {'ring us/update':>16} {'speedup':>8}")
+    for window in WINDOWS:
+        queue_time = bench_queue(window) / UPDATES * 1e6
+        ring_time = bench_ring(window) / UPDATES * 1e6
+        print(f"{window:>8} {queue_time:>16.2f} {ring_time:>16.2f} {queue_time / ring_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cost per sample of the streaming median and Hampel filters against sorting the window per sample.
+
+Feeds a noisy CO2 signal with occasional spikes through each filter and reports the mean time
+per sample, and the spikes the Hampel filter rejected. Run from the repository root:
+
+    python3 benchmarks/outlier_filter.py [--samples 20000] [--windows 11 101 1001 10001]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.scd4x_gpio_integration.outlier import (  # noqa: E402
+    HampelFilter, MedianFilter, SlidingMedian,
+)
+
+SPIKE_PROBABILITY = 0.01
+
+
+class SortedMedian:
+    """Median by sorting a copy of the window on every sample, the naive implementation."""
+
+    def __init__(self, window: int) -> None:
+        self._values: deque[float] = deque(maxlen=window)
+
+    def add(self, value: float) -> float:
+        self._values.append(value)
+        return statistics.median(self._values)
+
+
+def signal(count: int, seed: int = 1) -> tuple[list[float], set[int]]:
+    rng = random.Random(seed)
+    values = []
+    spikes = set()
+    level = 600.0
+    for index in range(count):
+        level += rng.gauss(0.0, 0.5)
+        value = round(level + rng.gauss(0.0, 3.0))
+        if rng.random() < SPIKE_PROBABILITY:
+            value += rng.choice((-1, 1)) * rng.uniform(200.0, 2000.0)
+            spikes.add(index)
+        values.append(value)
+    return values, spikes
+
+
+def per_sample(step, values: list[float]) -> float:
+    start = time.perf_counter()
+    for value in values:
+        step(value)
+    return (time.perf_counter() - start) / len(values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[11, 101, 1001, 10001])
+    args = parser.parse_args()
+
+    values, spikes = signal(args.samples)
+    print(f"{'window':>7} {'sorted us':>10} {'median us':>10} {'hampel us':>10} {'speedup':>8} "
+          f"{'spikes':>7} {'rejected':>9}")
+    for window in args.windows:
+        sorted_time = per_sample(SortedMedian(window).add, values)
+        median_time = per_sample(MedianFilter(window).filter, values)
+
+        hampel = HampelFilter(window, 3.0, 1.0)
+        replaced = []
+        hampel_time = per_sample(lambda value: replaced.append(hampel.filter(value) != value), values)
+        caught = sum(1 for index in spikes if replaced[index])
+
+        check = SlidingMedian(window)
+        reference = SortedMedian(window)
+        assert all(check.add(value) == reference.add(value) for value in values[:5 * window])
+
+        print(f"{window:>7} {sorted_time * 1e6:>10.2f} {median_time * 1e6:>10.2f} {hampel_time * 1e6:>10.2f} "
+              f"{sorted_time / median_time:>7.1f}x {len(spikes):>7} {caught:>4}/{hampel.rejected:<4}")
+
+
+if __name__ == "__main__":
+    main()
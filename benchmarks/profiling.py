@@ -0,0 +1,126 @@
+"""Overhead of the profiler on the update path, with no profile running and while one runs.
+
+Eight simulated SCD41 behind a multiplexer are read for a number of measurement intervals, first
+without a profile, then with one running, and the update latency of the coordinators is compared.
+The cost of a stage with no profile running is measured on its own against an empty with block.
+The stages of the summary of the profile are printed. Run from the repository root with the
+development requirements installed:
+
+    python3 benchmarks/profiling.py [--sensors 8] [--interval 0.5] [--cycles 10]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel  # noqa: E402
+from custom_components.scd4x_gpio_integration.const import DOMAIN, DATA_BUS_MANAGER  # noqa: E402
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator  # noqa: E402
+from custom_components.scd4x_gpio_integration.metrics import METRIC_UPDATE  # noqa: E402
+from custom_components.scd4x_gpio_integration.profiling import (  # noqa: E402
+    STAGE_READ, Profiler, async_profile, get_profiler,
+)
+
+MUX_ADDRESS = 0x70
+STAGE_CALLS = 1_000_000
+
+
+def stage_cost() -> tuple[float, float]:
+    """Time in ns of an empty with block and of an inactive stage."""
+    profiler = Profiler()
+    context = nullcontext()
+    start = time.perf_counter()
+    for _ in range(STAGE_CALLS):
+        with context:
+            pass
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(STAGE_CALLS):
+        with profiler.stage(STAGE_READ):
+            pass
+    return baseline / STAGE_CALLS * 1e9, (time.perf_counter() - start) / STAGE_CALLS * 1e9
+
+
+def update_totals(coordinators: list[SCD4XDataUpdateCoordinator]) -> tuple[int, float]:
+    """Updates of all coordinators so far and their total duration."""
+    histograms = [coordinator.metrics.histogram(METRIC_UPDATE) for coordinator in coordinators]
+    return (sum(histogram.count for histogram in histograms if histogram is not None),
+            sum(histogram.total for histogram in histograms if histogram is not None))
+
+
+def since(totals: tuple[int, float], previous: tuple[int, float]) -> tuple[int, float]:
+    """Updates between two totals and their mean duration in ms."""
+    count = totals[0] - previous[0]
+    return count, (totals[1] - previous[1]) / count * 1000 if count else 0.0
+
+
+async def run(sensors: int, interval: float, cycles: int) -> None:
+    bus = SimulatedI2cBus()
+    for index in range(sensors):
+        bus.add_device(SimulatedScd4x(serial=index + 1, interval=interval, co2=400 + index), MUX_ADDRESS, index)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: bus)}
+        coordinators = []
+        for index in range(sensors):
+            coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 10, None,
+                                                     mux_channel=MuxChannel(MUX_ADDRESS, index))
+            coordinator.api.scheduler.interval = interval
+            await coordinator.async_setup()
+            coordinator.async_start_acquisition()
+            coordinators.append(coordinator)
+
+        # Skip the first readings, which learn the phase of the sensors.
+        await asyncio.sleep(2 * interval)
+        start = update_totals(coordinators)
+        await asyncio.sleep(cycles * interval)
+        off = update_totals(coordinators)
+        summary = await async_profile(hass, cycles * interval, os.path.join(config_dir, "profile"))
+        on = update_totals(coordinators)
+        off_count, off_mean = since(off, start)
+        on_count, on_mean = since(on, off)
+        assert not get_profiler(hass).active
+
+        logging.disable(logging.ERROR)
+        for coordinator in coordinators:
+            await coordinator.async_stop()
+        await hass.async_stop(force=True)
+        logging.disable(logging.NOTSET)
+
+    print(f"{'profile':>8} {'updates':>8} {'mean ms':>8}")
+    print(f"{'off':>8} {off_count:>8} {off_mean:>8.2f}")
+    print(f"{'on':>8} {on_count:>8} {on_mean:>8.2f}")
+    print()
+    print(f"{'stage':>34} {'count':>6} {'wall ms':>8} {'cpu ms':>8} {'max ms':>8}")
+    for name, stage in summary["stages"].items():
+        print(f"{name:>34} {stage['count']:>6} {stage['mean_wall'] * 1000:>8.3f} "
+              f"{stage['cpu'] / stage['count'] * 1000:>8.3f} {stage['max_wall'] * 1000:>8.3f}")
+    loop = summary["event_loop"]
+    print(f"\nevent loop lag: mean {loop['mean_lag'] * 1000:.2f} ms, max {loop['max_lag'] * 1000:.2f} ms, "
+          f"{loop['blocked_count']} blocking")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sensors", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=0.5, help="simulated measurement interval in s")
+    parser.add_argument("--cycles", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline, inactive = stage_cost()
+    print(f"empty with block {baseline:.1f} ns, inactive stage {inactive:.1f} ns\n")
+    await run(args.sensors, args.interval, args.cycles)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
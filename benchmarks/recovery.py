@@ -0,0 +1,120 @@
+"""Fault injection against the in-place recovery of SCD4XDataUpdateCoordinator.
+
+Injects NACK bursts, corrupted CRCs, a wedged bus and a sensor brownout into a simulated SCD4x
+and reports which recovery step brought the readings back, the time to recover, and whether
+the moving average survived. For comparison the last column shows the time a full teardown
+and setup, as done by a config entry reload, takes until the next reading. Run from the
+repository root with the development requirements installed:
+
+    python3 benchmarks/recovery.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator  # noqa: E402
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager  # noqa: E402
+from custom_components.scd4x_gpio_integration.const import CO2_KEY, DOMAIN, DATA_BUS_MANAGER  # noqa: E402
+from custom_components.scd4x_gpio_integration.metrics import METRIC_RECOVERY_PREFIX  # noqa: E402
+from custom_components.scd4x_gpio_integration.recovery import (  # noqa: E402
+    RECOVERY_RETRY, RECOVERY_REOPEN, RECOVERY_RESET,
+)
+
+# Failed updates after which a fault counts as not recovered.
+MAX_FAILED_UPDATES = 10
+
+
+def nack_burst(bus: SimulatedI2cBus, device: SimulatedScd4x) -> None:
+    bus.fail_next(2)
+
+
+def crc_errors(bus: SimulatedI2cBus, device: SimulatedScd4x) -> None:
+    bus.corrupt_next(2)
+
+
+def wedged_bus(bus: SimulatedI2cBus, device: SimulatedScd4x) -> None:
+    bus.wedge()
+
+
+def brownout(bus: SimulatedI2cBus, device: SimulatedScd4x) -> None:
+    device.brownout()
+
+
+SCENARIOS = {
+    "nack burst": nack_burst,
+    "crc errors": crc_errors,
+    "wedged bus": wedged_bus,
+    "brownout": brownout,
+}
+
+
+async def run(name: str, inject, interval: float) -> None:
+    bus = SimulatedI2cBus(seed=1)
+    device = SimulatedScd4x(interval=interval)
+    bus.add_device(device)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: bus)}
+        coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 60, None)
+        coordinator.api.scheduler.interval = interval
+        await coordinator.async_setup()
+        for _ in range(3):
+            await asyncio.sleep(coordinator.api.seconds_until_next_sample())
+            await coordinator.async_refresh()
+        window = len(coordinator._averages[CO2_KEY])  # pylint: disable=protected-access
+
+        inject(bus, device)
+        start = time.perf_counter()
+        failed = 0
+        while True:
+            await asyncio.sleep(coordinator.api.seconds_until_next_sample())
+            await coordinator.async_refresh()
+            if coordinator.last_update_success:
+                break
+            failed += 1
+            if failed >= MAX_FAILED_UPDATES:
+                await coordinator.async_stop()
+                await hass.async_stop(force=True)
+                raise RuntimeError(f"{name}: no reading after {failed} failed updates")
+        recovered = time.perf_counter() - start
+        kept = len(coordinator._averages[CO2_KEY]) > window  # pylint: disable=protected-access
+        counters = coordinator.metrics.counters
+        steps = "/".join(str(counters.get(METRIC_RECOVERY_PREFIX + step, 0))
+                         for step in (RECOVERY_RETRY, RECOVERY_REOPEN, RECOVERY_RESET))
+
+        await coordinator.async_stop()
+        start = time.perf_counter()
+        await coordinator.async_setup()
+        await asyncio.sleep(coordinator.api.seconds_until_next_sample())
+        await coordinator.async_refresh()
+        reload = time.perf_counter() - start
+
+        await coordinator.async_stop()
+        await hass.async_stop(force=True)
+
+    print(f"{name:>12} {coordinator.api.recovery.last_step or '-':>8} {steps:>14} {failed:>7} "
+          f"{recovered:>10.3f} {str(kept):>7} {reload:>9.3f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=0.5, help="simulated measurement interval in s")
+    args = parser.parse_args()
+
+    print(f"{'fault':>12} {'step':>8} {'retry/reopen/reset':>14} {'failed':>7} {'recover s':>10} {'kept':>7} "
+          f"{'reload s':>9}")
+    for name, inject in SCENARIOS.items():
+        await run(name, inject, args.interval)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""Bus transactions, sensor measurements and tracking error of the measurement modes.
+
+One simulated SCD41 follows a CO2 profile of a room: steady air, people coming in, a window
+being opened. Every mode publishes once a minute, the averaging window is one sample, so the
+published CO2 is the latest reading. Measurements count the samples the sensor took, which its
+energy use and self heating follow. The error is the distance of the published CO2 from the true
+one, sampled every simulated second. Time runs --scale times faster than real time. Run from the
+repository root with the development requirements installed:
+
+    python3 benchmarks/sampling.py [--minutes 30] [--scale 60]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration import acquisition  # noqa: E402
+from custom_components.scd4x_gpio_integration.acquisition import (  # noqa: E402
+    ADAPTIVE_MIN_INTERVAL, ADAPTIVE_RATE_THRESHOLD, ADAPTIVE_RATE_WINDOW, LOW_POWER_MEASUREMENT_INTERVAL,
+    MEASUREMENT_INTERVAL, SINGLE_SHOT_DURATION, SingleShotSampling,
+)
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager  # noqa: E402
+from custom_components.scd4x_gpio_integration.const import (  # noqa: E402
+    CO2_KEY, DOMAIN, DATA_BUS_MANAGER, MEASUREMENT_MODES, MEASUREMENT_MODE_ADAPTIVE,
+)
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator  # noqa: E402
+
+PUBLISH_INTERVAL = 60
+NOISE_PPM = 5.0
+
+
+def true_co2(minute: float) -> float:
+    """Steady air, four people coming in, steady again, then a window opened."""
+    if minute < 8:
+        return 600.0
+    if minute < 13:
+        return 600.0 + 160.0 * (minute - 8)
+    if minute < 20:
+        return 1400.0
+    if minute < 23:
+        return 1400.0 - 250.0 * (minute - 20)
+    return 650.0
+
+
+def scaled_interval(mode: str, scale: float) -> float:
+    return acquisition.measurement_interval(mode) / scale
+
+
+async def drive(device: SimulatedScd4x, coordinator: SCD4XDataUpdateCoordinator, scale: float, minutes: float,
+                errors: list[float]) -> None:
+    rng = random.Random(1)
+    for second in range(int(minutes * 60)):
+        co2 = true_co2(second / 60)
+        device.co2 = max(round(co2 + rng.gauss(0.0, NOISE_PPM)), 0)
+        if coordinator.data is not None:
+            errors.append(abs(coordinator.data[CO2_KEY] - co2))
+        await asyncio.sleep(1 / scale)
+
+
+async def run(mode: str, minutes: float, scale: float) -> None:
+    bus = SimulatedI2cBus()
+    device = SimulatedScd4x(interval=MEASUREMENT_INTERVAL / scale,
+                            low_power_interval=LOW_POWER_MEASUREMENT_INTERVAL / scale,
+                            single_shot_duration=SINGLE_SHOT_DURATION / scale)
+    bus.add_device(device)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: bus)}
+        coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 1, None,
+                                                 publish_interval=PUBLISH_INTERVAL / scale, measurement_mode=mode)
+        coordinator.api.scheduler.interval = scaled_interval(mode, scale)
+        if coordinator._sampling is not None:  # pylint: disable=protected-access
+            # The trend is in ppm per real minute, which are scale simulated minutes.
+            acquisition.ADAPTIVE_RATE_WINDOW = ADAPTIVE_RATE_WINDOW / scale
+            coordinator._sampling = SingleShotSampling(  # pylint: disable=protected-access
+                PUBLISH_INTERVAL / scale, mode == MEASUREMENT_MODE_ADAPTIVE, ADAPTIVE_MIN_INTERVAL / scale,
+                ADAPTIVE_RATE_THRESHOLD * scale)
+            acquisition.ADAPTIVE_RATE_WINDOW = ADAPTIVE_RATE_WINDOW
+        await coordinator.async_setup()
+        await coordinator.async_refresh()
+        coordinator.async_start_acquisition()
+        transactions = bus.transactions
+        measurements = device.measurements
+
+        errors: list[float] = []
+        await drive(device, coordinator, scale, minutes, errors)
+        transactions = bus.transactions - transactions
+        measurements = device.measurements - measurements
+
+        # A read still in flight fails once the coordinator is stopped.
+        logging.disable(logging.ERROR)
+        await coordinator.async_stop()
+        await hass.async_stop(force=True)
+        logging.disable(logging.NOTSET)
+
+    hours = minutes / 60
+    errors.sort()
+    print(f"{mode:>12} {transactions / hours:>13.0f} {measurements / hours:>13.0f} "
+          f"{statistics.mean(errors):>10.1f} {errors[int(0.95 * len(errors))]:>10.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=30, help="simulated duration")
+    parser.add_argument("--scale", type=float, default=60, help="simulated seconds per real second")
+    args = parser.parse_args()
+
+    print(f"{'mode':>12} {'transactions':>13} {'measurements':>13} {'mean error':>10} {'p95 error':>10}")
+    print(f"{'':>12} {'per hour':>13} {'per hour':>13} {'ppm':>10} {'ppm':>10}")
+    for mode in MEASUREMENT_MODES:
+        await run(mode, args.minutes, args.scale)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,320 @@
+"""In-process simulation of SCD4x sensors on an I2C bus, for benchmarks without hardware."""
+import errno
+import random
+import threading
+import time
+from typing import Optional
+
+from sensirion_i2c_driver.transceiver_v1 import I2cTransceiverV1
+
+from custom_components.scd4x_gpio_integration.native import I2C_M_RD, RX_BUFFER_SIZE, I2cRdwrTransceiver
+
+SCD4X_ADDRESS = 0x62
+
+CMD_GET_DATA_READY_STATUS = 0xE4B8
+CMD_READ_MEASUREMENT = 0xEC05
+CMD_START_PERIODIC_MEASUREMENT = 0x21B1
+CMD_STOP_PERIODIC_MEASUREMENT = 0x3F86
+CMD_GET_SERIAL_NUMBER = 0x3682
+CMD_GET_SENSOR_ALTITUDE = 0x2322
+CMD_SET_SENSOR_ALTITUDE = 0x2427
+CMD_GET_TEMPERATURE_OFFSET = 0x2318
+CMD_SET_TEMPERATURE_OFFSET = 0x241D
+CMD_PERSIST_SETTINGS = 0x3615
+CMD_REINIT = 0x3646
+CMD_SET_AMBIENT_PRESSURE = 0xE000
+CMD_START_LOW_POWER_PERIODIC_MEASUREMENT = 0x21AC
+CMD_MEASURE_SINGLE_SHOT = 0x219D
+
+# Commands the SCD4x only accepts while idle.
+IDLE_ONLY_COMMANDS = {CMD_GET_SERIAL_NUMBER, CMD_GET_SENSOR_ALTITUDE, CMD_SET_SENSOR_ALTITUDE,
+                      CMD_GET_TEMPERATURE_OFFSET, CMD_SET_TEMPERATURE_OFFSET, CMD_PERSIST_SETTINGS, CMD_REINIT,
+                      CMD_START_PERIODIC_MEASUREMENT, CMD_START_LOW_POWER_PERIODIC_MEASUREMENT,
+                      CMD_MEASURE_SINGLE_SHOT}
+
+
+def crc8(data: bytes) -> int:
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+class DeviceNack(Exception):
+    """The simulated device does not acknowledge the command."""
+
+
+def encode_words(*words: int) -> bytes:
+    data = bytearray()
+    for word in words:
+        raw = bytes([(word >> 8) & 0xFF, word & 0xFF])
+        data += raw + bytes([crc8(raw)])
+    return bytes(data)
+
+
+class SimulatedScd4x:
+    """Command level model of one SCD41.
+
+    interval is the periodic measurement interval, low_power_interval the low power one and
+    single_shot_duration the time a single shot takes and stop_duration the time a stop takes, the
+    device does not respond meanwhile.
+    """
+
+    def __init__(self, serial: int = 0x0123456789AB, interval: float = 5.0, co2: int = 600,
+                 temperature: float = 22.5, humidity: float = 45.0, low_power_interval: float = 30.0,
+                 single_shot_duration: float = 5.0, stop_duration: float = 0.0) -> None:
+        self.serial = serial
+        self.interval = interval
+        self.low_power_interval = low_power_interval
+        self.single_shot_duration = single_shot_duration
+        self.stop_duration = stop_duration
+        self.co2 = co2
+        self.temperature = temperature
+        self.humidity = humidity
+        self.eeprom = {"altitude": 0, "temperature_offset": round(4.0 * 65536 / 175)}
+        self.settings = dict(self.eeprom)
+        self.ambient_pressure: Optional[int] = None
+        self.persist_count = 0
+        self.reinit_count = 0
+        self._measuring_since: Optional[float] = None
+        self._measuring_interval = interval
+        self._samples_read = 0
+        self._shot_ready_at: Optional[float] = None
+        self._completed_measurements = 0
+        self._busy_until = 0.0
+
+    @property
+    def measuring(self) -> bool:
+        return self._measuring_since is not None
+
+    @property
+    def measurements(self) -> int:
+        """Samples taken so far, which is what the energy use and the self heating of the sensor follow."""
+        return self._completed_measurements + self._samples_available()
+
+    def brownout(self) -> None:
+        """Lose power for a moment: back to idle with the settings stored in EEPROM."""
+        self._stop()
+        self.settings = dict(self.eeprom)
+        self.ambient_pressure = None
+
+    def _start(self, interval: float) -> None:
+        self._measuring_since = time.monotonic()
+        self._measuring_interval = interval
+        self._samples_read = 0
+
+    def _stop(self) -> None:
+        self._completed_measurements = self.measurements
+        self._measuring_since = None
+        self._shot_ready_at = None
+
+    def _samples_available(self) -> int:
+        if self._shot_ready_at is not None:
+            return int(time.monotonic() >= self._shot_ready_at)
+        if self._measuring_since is None:
+            return 0
+        if self._measuring_interval <= 0:
+            return self._samples_read + 1
+        return int((time.monotonic() - self._measuring_since) / self._measuring_interval)
+
+    def handle(self, command: int, payload: bytes) -> Optional[bytes]:
+        if self._shot_ready_at is not None and time.monotonic() < self._shot_ready_at:
+            raise DeviceNack()
+        if time.monotonic() < self._busy_until:
+            raise DeviceNack()
+        if self.measuring and command in IDLE_ONLY_COMMANDS:
+            raise DeviceNack()
+        word = (payload[0] << 8) | payload[1] if len(payload) >= 3 and crc8(payload[:2]) == payload[2] else None
+
+        if command == CMD_START_PERIODIC_MEASUREMENT:
+            self._stop()
+            self._start(self.interval)
+        elif command == CMD_START_LOW_POWER_PERIODIC_MEASUREMENT:
+            self._stop()
+            self._start(self.low_power_interval)
+        elif command == CMD_MEASURE_SINGLE_SHOT:
+            self._stop()
+            self._shot_ready_at = time.monotonic() + self.single_shot_duration
+            self._samples_read = 0
+        elif command == CMD_STOP_PERIODIC_MEASUREMENT:
+            self._stop()
+            self._busy_until = time.monotonic() + self.stop_duration
+        elif command == CMD_GET_SERIAL_NUMBER:
+            return encode_words((self.serial >> 32) & 0xFFFF, (self.serial >> 16) & 0xFFFF, self.serial & 0xFFFF)
+        elif command == CMD_GET_SENSOR_ALTITUDE:
+            return encode_words(self.settings["altitude"])
+        elif command == CMD_SET_SENSOR_ALTITUDE and word is not None:
+            self.settings["altitude"] = word
+        elif command == CMD_GET_TEMPERATURE_OFFSET:
+            return encode_words(self.settings["temperature_offset"])
+        elif command == CMD_SET_TEMPERATURE_OFFSET and word is not None:
+            self.settings["temperature_offset"] = word
+        elif command == CMD_SET_AMBIENT_PRESSURE and word is not None:
+            self.ambient_pressure = word
+        elif command == CMD_PERSIST_SETTINGS:
+            self.eeprom = dict(self.settings)
+            self.persist_count += 1
+        elif command == CMD_REINIT:
+            self._stop()
+            self.settings = dict(self.eeprom)
+            self.ambient_pressure = None
+            self.reinit_count += 1
+        elif command == CMD_GET_DATA_READY_STATUS:
+            return encode_words(0x0006 if self._samples_available() > self._samples_read else 0x8000)
+        elif command == CMD_READ_MEASUREMENT:
+            self._samples_read = max(self._samples_available(), self._samples_read)
+            return encode_words(self.co2, round((self.temperature + 45) * 65536 / 175),
+                                round(self.humidity * 65536 / 100))
+        return None
+
+
+class SimulatedI2cBus(I2cTransceiverV1):
+    """Transceiver serving simulated SCD4x devices, optionally behind TCA9548A multiplexers.
+
+    latency is added to every transaction. The error rates inject NACKs, timeouts and corrupted CRCs
+    with the given probability per transaction. fail_next() and wedge() inject deterministic faults.
+    """
+
+    API_VERSION = 1
+
+    def __init__(self, latency: float = 0.0, nack_rate: float = 0.0, timeout_rate: float = 0.0,
+                 crc_error_rate: float = 0.0, seed: Optional[int] = None) -> None:
+        super().__init__()
+        self.latency = latency
+        self.nack_rate = nack_rate
+        self.timeout_rate = timeout_rate
+        self.crc_error_rate = crc_error_rate
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self.devices: dict[tuple[Optional[int], Optional[int]], SimulatedScd4x] = {}
+        self.multiplexers: dict[int, int] = {}
+        self.transactions = 0
+        self.channel_switches = 0
+        self._lock = threading.Lock()
+        self._concurrent = False
+        self.interleaved = 0
+        self.opens = 0
+        self.wedged = False
+        self._nacks_pending = 0
+        self._corruptions_pending = 0
+
+    @property
+    def description(self) -> str:
+        return "Simulated SCD4x bus"
+
+    @property
+    def channel_count(self) -> None:
+        return None
+
+    def add_device(self, device: SimulatedScd4x, mux_address: Optional[int] = None,
+                   mux_channel: Optional[int] = None) -> None:
+        if mux_address is not None:
+            self.multiplexers.setdefault(mux_address, 0)
+        self.devices[(mux_address, mux_channel)] = device
+
+    def fail_next(self, transactions: int) -> None:
+        """NACK the next transactions addressed to a device."""
+        self._nacks_pending = transactions
+
+    def corrupt_next(self, responses: int) -> None:
+        """Corrupt the CRC of the next responses."""
+        self._corruptions_pending = responses
+
+    def wedge(self) -> None:
+        """Time out every transaction until the transceiver is reopened, like a bus stuck low."""
+        self.wedged = True
+
+    def open(self) -> None:
+        self.opens += 1
+        self.wedged = False
+
+    def close(self) -> None:
+        pass
+
+    def _selected_device(self) -> Optional[SimulatedScd4x]:
+        for (mux_address, mux_channel), device in self.devices.items():
+            if mux_address is None or self.multiplexers[mux_address] == 1 << mux_channel:
+                return device
+        return None
+
+    def transceive(self, slave_address, tx_data, rx_length, read_delay, timeout):
+        with self._lock:
+            if self._concurrent:
+                self.interleaved += 1
+            self._concurrent = True
+        try:
+            self.transactions += 1
+            if self.latency:
+                time.sleep(self.latency)
+            if self.wedged:
+                return self.STATUS_TIMEOUT, None, b""
+
+            if slave_address in self.multiplexers:
+                self.multiplexers[slave_address] = tx_data[0]
+                self.channel_switches += 1
+                return self.STATUS_OK, None, b""
+
+            device = self._selected_device() if slave_address == SCD4X_ADDRESS else None
+            if device is None:
+                return self.STATUS_NACK, None, b""
+
+            if self._nacks_pending:
+                self._nacks_pending -= 1
+                self.injected_errors += 1
+                return self.STATUS_NACK, None, b""
+            if self.nack_rate and self._random.random() < self.nack_rate:
+                self.injected_errors += 1
+                return self.STATUS_NACK, None, b""
+            if self.timeout_rate and self._random.random() < self.timeout_rate:
+                self.injected_errors += 1
+                return self.STATUS_TIMEOUT, None, b""
+
+            command = (tx_data[0] << 8) | tx_data[1]
+            try:
+                response = device.handle(command, bytes(tx_data[2:]))
+            except DeviceNack:
+                return self.STATUS_NACK, None, b""
+            if rx_length:
+                time.sleep(read_delay)
+                response = (response or b"")[:rx_length]
+                if response and self._corruptions_pending:
+                    self._corruptions_pending -= 1
+                    self.injected_errors += 1
+                    response = response[:2] + bytes([response[2] ^ 0xFF]) + response[3:]
+                elif response and self.crc_error_rate and self._random.random() < self.crc_error_rate:
+                    self.injected_errors += 1
+                    response = response[:2] + bytes([response[2] ^ 0xFF]) + response[3:]
+                return self.STATUS_OK, None, response
+            return self.STATUS_OK, None, b""
+        finally:
+            self._concurrent = False
+
+
+class SimulatedRdwrTransceiver(I2cRdwrTransceiver):
+    """I2cRdwrTransceiver serving its I2C_RDWR requests from a SimulatedI2cBus instead of the kernel."""
+
+    def __init__(self, bus: SimulatedI2cBus) -> None:
+        super().__init__("simulated")
+        self.bus = bus
+        self._response = b""
+
+    def open(self) -> None:
+        self.bus.open()
+
+    def close(self) -> None:
+        self.bus.close()
+
+    def _transfer(self, request) -> None:
+        message = request.msgs[0]
+        if message.flags & I2C_M_RD:
+            self.rx_buffer[:message.len] = self._response[:message.len].ljust(message.len, b"\0")
+            return
+
+        status, _, self._response = self.bus.transceive(message.addr, bytes(self.tx_buffer[:message.len]),
+                                                        RX_BUFFER_SIZE, 0.0, 0.0)
+        if status == self.bus.STATUS_NACK:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        if status == self.bus.STATUS_TIMEOUT:
+            raise OSError(errno.ETIMEDOUT, "Connection timed out")
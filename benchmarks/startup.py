@@ -0,0 +1,67 @@
+"""Setup time of the device initialization against a simulated SCD4x, former sequence vs fast path.
+
+Run from the repository root with the development requirements installed:
+
+    python3 benchmarks/startup.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sensirion_i2c_driver import I2cConnection  # noqa: E402
+from sensirion_i2c_scd import Scd4xI2cDevice  # noqa: E402
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration.scd4x_api import initialize_device  # noqa: E402
+
+ALTITUDE = 350
+TEMPERATURE_OFFSET = 4.0
+
+
+def legacy_initialize_device(scd4x: Scd4xI2cDevice, altitude, temperature_offset) -> int:
+    """Initialization as implemented before the fast path, including its `is` comparisons."""
+    scd4x.stop_periodic_measurement()
+    time.sleep(1)
+    serial = scd4x.read_serial_number()
+    should_save = False
+    if altitude is not scd4x.get_sensor_altitude():
+        scd4x.set_sensor_altitude(altitude)
+        should_save = True
+    if temperature_offset is not scd4x.get_temperature_offset():
+        scd4x.set_temperature_offset(temperature_offset)
+        should_save = True
+    if should_save:
+        scd4x.persist_settings()
+    scd4x.reinit()
+    time.sleep(5)
+    scd4x.start_periodic_measurement()
+    time.sleep(1)
+    return serial
+
+
+def run(name: str, initialize, device: SimulatedScd4x) -> None:
+    bus = SimulatedI2cBus()
+    bus.add_device(device)
+    scd4x = Scd4xI2cDevice(I2cConnection(bus))
+    persists, reinits = device.persist_count, device.reinit_count
+
+    start = time.perf_counter()
+    initialize(scd4x, ALTITUDE, TEMPERATURE_OFFSET)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>16} {elapsed:>9.3f} {device.persist_count - persists:>9} {device.reinit_count - reinits:>7} "
+          f"{bus.transactions:>13}")
+
+
+def main() -> None:
+    print(f"{'start':>16} {'seconds':>9} {'persists':>9} {'reinits':>7} {'transactions':>13}")
+    for name, initialize in (("legacy", legacy_initialize_device), ("fast", initialize_device)):
+        device = SimulatedScd4x()
+        run(f"{name} cold", initialize, device)
+        run(f"{name} warm", initialize, device)
+
+
+if __name__ == "__main__":
+    main()
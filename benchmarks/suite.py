@@ -0,0 +1,134 @@
+"""End-to-end benchmark of the integration against simulated SCD4x sensors.
+
+Measures setup time, update latency, bus worker submissions (executor hops) per reading and
+memory use of SCD4XDataUpdateCoordinator with a growing number of sensors. Eight sensors share
+one simulated bus behind a multiplexer. Run from the repository root with the development
+requirements installed:
+
+    python3 benchmarks/suite.py [--sensors 1 4 8 16 32] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x  # noqa: E402
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator  # noqa: E402
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel  # noqa: E402
+from custom_components.scd4x_gpio_integration.const import DOMAIN, DATA_BUS_MANAGER  # noqa: E402
+
+SENSORS_PER_BUS = 8
+MUX_ADDRESS = 0x70
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+async def run(sensors: int, cycles: int, interval: float, latency: float, error_rate: float) -> dict:
+    buses: dict[str, SimulatedI2cBus] = {}
+    for index in range(sensors):
+        path = f"/dev/i2c-{index // SENSORS_PER_BUS}"
+        bus = buses.setdefault(path, SimulatedI2cBus(latency=latency, nack_rate=error_rate, seed=index))
+        bus.add_device(SimulatedScd4x(serial=index + 1, interval=interval, co2=400 + index),
+                       MUX_ADDRESS, index % SENSORS_PER_BUS)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: buses[path])}
+
+        tracemalloc.start()
+        coordinators = [
+            SCD4XDataUpdateCoordinator(hass, f"/dev/i2c-{index // SENSORS_PER_BUS}", None, 60, None,
+                                       mux_channel=MuxChannel(MUX_ADDRESS, index % SENSORS_PER_BUS))
+            for index in range(sensors)
+        ]
+        for coordinator in coordinators:
+            coordinator.api.scheduler.interval = interval
+
+        start = time.perf_counter()
+        await asyncio.gather(*[coordinator.async_setup() for coordinator in coordinators])
+        setup_time = time.perf_counter() - start
+
+        # The first reading learns the phase of each sensor, it is not part of the measurement.
+        await asyncio.gather(*[coordinator.async_refresh() for coordinator in coordinators])
+        workers = hass.data[DOMAIN][DATA_BUS_MANAGER].workers.values()
+        readings = -sum(coordinator.api.scheduler.readings for coordinator in coordinators)
+        submissions = -sum(worker.submissions for worker in workers)
+        polls = -sum(coordinator.api.scheduler.total_polls for coordinator in coordinators)
+
+        latencies: list[float] = []
+        failures = 0
+
+        async def acquire(coordinator: SCD4XDataUpdateCoordinator) -> None:
+            nonlocal failures
+            for _ in range(cycles):
+                await asyncio.sleep(coordinator.api.seconds_until_next_sample())
+                begin = time.perf_counter()
+                await coordinator.async_refresh()
+                latencies.append(time.perf_counter() - begin)
+                if not coordinator.last_update_success:
+                    failures += 1
+
+        await asyncio.gather(*[acquire(coordinator) for coordinator in coordinators])
+        memory_current, memory_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        readings += sum(coordinator.api.scheduler.readings for coordinator in coordinators)
+        submissions += sum(worker.submissions for worker in workers)
+        polls += sum(coordinator.api.scheduler.total_polls for coordinator in coordinators)
+
+        await asyncio.gather(*[coordinator.async_stop() for coordinator in coordinators])
+        await hass.async_stop(force=True)
+
+    return {
+        "sensors": sensors,
+        "setup_seconds": setup_time,
+        "update_ms_mean": statistics.mean(latencies) * 1000,
+        "update_ms_p99": percentile(latencies, 99) * 1000,
+        "hops_per_reading": submissions / readings if readings else None,
+        "polls_per_reading": polls / readings if readings else None,
+        "failed_updates": failures,
+        "memory_kib": memory_current / 1024,
+        "memory_peak_kib": memory_peak / 1024,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sensors", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.5, help="simulated measurement interval in s")
+    parser.add_argument("--latency", type=float, default=0.0002, help="bus latency per transaction in s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a NACK per transaction")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'sensors':>8} {'setup s':>8} {'mean ms':>8} {'p99 ms':>8} {'hops':>6} {'polls':>6} {'failed':>7} "
+          f"{'KiB':>8} {'peak KiB':>9}")
+    for sensors in args.sensors:
+        result = await run(sensors, args.cycles, args.interval, args.latency, args.error_rate)
+        results.append(result)
+        print(f"{result['sensors']:>8} {result['setup_seconds']:>8.2f} {result['update_ms_mean']:>8.2f} "
+              f"{result['update_ms_p99']:>8.2f} {result['hops_per_reading']:>6.2f} "
+              f"{result['polls_per_reading']:>6.2f} {result['failed_updates']:>7} "
+              f"{result['memory_kib']:>8.0f} {result['memory_peak_kib']:>9.0f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
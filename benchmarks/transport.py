@@ -0,0 +1,115 @@
+"""CPU time and allocations per measurement, sensirion driver stack vs native I2C_RDWR transport.
+
+Both transports are served canned responses of an SCD4x with a new measurement ready, so the
+figures are the cost of the transport itself. Sleeps are replaced by no-ops, so the 1 ms read
+delays are not part of the figures. Run from the repository root with the development requirements installed:
+
+    python3 benchmarks/transport.py [--readings 1000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sensirion_i2c_driver import I2cConnection  # noqa: E402
+from sensirion_i2c_driver.transceiver_v1 import I2cTransceiverV1  # noqa: E402
+
+from benchmarks.simulator import (  # noqa: E402
+    CMD_GET_DATA_READY_STATUS, CMD_READ_MEASUREMENT, encode_words,
+)
+from custom_components.scd4x_gpio_integration.metrics import Metrics  # noqa: E402
+from custom_components.scd4x_gpio_integration.native import I2C_M_RD, I2cRdwrTransceiver, NativeScd4xDevice  # noqa: E402,E501
+from custom_components.scd4x_gpio_integration.scd4x_api import (  # noqa: E402
+    InstrumentedScd4xI2cDevice, read_measurement_if_ready,
+)
+
+WARMUP = 50
+
+RESPONSES = {
+    CMD_GET_DATA_READY_STATUS: encode_words(0x0006),
+    CMD_READ_MEASUREMENT: encode_words(600, 26214, 29491),
+}
+
+
+class CannedTransceiver(I2cTransceiverV1):
+    """Answers every read command with its canned response."""
+
+    API_VERSION = 1
+
+    @property
+    def description(self) -> str:
+        return "canned"
+
+    @property
+    def channel_count(self) -> None:
+        return None
+
+    def transceive(self, slave_address, tx_data, rx_length, read_delay, timeout):
+        if rx_length:
+            return self.STATUS_OK, None, RESPONSES[(tx_data[0] << 8) | tx_data[1]][:rx_length]
+        return self.STATUS_OK, None, b""
+
+
+class CannedRdwrTransceiver(I2cRdwrTransceiver):
+    """I2cRdwrTransceiver whose ioctl copies the canned response into the receive buffer."""
+
+    def __init__(self) -> None:
+        super().__init__("canned")
+        self._command = 0
+
+    def _transfer(self, request) -> None:
+        message = request.msgs[0]
+        if message.flags & I2C_M_RD:
+            self.rx_buffer[:message.len] = RESPONSES[self._command]
+        else:
+            self._command = (self.tx_buffer[0] << 8) | self.tx_buffer[1]
+
+
+def create(transport: str):
+    if transport == "native":
+        return NativeScd4xDevice(CannedRdwrTransceiver(), Metrics())
+    return InstrumentedScd4xI2cDevice(I2cConnection(CannedTransceiver()), Metrics())
+
+
+def run(transport: str, readings: int) -> None:
+    device = create(transport)
+    for _ in range(WARMUP):
+        read_measurement_if_ready(device)
+
+    start = time.process_time()
+    for _ in range(readings):
+        read_measurement_if_ready(device)
+    cpu = (time.process_time() - start) / readings
+
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    peaks = []
+    for _ in range(readings):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        read_measurement_if_ready(device)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    retained = sys.getallocatedblocks() - blocks
+
+    print(f"{transport:>10} {cpu * 1e6:>12.1f} {sum(peaks) / len(peaks):>14.0f} {max(peaks):>10} "
+          f"{retained / readings:>16.3f}")
+
+
+def main() -> None:
+    time.sleep = lambda seconds: None
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'transport':>10} {'cpu us/read':>12} {'peak bytes/read':>14} {'max bytes':>10} "
+          f"{'retained blocks':>16}")
+    for transport in ("sensirion", "native"):
+        run(transport, args.readings)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,31 +3,89 @@ Custom integration to integrate scd4x_gpio_integration with Home Assistant.
 """
 import asyncio
 import logging
-import statistics
-from datetime import timedelta
-from queue import Queue
-from typing import Optional
+import os
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import Config, HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryError
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Config, Event, HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import STORAGE_DIR
 
 from .const import (
     DOMAIN,
     PLATFORMS,
     STARTUP_MESSAGE, CONF_I2C, TEMP_KEY, CO2_KEY, HUMIDITY_KEY, CONF_ALTITUDE, CONF_AVERAGE_WINDOW,
-    CONF_TEMPERATURE_OFFSET,
+    CONF_TEMPERATURE_OFFSET, CONF_AVERAGE_MODE, AVERAGE_MODE_SAMPLES, CONF_MUX_CHANNEL, CONF_MUX_ADDRESS,
+    DEFAULT_MUX_ADDRESS, CONF_CO2_DEADBAND, CONF_TEMPERATURE_DEADBAND, CONF_HUMIDITY_DEADBAND, CONF_MAX_SILENCE,
+    DEFAULT_MAX_SILENCE, CHANNEL_DIGITS, CONF_PUBLISH_INTERVAL, DEFAULT_PUBLISH_INTERVAL,
+    CONF_SAMPLE_BUFFER, DEFAULT_SAMPLE_BUFFER, CONF_TRANSPORT, TRANSPORT_SENSIRION, CONF_FILTER_MODE,
+    FILTER_MODE_HAMPEL, CONF_CO2_FILTER_WINDOW, CONF_CO2_FILTER_THRESHOLD, CONF_TEMPERATURE_FILTER_WINDOW,
+    CONF_TEMPERATURE_FILTER_THRESHOLD, CONF_HUMIDITY_FILTER_WINDOW, CONF_HUMIDITY_FILTER_THRESHOLD,
+    DEFAULT_FILTER_WINDOW, DEFAULT_FILTER_THRESHOLD, CONF_PRESSURE_ENTITY, CONF_PRESSURE_THRESHOLD,
+    CONF_PRESSURE_INTERVAL, DEFAULT_PRESSURE_THRESHOLD, DEFAULT_PRESSURE_INTERVAL, CONF_CO2_DIGITS,
+    CONF_TEMPERATURE_DIGITS, CONF_HUMIDITY_DIGITS, CONF_MEASUREMENT_MODE, MEASUREMENT_MODE_PERIODIC,
+    CONF_LONG_TERM_STATISTICS, CONF_DEVICE_NAME,
 )
-from .scd4x_api import SCD4xAPI
-
-SCAN_INTERVAL = timedelta(seconds=5)
+from .bus import MuxChannel
+from .services import async_setup_services
+
+# Options the running coordinator applies without reloading the entry, grouped by what they change.
+AVERAGING_OPTIONS = {CONF_AVERAGE_WINDOW, CONF_AVERAGE_MODE}
+FILTER_OPTIONS = {CONF_FILTER_MODE, CONF_CO2_FILTER_WINDOW, CONF_CO2_FILTER_THRESHOLD, CONF_TEMPERATURE_FILTER_WINDOW,
+                  CONF_TEMPERATURE_FILTER_THRESHOLD, CONF_HUMIDITY_FILTER_WINDOW, CONF_HUMIDITY_FILTER_THRESHOLD}
+DEADBAND_OPTIONS = {CONF_CO2_DEADBAND, CONF_TEMPERATURE_DEADBAND, CONF_HUMIDITY_DEADBAND, CONF_MAX_SILENCE}
+DIGITS_OPTIONS = {CONF_CO2_DIGITS, CONF_TEMPERATURE_DIGITS, CONF_HUMIDITY_DIGITS}
+PRESSURE_OPTIONS = {CONF_PRESSURE_ENTITY, CONF_PRESSURE_THRESHOLD, CONF_PRESSURE_INTERVAL}
+DEVICE_OPTIONS = {CONF_ALTITUDE, CONF_TEMPERATURE_OFFSET}
+LIVE_OPTIONS = (AVERAGING_OPTIONS | FILTER_OPTIONS | DEADBAND_OPTIONS | DIGITS_OPTIONS | PRESSURE_OPTIONS
+                | DEVICE_OPTIONS | {CONF_PUBLISH_INTERVAL})
+
+# Defaults of settings entries created by older versions do not have, applied before options are compared.
+ENTRY_DEFAULTS = {
+    CONF_AVERAGE_MODE: AVERAGE_MODE_SAMPLES,
+    CONF_MUX_ADDRESS: DEFAULT_MUX_ADDRESS,
+    CONF_CO2_DEADBAND: 0,
+    CONF_TEMPERATURE_DEADBAND: 0,
+    CONF_HUMIDITY_DEADBAND: 0,
+    CONF_MAX_SILENCE: DEFAULT_MAX_SILENCE,
+    CONF_PUBLISH_INTERVAL: DEFAULT_PUBLISH_INTERVAL,
+    CONF_CO2_DIGITS: CHANNEL_DIGITS[CO2_KEY],
+    CONF_TEMPERATURE_DIGITS: CHANNEL_DIGITS[TEMP_KEY],
+    CONF_HUMIDITY_DIGITS: CHANNEL_DIGITS[HUMIDITY_KEY],
+    CONF_SAMPLE_BUFFER: DEFAULT_SAMPLE_BUFFER,
+    CONF_TRANSPORT: TRANSPORT_SENSIRION,
+    CONF_FILTER_MODE: FILTER_MODE_HAMPEL,
+    CONF_CO2_FILTER_WINDOW: DEFAULT_FILTER_WINDOW,
+    CONF_CO2_FILTER_THRESHOLD: DEFAULT_FILTER_THRESHOLD,
+    CONF_TEMPERATURE_FILTER_WINDOW: DEFAULT_FILTER_WINDOW,
+    CONF_TEMPERATURE_FILTER_THRESHOLD: DEFAULT_FILTER_THRESHOLD,
+    CONF_HUMIDITY_FILTER_WINDOW: DEFAULT_FILTER_WINDOW,
+    CONF_HUMIDITY_FILTER_THRESHOLD: DEFAULT_FILTER_THRESHOLD,
+    CONF_PRESSURE_THRESHOLD: DEFAULT_PRESSURE_THRESHOLD,
+    CONF_PRESSURE_INTERVAL: DEFAULT_PRESSURE_INTERVAL,
+    CONF_MEASUREMENT_MODE: MEASUREMENT_MODE_PERIODIC,
+    CONF_LONG_TERM_STATISTICS: False,
+}
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
 async def async_setup(hass: HomeAssistant, config: Config):
     """Set up this integration using YAML is not supported."""
+    async_setup_services(hass)
+
+    async def async_stop_all(_event: Event) -> None:
+        """Stop all sensors together on shutdown, config entries are not unloaded then."""
+        coordinators = [hass.data[DOMAIN][entry.entry_id] for entry in hass.config_entries.async_entries(DOMAIN)
+                        if entry.entry_id in hass.data.get(DOMAIN, {})]
+        if not coordinators:
+            return
+        from .coordinator import async_stop_coordinators  # pylint: disable=import-outside-toplevel
+
+        _LOGGER.debug(f"Stopping {len(coordinators)} SCD4x sensors")
+        await async_stop_coordinators(coordinators)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_all)
     return True
 
 
@@ -38,100 +96,110 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         hass.data.setdefault(DOMAIN, {})
         _LOGGER.info(STARTUP_MESSAGE)
 
-    i2cpath = entry.data.get(CONF_I2C)
-    altitude = None
-    if CONF_ALTITUDE in entry.data:
-        altitude = entry.data.get(CONF_ALTITUDE)
+    config = _entry_config(entry)
+    i2cpath = config.get(CONF_I2C)
+    altitude = config.get(CONF_ALTITUDE)
+    moving_average_window = config.get(CONF_AVERAGE_WINDOW)
+    moving_average_mode = config.get(CONF_AVERAGE_MODE, AVERAGE_MODE_SAMPLES)
+    temperature_offset = config.get(CONF_TEMPERATURE_OFFSET)
 
-    moving_average_window = None
-    if CONF_AVERAGE_WINDOW in entry.data:
-        moving_average_window = entry.data.get(CONF_AVERAGE_WINDOW)
-
-    temperature_offset = None
-    if CONF_TEMPERATURE_OFFSET in entry.data:
-        temperature_offset = entry.data.get(CONF_TEMPERATURE_OFFSET)
+    mux_channel = None
+    if config.get(CONF_MUX_CHANNEL) is not None:
+        mux_channel = MuxChannel(config.get(CONF_MUX_ADDRESS, DEFAULT_MUX_ADDRESS), config[CONF_MUX_CHANNEL])
 
     _LOGGER.debug(f"Configured I2C Path is {i2cpath}")
     _LOGGER.debug(f"Configured Altitude is {altitude}")
     _LOGGER.debug(f"Configured Moving Average Time Window is {moving_average_window}")
+    _LOGGER.debug(f"Configured Moving Average Mode is {moving_average_mode}")
     _LOGGER.debug(f"Configured Temperature Offset is {temperature_offset}")
-
-    coordinator = SCD4XDataUpdateCoordinator(hass, i2cpath, altitude, moving_average_window, temperature_offset)
+    deadbands = _deadbands(config)
+    max_silence = config.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
+    publish_interval = config.get(CONF_PUBLISH_INTERVAL, DEFAULT_PUBLISH_INTERVAL)
+    digits = _digits(config)
+    sample_buffer_size = config.get(CONF_SAMPLE_BUFFER, DEFAULT_SAMPLE_BUFFER)
+    transport = config.get(CONF_TRANSPORT, TRANSPORT_SENSIRION)
+    filter_mode = config.get(CONF_FILTER_MODE, FILTER_MODE_HAMPEL)
+    filters = _filters(config)
+    pressure_entity = config.get(CONF_PRESSURE_ENTITY) or None
+    pressure_threshold = config.get(CONF_PRESSURE_THRESHOLD, DEFAULT_PRESSURE_THRESHOLD)
+    pressure_interval = config.get(CONF_PRESSURE_INTERVAL, DEFAULT_PRESSURE_INTERVAL)
+    measurement_mode = config.get(CONF_MEASUREMENT_MODE, MEASUREMENT_MODE_PERIODIC)
+    statistics_name = (config.get(CONF_DEVICE_NAME) or DOMAIN) if config.get(CONF_LONG_TERM_STATISTICS) else None
+
+    _LOGGER.debug(f"Configured Multiplexer Channel is {mux_channel}")
+    _LOGGER.debug(f"Configured Deadbands are {deadbands}, Maximum Silence is {max_silence}")
+    _LOGGER.debug(f"Configured Publish Interval is {publish_interval}, Sample Buffer Size is {sample_buffer_size}")
+    _LOGGER.debug(f"Configured Transport is {transport}")
+    _LOGGER.debug(f"Configured Outlier Filter is {filter_mode}, window and threshold per channel {filters}")
+    _LOGGER.debug(f"Configured Pressure Entity is {pressure_entity}, threshold {pressure_threshold} hPa, "
+                  f"interval {pressure_interval}s")
+    _LOGGER.debug(f"Configured Measurement Mode is {measurement_mode}")
+    _LOGGER.debug(f"Configured Long-Term Statistics are {'imported as ' + statistics_name if statistics_name else 'off'}")
+
+    # The coordinator pulls in the sensor driver, which is only needed once an entry is set up.
+    from .coordinator import SCD4XDataUpdateCoordinator  # pylint: disable=import-outside-toplevel
+
+    coordinator = SCD4XDataUpdateCoordinator(hass, i2cpath, altitude, moving_average_window, temperature_offset,
+                                             moving_average_mode, mux_channel, deadbands, max_silence,
+                                             publish_interval, sample_buffer_size, _sample_file_path(hass, entry),
+                                             transport, filter_mode, filters, pressure_entity, pressure_threshold,
+                                             pressure_interval, digits, measurement_mode, statistics_name)
+    coordinator.entry_config = config
     await coordinator.async_setup()
     await coordinator.async_refresh()
 
     if not coordinator.last_update_success:
         _LOGGER.debug("Coordinator Last Update Success is false")
+        # Release the bus, the sample file and the listeners, the retry sets them up again.
+        await coordinator.async_stop()
         raise ConfigEntryNotReady
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    coordinator.async_start_acquisition()
 
     for platform in PLATFORMS:
         if entry.options.get(platform, True):
             coordinator.platforms.append(platform)
             await hass.async_add_job(hass.config_entries.async_forward_entry_setup(entry, platform))
 
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
-def calculate_moving_average(queue: Queue, new_value: float) -> float:
-    if queue.full():
-        queue.get()
+def _entry_config(entry: ConfigEntry) -> dict:
+    """Settings of the setup, overridden by the options, with defaults for settings the entry lacks."""
+    return {**ENTRY_DEFAULTS, **entry.data, **entry.options}
 
-    queue.put(new_value)
-    return statistics.mean(queue.queue)
 
+def _deadbands(config: dict) -> dict[str, float]:
+    return {
+        CO2_KEY: config.get(CONF_CO2_DEADBAND, 0),
+        TEMP_KEY: config.get(CONF_TEMPERATURE_DEADBAND, 0),
+        HUMIDITY_KEY: config.get(CONF_HUMIDITY_DEADBAND, 0),
+    }
 
-class SCD4XDataUpdateCoordinator(DataUpdateCoordinator):
 
-    def __init__(self, hass: HomeAssistant, i2cpath: str, altitude: Optional[int],
-                 moving_average_window: Optional[int], temperature_offset: Optional[float]) -> None:
-        _LOGGER.debug("Initializing coordinator for SCD4x GPIO Integration")
-        self.platforms = []
+def _digits(config: dict) -> dict[str, int]:
+    return {
+        CO2_KEY: config.get(CONF_CO2_DIGITS, CHANNEL_DIGITS[CO2_KEY]),
+        TEMP_KEY: config.get(CONF_TEMPERATURE_DIGITS, CHANNEL_DIGITS[TEMP_KEY]),
+        HUMIDITY_KEY: config.get(CONF_HUMIDITY_DIGITS, CHANNEL_DIGITS[HUMIDITY_KEY]),
+    }
 
-        self._temperature_offset = temperature_offset if temperature_offset is not None else 4
-        self._api = SCD4xAPI(i2cpath, altitude, self._temperature_offset)
-        self._moving_average_window = moving_average_window if moving_average_window is not None and moving_average_window > 0 else 1
 
-        self._co2_queue = Queue(self._moving_average_window)
-        self._temperature_queue = Queue(self._moving_average_window)
-        self._humidity_queue = Queue(self._moving_average_window)
+def _filters(config: dict) -> dict[str, tuple[int, float]]:
+    return {
+        CO2_KEY: (config.get(CONF_CO2_FILTER_WINDOW, DEFAULT_FILTER_WINDOW),
+                  config.get(CONF_CO2_FILTER_THRESHOLD, DEFAULT_FILTER_THRESHOLD)),
+        TEMP_KEY: (config.get(CONF_TEMPERATURE_FILTER_WINDOW, DEFAULT_FILTER_WINDOW),
+                   config.get(CONF_TEMPERATURE_FILTER_THRESHOLD, DEFAULT_FILTER_THRESHOLD)),
+        HUMIDITY_KEY: (config.get(CONF_HUMIDITY_FILTER_WINDOW, DEFAULT_FILTER_WINDOW),
+                       config.get(CONF_HUMIDITY_FILTER_THRESHOLD, DEFAULT_FILTER_THRESHOLD)),
+    }
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
 
-    async def async_stop(self) -> None:
-        try:
-            _LOGGER.info("Stopping SCD4x API")
-            await self._api.async_stop()
-        except Exception as exception:
-            raise ConfigEntryError from exception
-
-    async def _async_update_data(self):
-        try:
-            _LOGGER.debug("Try to get new data from SCD4x API")
-            sensor_data = await self._api.async_read_data()
-
-            if not sensor_data:
-                raise UpdateFailed()
-
-            data = {
-                CO2_KEY: round(calculate_moving_average(self._co2_queue, sensor_data[0]), 0),
-                TEMP_KEY: round(calculate_moving_average(self._temperature_queue, sensor_data[1]), 1),
-                HUMIDITY_KEY: round(calculate_moving_average(self._humidity_queue, sensor_data[2]), 0)
-            }
-            return data
-        except Exception as exception:
-            _LOGGER.error(f"Update failed: {exception}")
-            raise UpdateFailed() from exception
-
-    async def async_setup(self) -> None:
-        try:
-            _LOGGER.debug("Setting up SCD4x coordinator")
-            await self._api.async_initialize()
-        except Exception as exception:
-            await self._api.async_stop()
-            raise ConfigEntryError from exception
+def _sample_file_path(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry.entry_id}.samples")
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -154,6 +222,57 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the persisted samples of a removed entry."""
+    path = _sample_file_path(hass, entry)
+    if await hass.async_add_executor_job(os.path.exists, path):
+        await hass.async_add_executor_job(os.remove, path)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the running coordinator, reload only for options it cannot apply live."""
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is None:
+        return
+
+    config = _entry_config(entry)
+    previous = coordinator.entry_config
+    changed = {key for key in config.keys() | previous.keys() if config.get(key) != previous.get(key)}
+    if not changed:
+        return
+    if not changed <= LIVE_OPTIONS:
+        _LOGGER.debug(f"Reloading for changed options {changed - LIVE_OPTIONS}")
+        await async_reload_entry(hass, entry)
+        return
+
+    _LOGGER.debug(f"Applying changed options {changed} without reload")
+    coordinator.entry_config = config
+    if changed & AVERAGING_OPTIONS:
+        await coordinator.async_set_averaging(config.get(CONF_AVERAGE_MODE, AVERAGE_MODE_SAMPLES),
+                                              config.get(CONF_AVERAGE_WINDOW))
+    if changed & FILTER_OPTIONS:
+        coordinator.set_filters(config.get(CONF_FILTER_MODE, FILTER_MODE_HAMPEL), _filters(config))
+    if changed & DEADBAND_OPTIONS:
+        coordinator.set_deadbands(_deadbands(config), config.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE))
+    if changed & DIGITS_OPTIONS:
+        coordinator.set_digits(_digits(config))
+    if CONF_PUBLISH_INTERVAL in changed:
+        await coordinator.async_set_publish_interval(config.get(CONF_PUBLISH_INTERVAL, DEFAULT_PUBLISH_INTERVAL))
+    try:
+        if changed & PRESSURE_OPTIONS:
+            await coordinator.async_set_pressure(config.get(CONF_PRESSURE_ENTITY) or None,
+                                                 config.get(CONF_PRESSURE_THRESHOLD, DEFAULT_PRESSURE_THRESHOLD),
+                                                 config.get(CONF_PRESSURE_INTERVAL, DEFAULT_PRESSURE_INTERVAL))
+        if changed & DEVICE_OPTIONS:
+            await coordinator.async_set_device_settings(config.get(CONF_ALTITUDE),
+                                                        config.get(CONF_TEMPERATURE_OFFSET))
+    except Exception as exception:
+        _LOGGER.warning(f"Unable to apply options to the running sensor, reloading: {exception}")
+        await async_reload_entry(hass, entry)
+        return
+    coordinator.async_republish()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
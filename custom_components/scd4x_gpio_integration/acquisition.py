@@ -0,0 +1,224 @@
+"""Acquisition scheduling aligned to the SCD4x measurement cadence."""
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .const import MEASUREMENT_MODE_LOW_POWER, SINGLE_SHOT_MODES
+from .derived import IncrementalSlope
+
+_T = TypeVar("_T")
+
+# Periodic measurement interval of the SCD4x.
+MEASUREMENT_INTERVAL = 5.0
+# Low power periodic measurement interval of the SCD41.
+LOW_POWER_MEASUREMENT_INTERVAL = 30.0
+# Time the SCD41 takes for a single shot.
+SINGLE_SHOT_DURATION = 5.0
+# Wake this long after the expected sample, so data ready is already set.
+READY_MARGIN = 0.05
+# Bounds for the exponential data ready polling used when a sample is late.
+INITIAL_POLL_DELAY = 0.05
+MAX_POLL_DELAY = 1.0
+# Every n readings wake early once to catch the sensor clock running faster than ours.
+RESYNC_EVERY = 12
+RESYNC_LEAD = 0.5
+
+# Shortest interval between single shots of the adaptive sampling, taken while CO2 changes fast.
+ADAPTIVE_MIN_INTERVAL = 10.0
+# CO2 trend in ppm per minute from which the adaptive sampling takes its shortest interval. Below
+# half of it the interval doubles per shot back to the configured one.
+ADAPTIVE_RATE_THRESHOLD = 30.0
+# The trend is the least squares slope over the shots of this many seconds, which averages out
+# the noise of the closely spaced shots. The window always holds the last two shots of the
+# configured interval, otherwise a slow sampling would never see a trend to speed up on.
+ADAPTIVE_RATE_WINDOW = 120.0
+
+
+def measurement_interval(mode: str) -> float:
+    """Time from the start of a measurement to its sample for a measurement mode."""
+    if mode == MEASUREMENT_MODE_LOW_POWER:
+        return LOW_POWER_MEASUREMENT_INTERVAL
+    if mode in SINGLE_SHOT_MODES:
+        return SINGLE_SHOT_DURATION
+    return MEASUREMENT_INTERVAL
+
+
+class AcquisitionScheduler:
+    """Learns the phase of the sensor from data ready and schedules reads after each sample."""
+
+    def __init__(self, interval: float = MEASUREMENT_INTERVAL, clock: Callable[[], float] = time.monotonic) -> None:
+        self._interval = interval
+        self._clock = clock
+        self._last_sample: Optional[float] = None
+        self._reads_since_sync = 0
+
+        self.last_wait = 0.0
+        self.last_polls = 0
+        self.readings = 0
+        self.total_wait = 0.0
+        self.total_polls = 0
+        self.max_polls = 0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        self._interval = interval
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the learned phase, e.g. after the measurement was restarted."""
+        self._last_sample = None
+        self._reads_since_sync = 0
+
+    def trigger(self) -> None:
+        """A single shot was started, so its sample is expected one interval from now."""
+        self._last_sample = self._clock()
+        self._reads_since_sync = 0
+
+    def next_wake(self) -> float:
+        """Clock time at which the next sample is expected to be readable."""
+        now = self._clock()
+        if self._last_sample is None:
+            return now
+        wake = self._last_sample + self._interval + READY_MARGIN
+        if self._reads_since_sync >= RESYNC_EVERY:
+            wake -= RESYNC_LEAD
+        return max(now, wake)
+
+    def seconds_until_next_sample(self) -> float:
+        return max(self.next_wake() - self._clock(), 0.0)
+
+    async def async_acquire(self, try_read: Callable[[], Awaitable[Optional[_T]]]) -> _T:
+        """Sleep until the expected sample, then poll with bounded backoff if it is late.
+
+        try_read returns None as long as the sensor has no data ready.
+        """
+        start = self._clock()
+        wake = self.next_wake()
+        if wake > start:
+            await asyncio.sleep(wake - start)
+
+        polls = 0
+        delay = INITIAL_POLL_DELAY
+        last_not_ready = None
+        while True:
+            polls += 1
+            result = await try_read()
+            if result is not None:
+                break
+            last_not_ready = self._clock()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_DELAY)
+
+        ready = self._clock()
+        self._learn(ready, last_not_ready is not None)
+
+        self.last_wait = ready - start
+        self.last_polls = polls
+        self.readings += 1
+        self.total_wait += self.last_wait
+        self.total_polls += polls
+        self.max_polls = max(self.max_polls, polls)
+        return result
+
+    def _learn(self, ready: float, observed_transition: bool) -> None:
+        if observed_transition or self._last_sample is None:
+            # Data ready went true between the last two polls, which pins the phase.
+            self._last_sample = ready
+            self._reads_since_sync = 0
+            return
+
+        # Ready on the first poll, so the sample is at or before the expected time.
+        periods = max(int((ready - self._last_sample) / self._interval), 1)
+        self._last_sample = min(self._last_sample + periods * self._interval, ready)
+        self._reads_since_sync += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "interval": self._interval,
+            "last_data_ready_wait": self.last_wait,
+            "last_data_ready_polls": self.last_polls,
+            "readings": self.readings,
+            "mean_data_ready_wait": self.total_wait / self.readings if self.readings else None,
+            "mean_data_ready_polls": self.total_polls / self.readings if self.readings else None,
+            "max_data_ready_polls": self.max_polls,
+        }
+
+
+class SingleShotSampling:
+    """Interval between single shots, fixed or adapted to how fast CO2 changes.
+
+    A fixed sampling takes one shot per interval. An adaptive one drops to min_interval once the
+    CO2 trend reaches rate_threshold ppm per minute, so fast changes are sampled closely, and
+    doubles the interval with every shot back to the configured one once the trend fell below
+    half the threshold.
+    """
+
+    def __init__(self, interval: float, adaptive: bool = False, min_interval: float = ADAPTIVE_MIN_INTERVAL,
+                 rate_threshold: float = ADAPTIVE_RATE_THRESHOLD) -> None:
+        self._adaptive = adaptive
+        self._min_interval = min_interval
+        self._rate_threshold = rate_threshold
+        self._max_interval = max(interval, min_interval)
+        self._trend = self._create_trend()
+        self.interval = self._max_interval
+        self.shots = 0
+        self.fast_shots = 0
+
+    @property
+    def adaptive(self) -> bool:
+        return self._adaptive
+
+    @property
+    def max_interval(self) -> float:
+        return self._max_interval
+
+    @property
+    def fast(self) -> bool:
+        """Whether shots are closer than configured, because CO2 changes or recently changed fast."""
+        return self.interval < self._max_interval
+
+    def configure(self, interval: float) -> None:
+        window = self._trend_window()
+        self._max_interval = max(interval, self._min_interval)
+        if self._trend_window() != window:
+            self._trend = self._create_trend()
+        self.interval = min(self.interval, self._max_interval) if self._adaptive else self._max_interval
+
+    def _trend_window(self) -> float:
+        return max(ADAPTIVE_RATE_WINDOW, 2 * self._max_interval)
+
+    def _create_trend(self) -> IncrementalSlope:
+        window = self._trend_window()
+        return IncrementalSlope(math.ceil(window / self._min_interval) + 1, window)
+
+    def add(self, co2: float, timestamp: float) -> float:
+        """Account for the CO2 of a shot and return the interval until the next one."""
+        self.shots += 1
+        if not self._adaptive:
+            return self.interval
+
+        self._trend.add(co2, timestamp)
+        slope = self._trend.slope
+        rate = abs(slope) * 60 if slope is not None else 0.0
+        if rate >= self._rate_threshold:
+            self.interval = self._min_interval
+        elif rate < self._rate_threshold / 2:
+            self.interval = min(self.interval * 2, self._max_interval)
+        if self.interval == self._min_interval:
+            self.fast_shots += 1
+        return self.interval
+
+    def as_dict(self) -> dict:
+        slope = self._trend.slope
+        return {
+            "adaptive": self._adaptive,
+            "interval": self.interval,
+            "co2_trend": round(slope * 60, 1) if slope is not None else None,
+            "shots": self.shots,
+            "fast_shots": self.fast_shots,
+        }
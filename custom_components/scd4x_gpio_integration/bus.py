@@ -0,0 +1,307 @@
+"""I2C bus access for scd4x_gpio_integration."""
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_BUS_MANAGER, TRANSPORT_NATIVE, TRANSPORT_SENSIRION
+from .metrics import Metrics, METRIC_EXECUTOR_QUEUE
+
+if TYPE_CHECKING:
+    from sensirion_i2c_driver import I2cConnection
+    from sensirion_i2c_driver.transceiver_v1 import I2cTransceiverV1
+
+# Reads submitted within this window are executed as one batch, ordered by multiplexer channel.
+BATCH_WINDOW = 0.02
+MUX_TIMEOUT = 0.1
+# Devices sharing a bus fail together, reopen the transceiver only once for all of them.
+REOPEN_COALESCE = 1.0
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class MuxChannel(NamedTuple):
+    """Channel of a TCA9548A style I2C multiplexer."""
+
+    address: int
+    channel: int
+
+
+class I2cMuxError(Exception):
+    """Selecting a multiplexer channel failed."""
+
+
+def sensirion_transceiver(i2cpath: str) -> "I2cTransceiverV1":
+    """Transceiver of the sensirion driver. The driver is imported on the first open, not with this module."""
+    from sensirion_i2c_driver import LinuxI2cTransceiver  # pylint: disable=import-outside-toplevel
+    return LinuxI2cTransceiver(i2cpath)
+
+
+def native_transceiver(i2cpath: str) -> "I2cTransceiverV1":
+    """Transceiver issuing I2C_RDWR ioctls, imported on the first open as well."""
+    from .native import I2cRdwrTransceiver  # pylint: disable=import-outside-toplevel
+    return I2cRdwrTransceiver(i2cpath)
+
+
+def _channel_key(channel: Optional[MuxChannel]) -> tuple[int, int]:
+    return (-1, -1) if channel is None else (channel.address, channel.channel)
+
+
+class I2cBusWorker:
+    """Single worker thread owning the transceiver of one I2C path.
+
+    Every bus operation is submitted to this thread, so access to the bus is serialized
+    without locks and blocking I/O never runs on the event loop or the shared executor.
+    """
+
+    def __init__(self, i2cpath: str, transceiver_factory: Callable[[str], "I2cTransceiverV1"] = sensirion_transceiver) -> None:
+        self._i2cpath = i2cpath
+        self._transceiver_factory = transceiver_factory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"scd4x_i2c{i2cpath.replace('/', '_')}")
+        self._transceiver: Optional["I2cTransceiverV1"] = None
+        self._connection: Optional["I2cConnection"] = None
+        self._selected_channels: dict[int, int] = {}
+        self._pending: list[tuple[Optional[MuxChannel], Callable[[], Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.metrics = Metrics()
+        self.submissions = 0
+        self.channel_switches = 0
+        self.batches = 0
+        self.reopens = 0
+        self._last_reopen = float("-inf")
+
+    @property
+    def i2cpath(self) -> str:
+        return self._i2cpath
+
+    @property
+    def connection(self) -> Optional["I2cConnection"]:
+        return self._connection
+
+    @property
+    def transceiver(self) -> Optional["I2cTransceiverV1"]:
+        return self._transceiver
+
+    async def async_run(self, method: Callable[..., Any], *args, channel: Optional[MuxChannel] = None,
+                        **kwargs) -> Any:
+        """Run a blocking (composite) bus operation on the worker thread."""
+        loop = asyncio.get_running_loop()
+        self.submissions += 1
+        return await loop.run_in_executor(
+            self._executor, self._run_submitted, time.perf_counter(), channel,
+            functools.partial(method, *args, **kwargs))
+
+    async def async_run_batched(self, method: Callable[..., Any], *args, channel: Optional[MuxChannel] = None,
+                                **kwargs) -> Any:
+        """Like async_run, but coalesced with the operations other devices submit at the same time.
+
+        A batch visits each multiplexer channel at most once. Operations without a channel gain nothing
+        from waiting for a batch and run right away.
+        """
+        if channel is None:
+            return await self.async_run(method, *args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((channel, functools.partial(method, *args, **kwargs), future))
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(BATCH_WINDOW, self._flush)
+        return await future
+
+    async def async_open(self) -> "I2cConnection":
+        return await self.async_run(self._open)
+
+    async def async_reopen(self) -> None:
+        """Close and reopen the transceiver, keeping the connection the devices hold."""
+        await self.async_run(self._reopen)
+
+    async def async_close(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush()
+        try:
+            await self.async_run(self._close)
+        finally:
+            # Operations still queued behind a hung one are dropped, the thread ends once that one returns.
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._pending = self._pending, []
+        batch.sort(key=lambda item: _channel_key(item[0]))
+        self.batches += 1
+        self.submissions += 1
+
+        loop = asyncio.get_running_loop()
+        batch_future = loop.run_in_executor(self._executor, self._run_batch, time.perf_counter(),
+                                            [item[:2] for item in batch])
+        batch_future.add_done_callback(functools.partial(_resolve_batch, [item[2] for item in batch]))
+
+    def _run_batch(self, submitted: float,
+                   batch: list[tuple[Optional[MuxChannel], Callable[[], Any]]]) -> list[tuple[bool, Any]]:
+        self.metrics.record(METRIC_EXECUTOR_QUEUE, time.perf_counter() - submitted)
+        outcomes = []
+        for channel, method in batch:
+            try:
+                outcomes.append((True, self._run_on_channel(channel, method)))
+            except Exception as exception:  # pylint: disable=broad-except
+                outcomes.append((False, exception))
+        return outcomes
+
+    def _run_submitted(self, submitted: float, channel: Optional[MuxChannel], method: Callable[[], Any]) -> Any:
+        self.metrics.record(METRIC_EXECUTOR_QUEUE, time.perf_counter() - submitted)
+        return self._run_on_channel(channel, method)
+
+    def _run_on_channel(self, channel: Optional[MuxChannel], method: Callable[[], Any]) -> Any:
+        if channel is not None:
+            self._select_channel(channel)
+        return method()
+
+    def _select_channel(self, channel: MuxChannel) -> None:
+        if self._selected_channels.get(channel.address) == channel.channel:
+            return
+
+        status, error, _ = self._transceiver.transceive(
+            channel.address, bytes([1 << channel.channel]), None, 0.0, MUX_TIMEOUT)
+        if status != self._transceiver.STATUS_OK:
+            self._selected_channels.pop(channel.address, None)
+            raise I2cMuxError(f"Unable to select channel {channel.channel} of multiplexer "
+                              f"{channel.address:#04x} on {self._i2cpath}: {error}")
+        self._selected_channels[channel.address] = channel.channel
+        self.channel_switches += 1
+
+    def _open(self) -> "I2cConnection":
+        from sensirion_i2c_driver import I2cConnection  # pylint: disable=import-outside-toplevel
+
+        if self._connection is None:
+            _LOGGER.debug(f"Opening i2c transceiver for {self._i2cpath}.")
+            transceiver = self._transceiver_factory(self._i2cpath)
+            transceiver.open()
+            self._transceiver = transceiver
+            self._connection = I2cConnection(transceiver)
+        return self._connection
+
+    def _reopen(self) -> None:
+        if time.monotonic() - self._last_reopen < REOPEN_COALESCE:
+            _LOGGER.debug(f"I2c transceiver for {self._i2cpath} was just reopened.")
+            return
+        self._selected_channels.clear()
+        if self._transceiver is None:
+            self._open()
+        else:
+            _LOGGER.debug(f"Reopening i2c transceiver for {self._i2cpath}.")
+            try:
+                self._transceiver.close()
+            except OSError as exception:
+                _LOGGER.debug(f"Closing i2c transceiver for {self._i2cpath} failed: {exception}")
+            self._transceiver.open()
+        self._last_reopen = time.monotonic()
+        self.reopens += 1
+
+    def _close(self) -> None:
+        transceiver = self._transceiver
+        self._transceiver = None
+        self._connection = None
+        self._selected_channels.clear()
+        if transceiver is not None:
+            _LOGGER.debug(f"Closing i2c transceiver for {self._i2cpath}.")
+            transceiver.close()
+
+    def as_dict(self) -> dict:
+        return {
+            "i2c_path": self._i2cpath,
+            "submissions": self.submissions,
+            "channel_switches": self.channel_switches,
+            "batches": self.batches,
+            "reopens": self.reopens,
+            "metrics": self.metrics.as_dict(),
+        }
+
+
+def _resolve_batch(futures: list[asyncio.Future], batch_future: asyncio.Future) -> None:
+    if batch_future.cancelled() or batch_future.exception() is not None:
+        exception = asyncio.CancelledError() if batch_future.cancelled() else batch_future.exception()
+        for future in futures:
+            if not future.done():
+                future.set_exception(exception)
+        return
+
+    for future, (success, value) in zip(futures, batch_future.result()):
+        if future.done():
+            continue
+        if success:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+
+class I2cBusManager:
+    """Reference counted registry handing out one bus worker per I2C path."""
+
+    def __init__(self, transceiver_factory: Callable[[str], "I2cTransceiverV1"] = sensirion_transceiver,
+                 native_transceiver_factory: Callable[[str], "I2cTransceiverV1"] = native_transceiver) -> None:
+        self._transceiver_factories = {
+            TRANSPORT_SENSIRION: transceiver_factory,
+            TRANSPORT_NATIVE: native_transceiver_factory,
+        }
+        self._workers: dict[str, I2cBusWorker] = {}
+        self._references: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def workers(self) -> dict[str, I2cBusWorker]:
+        return self._workers
+
+    async def async_acquire(self, i2cpath: str, transport: str = TRANSPORT_SENSIRION) -> I2cBusWorker:
+        """Return the worker of i2cpath, opening it with transport if it is not open yet."""
+        async with self._lock:
+            worker = self._workers.get(i2cpath)
+            if worker is None and transport == TRANSPORT_NATIVE:
+                try:
+                    worker = await self._async_open(i2cpath, TRANSPORT_NATIVE)
+                except OSError as exception:
+                    _LOGGER.warning(f"Native transport unavailable for {i2cpath}, "
+                                    f"falling back to the sensirion driver: {exception}")
+            if worker is None:
+                worker = await self._async_open(i2cpath, TRANSPORT_SENSIRION)
+            if i2cpath not in self._workers:
+                self._workers[i2cpath] = worker
+                self._references[i2cpath] = 0
+            self._references[i2cpath] += 1
+            _LOGGER.debug(f"Acquired i2c bus {i2cpath}, {self._references[i2cpath]} users.")
+            return worker
+
+    async def _async_open(self, i2cpath: str, transport: str) -> I2cBusWorker:
+        worker = I2cBusWorker(i2cpath, self._transceiver_factories[transport])
+        try:
+            await worker.async_open()
+        except Exception:
+            await worker.async_close()
+            raise
+        return worker
+
+    async def async_release(self, worker: I2cBusWorker) -> None:
+        async with self._lock:
+            i2cpath = worker.i2cpath
+            if self._workers.get(i2cpath) is not worker:
+                return
+            self._references[i2cpath] -= 1
+            _LOGGER.debug(f"Released i2c bus {i2cpath}, {self._references[i2cpath]} users.")
+            if self._references[i2cpath] > 0:
+                return
+            del self._workers[i2cpath]
+            del self._references[i2cpath]
+        await worker.async_close()
+
+
+def get_bus_manager(hass: HomeAssistant) -> I2cBusManager:
+    """Return the bus manager shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_BUS_MANAGER not in domain_data:
+        domain_data[DATA_BUS_MANAGER] = I2cBusManager()
+    return domain_data[DATA_BUS_MANAGER]
@@ -4,10 +4,26 @@ from typing import Optional
 
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.helpers.selector import (EntitySelector, EntitySelectorConfig, SelectSelector, SelectSelectorConfig,
+                                            SelectSelectorMode)
 
-from . import SCD4xAPI
 from .const import (DOMAIN, CONF_I2C, CONF_SERIAL, CONF_ALTITUDE, CONF_AVERAGE_WINDOW, CONF_TEMPERATURE_OFFSET,
-                    CONF_DEVICE_NAME)
+                    CONF_DEVICE_NAME, CONF_AVERAGE_MODE, AVERAGE_MODE_SAMPLES, AVERAGE_MODES, CONF_MUX_ADDRESS,
+                    CONF_MUX_CHANNEL, DEFAULT_MUX_ADDRESS, CONF_CO2_DEADBAND, CONF_TEMPERATURE_DEADBAND,
+                    CONF_HUMIDITY_DEADBAND, CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE, CONF_PUBLISH_INTERVAL,
+                    DEFAULT_PUBLISH_INTERVAL, CONF_SAMPLE_BUFFER, DEFAULT_SAMPLE_BUFFER,
+                    CONF_TRANSPORT, TRANSPORT_SENSIRION, TRANSPORTS, CONF_DERIVED_SENSORS, CONF_FILTER_MODE,
+                    FILTER_MODE_HAMPEL, FILTER_MODES, CONF_CO2_FILTER_WINDOW, CONF_CO2_FILTER_THRESHOLD,
+                    CONF_TEMPERATURE_FILTER_WINDOW, CONF_TEMPERATURE_FILTER_THRESHOLD, CONF_HUMIDITY_FILTER_WINDOW,
+                    CONF_HUMIDITY_FILTER_THRESHOLD, DEFAULT_FILTER_WINDOW, DEFAULT_FILTER_THRESHOLD,
+                    CONF_PRESSURE_ENTITY, CONF_PRESSURE_THRESHOLD, CONF_PRESSURE_INTERVAL, DEFAULT_PRESSURE_THRESHOLD,
+                    DEFAULT_PRESSURE_INTERVAL, CONF_CO2_DIGITS, CONF_TEMPERATURE_DIGITS, CONF_HUMIDITY_DIGITS,
+                    CHANNEL_DIGITS, CO2_KEY, TEMP_KEY, HUMIDITY_KEY, CONF_MEASUREMENT_MODE, MEASUREMENT_MODE_PERIODIC,
+                    MEASUREMENT_MODES, CONF_LONG_TERM_STATISTICS)
+from .bus import MuxChannel
+from .discovery import async_discover, async_probe
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -20,6 +36,11 @@ class Scd4xConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self._errors = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return Scd4xOptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         self._errors = {}
 
@@ -35,9 +56,14 @@ class Scd4xConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             if CONF_TEMPERATURE_OFFSET in user_input:
                 temperature_offset = user_input[CONF_TEMPERATURE_OFFSET]
 
-            valid, serial = await self._test_i2cpath(i2c_path, altitude, temperature_offset)
+            mux_channel = None
+            if user_input.get(CONF_MUX_CHANNEL) is not None:
+                mux_channel = MuxChannel(user_input.get(CONF_MUX_ADDRESS, DEFAULT_MUX_ADDRESS),
+                                         user_input[CONF_MUX_CHANNEL])
+
+            serial = await self._test_i2cpath(i2c_path, altitude, temperature_offset, mux_channel)
 
-            if valid:
+            if serial is not None:
                 _LOGGER.debug(f"Device Serial Number: {serial}")
                 user_input[CONF_SERIAL] = serial
 
@@ -47,42 +73,150 @@ class Scd4xConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
             return await self._show_config_form(user_input)
 
-        user_input = {CONF_DEVICE_NAME: "", CONF_I2C: "", CONF_ALTITUDE: None, CONF_AVERAGE_WINDOW: 60,
-                      CONF_TEMPERATURE_OFFSET: 4}
+        discovered = await async_discover(self.hass)
+        user_input = {CONF_DEVICE_NAME: "", CONF_I2C: next(iter(discovered), ""), CONF_ALTITUDE: None,
+                      CONF_AVERAGE_WINDOW: 60, CONF_AVERAGE_MODE: AVERAGE_MODE_SAMPLES, CONF_TEMPERATURE_OFFSET: 4}
         # Provide defaults for form
 
         return await self._show_config_form(user_input)
 
     async def _show_config_form(self, user_input):  # pylint: disable=unused-argumentS
+        discovered = await async_discover(self.hass)
         return self.async_show_form(step_id="user", data_schema=vol.Schema(
             {vol.Required(CONF_DEVICE_NAME): vol.Coerce(str),
-                vol.Required(CONF_I2C, default=user_input[CONF_I2C]): vol.Coerce(str),
+                vol.Required(CONF_I2C, default=user_input[CONF_I2C]): SelectSelector(SelectSelectorConfig(
+                    options=list(discovered), custom_value=True, mode=SelectSelectorMode.DROPDOWN)),
                 vol.Optional(CONF_ALTITUDE): vol.All(vol.Coerce(int), vol.Range(min=-100, max=10000)),
                 vol.Optional(CONF_AVERAGE_WINDOW): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(CONF_AVERAGE_MODE, default=AVERAGE_MODE_SAMPLES): vol.In(AVERAGE_MODES),
                 vol.Optional(CONF_TEMPERATURE_OFFSET, default=4): vol.All(vol.Coerce(float),
-                                                                          vol.Range(min=0, max=10)), }),
+                                                                          vol.Range(min=0, max=10)),
+                vol.Optional(CONF_MUX_ADDRESS, default=DEFAULT_MUX_ADDRESS): vol.All(vol.Coerce(int),
+                                                                                     vol.Range(min=0x70, max=0x77)),
+                vol.Optional(CONF_MUX_CHANNEL): vol.All(vol.Coerce(int), vol.Range(min=0, max=7)),
+                vol.Optional(CONF_CO2_DEADBAND, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_TEMPERATURE_DEADBAND, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_HUMIDITY_DEADBAND, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_MAX_SILENCE, default=DEFAULT_MAX_SILENCE): vol.All(vol.Coerce(int),
+                                                                                     vol.Range(min=5)),
+                vol.Optional(CONF_PUBLISH_INTERVAL, default=DEFAULT_PUBLISH_INTERVAL): vol.All(vol.Coerce(int),
+                                                                                               vol.Range(min=0)),
+                vol.Optional(CONF_SAMPLE_BUFFER, default=DEFAULT_SAMPLE_BUFFER): vol.All(vol.Coerce(int),
+                                                                                         vol.Range(min=1)),
+                vol.Optional(CONF_TRANSPORT, default=TRANSPORT_SENSIRION): vol.In(TRANSPORTS),
+                vol.Optional(CONF_MEASUREMENT_MODE, default=MEASUREMENT_MODE_PERIODIC): vol.In(MEASUREMENT_MODES),
+                vol.Optional(CONF_DERIVED_SENSORS, default=False): bool,
+                vol.Optional(CONF_LONG_TERM_STATISTICS, default=False): bool,
+                vol.Optional(CONF_FILTER_MODE, default=FILTER_MODE_HAMPEL): vol.In(FILTER_MODES),
+                vol.Optional(CONF_CO2_FILTER_WINDOW, default=DEFAULT_FILTER_WINDOW): vol.All(vol.Coerce(int),
+                                                                                             vol.Range(min=0)),
+                vol.Optional(CONF_CO2_FILTER_THRESHOLD, default=DEFAULT_FILTER_THRESHOLD): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_TEMPERATURE_FILTER_WINDOW, default=DEFAULT_FILTER_WINDOW): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_TEMPERATURE_FILTER_THRESHOLD, default=DEFAULT_FILTER_THRESHOLD): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_HUMIDITY_FILTER_WINDOW, default=DEFAULT_FILTER_WINDOW): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_HUMIDITY_FILTER_THRESHOLD, default=DEFAULT_FILTER_THRESHOLD): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_PRESSURE_ENTITY): EntitySelector(EntitySelectorConfig(
+                    domain="sensor", device_class=SensorDeviceClass.PRESSURE)),
+                vol.Optional(CONF_PRESSURE_THRESHOLD, default=DEFAULT_PRESSURE_THRESHOLD): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_PRESSURE_INTERVAL, default=DEFAULT_PRESSURE_INTERVAL): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)), }),
             errors=self._errors, )
 
-    async def _test_i2cpath(self, i2cpath: str, altitude: Optional[int], temperature_offset: Optional[float]):
-        serial = None
-        api = None
-        try:
-            _LOGGER.debug(f"Testing path {i2cpath}, altitude {altitude}")
-            _LOGGER.debug(f"Initializing API")
-            api = SCD4xAPI(i2cpath, altitude, temperature_offset)
-            serial = await api.async_initialize()
-        except Exception as exception:
-            _LOGGER.error(f"Exception while testing i2c path: {exception}")
-            if api is not None:
-                await api.async_stop()
-            raise exception
-        finally:
-            _LOGGER.debug(f"Stopping API")
-            await api.async_stop()
-
-            if serial is None or serial == 0:
-                _LOGGER.debug(f"No serial found: {serial}")
-                return False, None
-            else:
-                _LOGGER.debug(f"Serial found: {serial}")
-                return True, serial
+    async def _test_i2cpath(self, i2cpath: str, altitude: Optional[int], temperature_offset: Optional[float],
+                            mux_channel: Optional[MuxChannel]) -> Optional[int]:
+        """Return the serial number of the sensor, the device itself is initialized on setup."""
+        _LOGGER.debug(f"Testing path {i2cpath}, altitude {altitude}, temperature offset {temperature_offset}")
+        if mux_channel is None:
+            serial = (await async_discover(self.hass)).get(i2cpath)
+            if serial is not None:
+                _LOGGER.debug(f"Serial found during discovery: {serial}")
+                return serial
+
+        serial = await async_probe(self.hass, i2cpath, mux_channel)
+        _LOGGER.debug(f"Serial found: {serial}" if serial is not None else "No serial found")
+        return serial
+
+
+class Scd4xOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options the running sensor applies without a reload of the entry."""
+
+    # Fields without a default, stored as None when cleared so they override the setup.
+    CLEARABLE = (CONF_ALTITUDE, CONF_AVERAGE_WINDOW, CONF_PRESSURE_ENTITY)
+
+    def __init__(self, config_entry):
+        """Initialize."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            options = {**self.config_entry.options, **{key: None for key in self.CLEARABLE}, **user_input}
+            return self.async_create_entry(title="", data=options)
+
+        config = {**self.config_entry.data, **self.config_entry.options}
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(
+            {vol.Optional(CONF_ALTITUDE, description={"suggested_value": config.get(CONF_ALTITUDE)}): vol.All(
+                vol.Coerce(int), vol.Range(min=-100, max=10000)),
+                vol.Optional(CONF_TEMPERATURE_OFFSET, default=config.get(CONF_TEMPERATURE_OFFSET, 4)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Optional(CONF_AVERAGE_WINDOW, description={"suggested_value": config.get(CONF_AVERAGE_WINDOW)}):
+                    vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(CONF_AVERAGE_MODE, default=config.get(CONF_AVERAGE_MODE, AVERAGE_MODE_SAMPLES)): vol.In(
+                    AVERAGE_MODES),
+                vol.Optional(CONF_PUBLISH_INTERVAL, default=config.get(CONF_PUBLISH_INTERVAL,
+                                                                       DEFAULT_PUBLISH_INTERVAL)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_MEASUREMENT_MODE, default=config.get(CONF_MEASUREMENT_MODE,
+                                                                       MEASUREMENT_MODE_PERIODIC)): vol.In(
+                    MEASUREMENT_MODES),
+                vol.Optional(CONF_LONG_TERM_STATISTICS, default=config.get(CONF_LONG_TERM_STATISTICS, False)): bool,
+                vol.Optional(CONF_CO2_DIGITS, default=config.get(CONF_CO2_DIGITS, CHANNEL_DIGITS[CO2_KEY])): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=3)),
+                vol.Optional(CONF_TEMPERATURE_DIGITS, default=config.get(CONF_TEMPERATURE_DIGITS,
+                                                                         CHANNEL_DIGITS[TEMP_KEY])): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=3)),
+                vol.Optional(CONF_HUMIDITY_DIGITS, default=config.get(CONF_HUMIDITY_DIGITS,
+                                                                      CHANNEL_DIGITS[HUMIDITY_KEY])): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=3)),
+                vol.Optional(CONF_CO2_DEADBAND, default=config.get(CONF_CO2_DEADBAND, 0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_TEMPERATURE_DEADBAND, default=config.get(CONF_TEMPERATURE_DEADBAND, 0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_HUMIDITY_DEADBAND, default=config.get(CONF_HUMIDITY_DEADBAND, 0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_MAX_SILENCE, default=config.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)): vol.All(
+                    vol.Coerce(int), vol.Range(min=5)),
+                vol.Optional(CONF_FILTER_MODE, default=config.get(CONF_FILTER_MODE, FILTER_MODE_HAMPEL)): vol.In(
+                    FILTER_MODES),
+                vol.Optional(CONF_CO2_FILTER_WINDOW, default=config.get(CONF_CO2_FILTER_WINDOW,
+                                                                        DEFAULT_FILTER_WINDOW)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_CO2_FILTER_THRESHOLD, default=config.get(CONF_CO2_FILTER_THRESHOLD,
+                                                                           DEFAULT_FILTER_THRESHOLD)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_TEMPERATURE_FILTER_WINDOW, default=config.get(CONF_TEMPERATURE_FILTER_WINDOW,
+                                                                                DEFAULT_FILTER_WINDOW)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_TEMPERATURE_FILTER_THRESHOLD, default=config.get(CONF_TEMPERATURE_FILTER_THRESHOLD,
+                                                                                   DEFAULT_FILTER_THRESHOLD)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_HUMIDITY_FILTER_WINDOW, default=config.get(CONF_HUMIDITY_FILTER_WINDOW,
+                                                                             DEFAULT_FILTER_WINDOW)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_HUMIDITY_FILTER_THRESHOLD, default=config.get(CONF_HUMIDITY_FILTER_THRESHOLD,
+                                                                                DEFAULT_FILTER_THRESHOLD)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_PRESSURE_ENTITY, description={"suggested_value": config.get(CONF_PRESSURE_ENTITY)}):
+                    EntitySelector(EntitySelectorConfig(domain="sensor", device_class=SensorDeviceClass.PRESSURE)),
+                vol.Optional(CONF_PRESSURE_THRESHOLD, default=config.get(CONF_PRESSURE_THRESHOLD,
+                                                                         DEFAULT_PRESSURE_THRESHOLD)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_PRESSURE_INTERVAL, default=config.get(CONF_PRESSURE_INTERVAL,
+                                                                        DEFAULT_PRESSURE_INTERVAL)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)), }),
+        )
@@ -13,11 +13,39 @@ ISSUE_URL = "https://github.com/tobi1449/scd4x_gpio_integration/issues"
 TEMP_ICON = "mdi:thermometer"
 HUMIDITY_ICON = "mdi:water-percent"
 CO2_ICON = "mdi:molecule-co2"
+LATENCY_ICON = "mdi:timer-outline"
+ERROR_ICON = "mdi:alert-circle-outline"
+SUPPRESSED_ICON = "mdi:filter-outline"
+DEW_POINT_ICON = "mdi:thermometer-water"
+ABSOLUTE_HUMIDITY_ICON = "mdi:water"
+CO2_RATE_ICON = "mdi:chart-line-variant"
 
 # Sensor type Keys
 TEMP_KEY = "temperature"
 CO2_KEY = "co2"
 HUMIDITY_KEY = "humidity"
+CHANNELS = [CO2_KEY, TEMP_KEY, HUMIDITY_KEY]
+# Decimal places each channel is published with
+CHANNEL_DIGITS = {CO2_KEY: 0, TEMP_KEY: 1, HUMIDITY_KEY: 0}
+# Smallest step the sensor reports on each channel, roughly
+CHANNEL_RESOLUTION = {CO2_KEY: 1.0, TEMP_KEY: 0.01, HUMIDITY_KEY: 0.01}
+STATISTICS_KEY = "statistics"
+
+# Derived sensor type Keys
+DEW_POINT_KEY = "dew_point"
+ABSOLUTE_HUMIDITY_KEY = "absolute_humidity"
+CO2_RATE_KEY = "co2_rate"
+DERIVED_DIGITS = {DEW_POINT_KEY: 1, ABSOLUTE_HUMIDITY_KEY: 1, CO2_RATE_KEY: 1}
+CO2_RATE_UNIT = "ppm/min"
+ABSOLUTE_HUMIDITY_UNIT = "g/m³"
+
+# Diagnostic sensor type Keys
+UPDATE_TIME_KEY = "update_time"
+DATA_READY_WAIT_KEY = "data_ready_wait"
+CRC_ERRORS_KEY = "crc_errors"
+I2C_ERRORS_KEY = "i2c_errors"
+SUPPRESSED_WRITES_KEY = "suppressed_writes"
+RECOVERIES_KEY = "recoveries"
 
 # Platforms
 PLATFORMS = [Platform.SENSOR]
@@ -30,9 +58,91 @@ CONF_ALTITUDE = "altitude"
 CONF_AVERAGE_WINDOW = "moving_average_window"
 CONF_TEMPERATURE_OFFSET = "temperature_offset"
 CONF_DEVICE_NAME = "device_name"
+CONF_AVERAGE_MODE = "moving_average_mode"
+CONF_MUX_ADDRESS = "mux_address"
+CONF_MUX_CHANNEL = "mux_channel"
+CONF_CO2_DEADBAND = "co2_deadband"
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_HUMIDITY_DEADBAND = "humidity_deadband"
+CONF_MAX_SILENCE = "max_silence"
+CONF_PUBLISH_INTERVAL = "publish_interval"
+CONF_SAMPLE_BUFFER = "sample_buffer_size"
+CONF_TRANSPORT = "transport"
+CONF_DERIVED_SENSORS = "derived_sensors"
+CONF_FILTER_MODE = "filter_mode"
+CONF_CO2_FILTER_WINDOW = "co2_filter_window"
+CONF_CO2_FILTER_THRESHOLD = "co2_filter_threshold"
+CONF_TEMPERATURE_FILTER_WINDOW = "temperature_filter_window"
+CONF_TEMPERATURE_FILTER_THRESHOLD = "temperature_filter_threshold"
+CONF_HUMIDITY_FILTER_WINDOW = "humidity_filter_window"
+CONF_HUMIDITY_FILTER_THRESHOLD = "humidity_filter_threshold"
+CONF_PRESSURE_ENTITY = "pressure_entity"
+CONF_PRESSURE_THRESHOLD = "pressure_threshold"
+CONF_PRESSURE_INTERVAL = "pressure_interval"
+CONF_CO2_DIGITS = "co2_digits"
+CONF_TEMPERATURE_DIGITS = "temperature_digits"
+CONF_HUMIDITY_DIGITS = "humidity_digits"
+CONF_MEASUREMENT_MODE = "measurement_mode"
+CONF_LONG_TERM_STATISTICS = "long_term_statistics"
+
+# Moving average modes
+AVERAGE_MODE_SAMPLES = "samples"
+AVERAGE_MODE_SECONDS = "seconds"
+AVERAGE_MODE_EMA = "ema"
+AVERAGE_MODES = [AVERAGE_MODE_SAMPLES, AVERAGE_MODE_SECONDS, AVERAGE_MODE_EMA]
+
+# Measurement modes: periodic every 5 s, low power periodic every 30 s, and single shots at a
+# fixed interval or at one adapted to how fast CO2 changes. Single shots need an SCD41.
+MEASUREMENT_MODE_PERIODIC = "periodic"
+MEASUREMENT_MODE_LOW_POWER = "low_power"
+MEASUREMENT_MODE_SINGLE_SHOT = "single_shot"
+MEASUREMENT_MODE_ADAPTIVE = "adaptive"
+MEASUREMENT_MODES = [MEASUREMENT_MODE_PERIODIC, MEASUREMENT_MODE_LOW_POWER, MEASUREMENT_MODE_SINGLE_SHOT,
+                     MEASUREMENT_MODE_ADAPTIVE]
+SINGLE_SHOT_MODES = {MEASUREMENT_MODE_SINGLE_SHOT, MEASUREMENT_MODE_ADAPTIVE}
+
+# Outlier filter modes
+FILTER_MODE_HAMPEL = "hampel"
+FILTER_MODE_MEDIAN = "median"
+FILTER_MODES = [FILTER_MODE_HAMPEL, FILTER_MODE_MEDIAN]
+
+# I2C transports
+TRANSPORT_SENSIRION = "sensirion"
+TRANSPORT_NATIVE = "native"
+TRANSPORTS = [TRANSPORT_SENSIRION, TRANSPORT_NATIVE]
 
 # Defaults
 DEFAULT_NAME = DOMAIN
+DEFAULT_MUX_ADDRESS = 0x70
+DEFAULT_MAX_SILENCE = 600
+DEFAULT_PUBLISH_INTERVAL = 0
+DEFAULT_FILTER_WINDOW = 0
+DEFAULT_FILTER_THRESHOLD = 3.0
+# Ambient pressure written to the device on a change of 2 hPa, at most every 5 minutes
+DEFAULT_PRESSURE_THRESHOLD = 2.0
+DEFAULT_PRESSURE_INTERVAL = 300
+# Single shots once a minute, unless a publish interval asks for another interval
+DEFAULT_SINGLE_SHOT_INTERVAL = 60
+# One day of readings at the 5 s measurement interval
+DEFAULT_SAMPLE_BUFFER = 17280
+
+# Services
+SERVICE_EXPORT_SAMPLES = "export_samples"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FILENAME = "filename"
+ATTR_FORMAT = "format"
+ATTR_SINCE = "since"
+SERVICE_PROFILE = "profile"
+ATTR_DURATION = "duration"
+DEFAULT_PROFILE_DURATION = 30
+MAX_PROFILE_DURATION = 600
+DEFAULT_PROFILE_FILENAME = "scd4x_profile"
+
+# Keys in hass.data[DOMAIN] besides the config entry ids
+DATA_BUS_MANAGER = "bus_manager"
+DATA_DISCOVERY_CACHE = "discovery_cache"
+DATA_FLEET_SCHEDULER = "fleet_scheduler"
+DATA_PROFILER = "profiler"
 
 STARTUP_MESSAGE = f"""
 -------------------------------------------------------------------
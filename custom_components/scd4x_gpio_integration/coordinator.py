@@ -0,0 +1,533 @@
+"""Data update coordinator of scd4x_gpio_integration, reading one SCD4x."""
+import asyncio
+import logging
+import math
+import time
+from datetime import timedelta
+from typing import Optional
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryError
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import (
+    DOMAIN, CO2_KEY, TEMP_KEY, HUMIDITY_KEY, AVERAGE_MODE_SAMPLES, CHANNELS, CHANNEL_DIGITS, CHANNEL_RESOLUTION,
+    STATISTICS_KEY, DEFAULT_SAMPLE_BUFFER, TRANSPORT_SENSIRION, DEW_POINT_KEY, ABSOLUTE_HUMIDITY_KEY, CO2_RATE_KEY,
+    DERIVED_DIGITS, FILTER_MODE_HAMPEL, DEFAULT_PRESSURE_THRESHOLD, DEFAULT_PRESSURE_INTERVAL, MEASUREMENT_MODE_PERIODIC,
+    MEASUREMENT_MODE_ADAPTIVE, DEFAULT_SINGLE_SHOT_INTERVAL,
+)
+from .acquisition import SingleShotSampling
+from .bus import MuxChannel, get_bus_manager
+from .deadband import DeadbandFilter
+from .derived import IncrementalSlope, absolute_humidity, dew_point
+from .fleet import get_fleet_scheduler
+from .long_term import HourlyStatistics, async_import_hourly
+from .metrics import Metrics, METRIC_UPDATE, METRIC_UPDATE_FAILURES, METRIC_STATE_WRITES, METRIC_STATE_WRITES_SUPPRESSED
+from .moving_average import create_moving_average, window_capacity, window_seconds
+from .outlier import HampelFilter, create_outlier_filter
+from .pressure import PressureCompensation
+from .profiling import STAGE_PUBLISH, STAGE_READ, STAGE_RECORD, STAGE_UPDATE, get_profiler
+from .sample_file import SampleFile
+from .samples import PeriodStatistics, SampleStore
+from .scd4x_api import RELEASE_TIMEOUT, STOP_TIMEOUT, SCD4xAPI
+
+SCAN_INTERVAL = timedelta(seconds=5)
+# Seconds between attempts to import long-term statistics while the recorder is unavailable.
+LONG_TERM_RETRY_INTERVAL = 300
+# Deadlines of the phases of stopping, a second beyond the timeouts of the single operations so those report first.
+HALT_TIMEOUT = 2
+STOP_PHASE_TIMEOUT = STOP_TIMEOUT + 1
+RELEASE_PHASE_TIMEOUT = RELEASE_TIMEOUT + 1
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class SCD4XDataUpdateCoordinator(DataUpdateCoordinator):
+
+    def __init__(self, hass: HomeAssistant, i2cpath: str, altitude: Optional[int],
+                 moving_average_window: Optional[int], temperature_offset: Optional[float],
+                 moving_average_mode: str = AVERAGE_MODE_SAMPLES, mux_channel: Optional[MuxChannel] = None,
+                 deadbands: Optional[dict[str, float]] = None, max_silence: Optional[float] = None,
+                 publish_interval: Optional[float] = None, sample_buffer_size: int = DEFAULT_SAMPLE_BUFFER,
+                 sample_file_path: Optional[str] = None, transport: str = TRANSPORT_SENSIRION,
+                 filter_mode: str = FILTER_MODE_HAMPEL, filters: Optional[dict[str, tuple[int, float]]] = None,
+                 pressure_entity: Optional[str] = None, pressure_threshold: float = DEFAULT_PRESSURE_THRESHOLD,
+                 pressure_interval: float = DEFAULT_PRESSURE_INTERVAL, digits: Optional[dict[str, int]] = None,
+                 measurement_mode: str = MEASUREMENT_MODE_PERIODIC, statistics_name: Optional[str] = None) -> None:
+        _LOGGER.debug("Initializing coordinator for SCD4x GPIO Integration")
+        self.platforms = []
+        # Settings of the config entry the coordinator runs with, compared against changed options.
+        self.entry_config: dict = {}
+
+        self._temperature_offset = temperature_offset if temperature_offset is not None else 4
+        # Ambient pressure of another entity, written to the device along with the readings.
+        self._pressure_entity = pressure_entity
+        self._unsub_pressure: Optional[CALLBACK_TYPE] = None
+        pressure = PressureCompensation(pressure_threshold, pressure_interval) if pressure_entity else None
+        # Reads of all entries are spread over the measurement interval by the shared scheduler.
+        self._fleet = get_fleet_scheduler(hass)
+        self._profiler = get_profiler(hass)
+        self._api = SCD4xAPI(i2cpath, altitude, self._temperature_offset, get_bus_manager(hass), mux_channel,
+                             transport, pressure, self._fleet, measurement_mode, self._profiler)
+        # In the single shot modes the coordinator decides when the sensor measures.
+        self._sampling: Optional[SingleShotSampling] = None
+        if self._api.single_shot:
+            self._sampling = SingleShotSampling(publish_interval or DEFAULT_SINGLE_SHOT_INTERVAL,
+                                                adaptive=measurement_mode == MEASUREMENT_MODE_ADAPTIVE)
+        self._moving_average_window = moving_average_window if moving_average_window is not None and moving_average_window > 0 else 1
+
+        self._moving_average_mode = moving_average_mode
+
+        self._averages = {
+            key: create_moving_average(self._moving_average_mode, self._moving_average_window, self.sample_interval)
+            for key in CHANNELS
+        }
+        self._digits = {**CHANNEL_DIGITS, **(digits or {})}
+
+        # Optional outlier rejection ahead of the averages, keyed by channel with (window, threshold)
+        self._filter_settings = (filter_mode, filters or {})
+        self._filters = _outlier_filters(filter_mode, filters or {})
+
+        # Least squares CO2 trend over the same window as the moving averages
+        self._co2_slope = IncrementalSlope(
+            window_capacity(self._moving_average_mode, self._moving_average_window),
+            window_seconds(self._moving_average_mode, self._moving_average_window, self.sample_interval))
+
+        # Every raw reading is kept, entities are only updated once per publish interval.
+        self._samples = SampleStore(sample_buffer_size, CHANNELS)
+        self._period_statistics = {key: PeriodStatistics() for key in CHANNELS}
+        self._publish_interval = publish_interval if publish_interval else None
+        self._last_publish = 0.0
+
+        # The readings of the moving average window survive restarts in a memory-mapped file.
+        self._sample_file: Optional[SampleFile] = None
+        if sample_file_path is not None:
+            self._sample_file = SampleFile(sample_file_path,
+                                           window_capacity(self._moving_average_mode, self._moving_average_window),
+                                           len(CHANNELS))
+
+        self._deadbands = {key: DeadbandFilter(deadband, max_silence) for key, deadband in (deadbands or {}).items()}
+
+        # Given a name, every reading goes into hourly long-term statistics of the recorder, named after it.
+        self._statistics_name = statistics_name
+        self._hourly = HourlyStatistics(CHANNELS) if statistics_name else None
+        self._last_import_attempt: Optional[float] = None
+        self._serial: Optional[int] = None
+
+        self._acquiring = False
+        self._unsub_acquisition: Optional[CALLBACK_TYPE] = None
+        self._acquisition_task: Optional[asyncio.Task] = None
+
+        # No update interval, refreshes are scheduled after each expected sample of the sensor instead.
+        super().__init__(hass, _LOGGER, name=DOMAIN)
+
+    @property
+    def api(self) -> SCD4xAPI:
+        return self._api
+
+    @property
+    def samples(self) -> SampleStore:
+        return self._samples
+
+    @property
+    def sample_interval(self) -> float:
+        """Regular time between readings, the longest one of the adaptive sampling."""
+        if self._sampling is not None:
+            return self._sampling.max_interval
+        return self._api.scheduler.interval
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._api.metrics
+
+    @property
+    def acquisition_diagnostics(self) -> dict:
+        return self._api.scheduler.as_dict()
+
+    @property
+    def sampling_diagnostics(self) -> dict:
+        diagnostics = {"mode": self._api.mode, "sample_interval": self.sample_interval}
+        if self._sampling is not None:
+            diagnostics.update(self._sampling.as_dict())
+        return diagnostics
+
+    @property
+    def fleet_diagnostics(self) -> dict:
+        return self._fleet.as_dict(self)
+
+    @property
+    def outlier_diagnostics(self) -> dict:
+        """Number of values rejected by each channel's Hampel filter, a median filter replaces every value."""
+        return {key: outlier_filter.rejected for key, outlier_filter in self._filters.items()
+                if isinstance(outlier_filter, HampelFilter)}
+
+    @property
+    def pressure_diagnostics(self) -> Optional[dict]:
+        return self._api.pressure.as_dict() if self._api.pressure is not None else None
+
+    @property
+    def long_term_diagnostics(self) -> Optional[dict]:
+        return self._hourly.as_dict() if self._hourly is not None else None
+
+    @property
+    def bus_diagnostics(self) -> Optional[dict]:
+        return self._api.bus.as_dict() if self._api.bus is not None else None
+
+    @callback
+    def async_should_write_state(self, key: str, value: Optional[float]) -> bool:
+        """Return whether the entity for key should write value, counting suppressed writes."""
+        deadband = self._deadbands.get(key)
+        if deadband is None or deadband.should_publish(value, time.monotonic()):
+            self.metrics.increment(METRIC_STATE_WRITES)
+            return True
+
+        self.metrics.increment(METRIC_STATE_WRITES_SUPPRESSED)
+        return False
+
+    @callback
+    def async_start_acquisition(self) -> None:
+        self._acquiring = True
+        self._fleet.register(self)
+        self._schedule_acquisition()
+
+    @callback
+    def _schedule_acquisition(self) -> None:
+        if self._unsub_acquisition is not None:
+            self._unsub_acquisition()
+        if not self._acquiring:
+            self._unsub_acquisition = None
+            return
+
+        interval = self._api.scheduler.interval
+        if not self.last_update_success:
+            earliest = SCAN_INTERVAL.total_seconds()
+        elif self._sampling is not None:
+            # The next shot starts at the first slot of the sampling interval.
+            earliest = 0.0
+            interval = self._sampling.interval
+        else:
+            earliest = self._api.seconds_until_next_sample()
+        delay = self._fleet.delay(self, earliest, interval)
+        self._unsub_acquisition = async_call_later(self.hass, delay, self._handle_acquisition_timer)
+
+    @callback
+    def _handle_acquisition_timer(self, _now) -> None:
+        self._unsub_acquisition = None
+        self._acquisition_task = self.hass.async_create_task(self._async_acquire())
+
+    async def _async_acquire(self) -> None:
+        if self._publish_interval is None:
+            await self.async_refresh()
+        else:
+            await self._async_acquire_unpublished()
+        self._schedule_acquisition()
+
+    async def _async_acquire_unpublished(self) -> None:
+        """Record a reading, but only update the entities once per publish interval."""
+        try:
+            await self._async_read_sample()
+        except UpdateFailed:
+            if self.last_update_success:
+                self.last_update_success = False
+                self.async_update_listeners()
+            return
+
+        # While CO2 changes fast, the adaptive sampling publishes every one of its closer shots.
+        fast = self._sampling is not None and self._sampling.fast
+        if not self.last_update_success or fast or time.monotonic() - self._last_publish >= self._publish_interval:
+            self.async_set_updated_data(self._publish_data())
+
+    async def async_stop(self) -> None:
+        await async_stop_coordinators([self])
+
+    @callback
+    def async_halt(self) -> Optional[asyncio.Task]:
+        """Stop acquiring and cancel the reading in flight, returning its task to wait for."""
+        self._acquiring = False
+        self._schedule_acquisition()
+        self._fleet.unregister(self)
+        if self._unsub_pressure is not None:
+            self._unsub_pressure()
+            self._unsub_pressure = None
+        task, self._acquisition_task = self._acquisition_task, None
+        if task is None or task.done():
+            return None
+        task.cancel()
+        return task
+
+    async def async_release(self) -> None:
+        """Release the bus and write back the sample file and the long-term statistics."""
+        _LOGGER.info("Stopping SCD4x API")
+        await self._api.async_release()
+        if self._sample_file is not None:
+            await self.hass.async_add_executor_job(self._sample_file.close)
+        if self._hourly is not None and self._serial is not None:
+            async_import_hourly(self.hass, self._hourly, self._serial, self._statistics_name)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        with self._profiler.stage(STAGE_PUBLISH):
+            super().async_update_listeners()
+
+    async def _async_update_data(self):
+        await self._async_read_sample()
+        return self._publish_data()
+
+    async def _async_read_sample(self) -> None:
+        try:
+            with self.metrics.time(METRIC_UPDATE), self._profiler.stage(STAGE_UPDATE):
+                _LOGGER.debug("Try to get new data from SCD4x API")
+                with self._profiler.stage(STAGE_READ):
+                    sensor_data = await self._api.async_read_data()
+
+                if not sensor_data:
+                    raise UpdateFailed()
+
+                with self._profiler.stage(STAGE_RECORD):
+                    timestamp = time.time()
+                    filtered = self._record_sample(timestamp, sensor_data)
+                    if self._sampling is not None:
+                        self._sampling.add(filtered[0], timestamp)
+                    if self._sample_file is not None:
+                        self._sample_file.append(timestamp, sensor_data)
+                    for key, value in zip(CHANNELS, sensor_data):
+                        self._period_statistics[key].add(value)
+                    if self._hourly is not None:
+                        self._hourly.add(timestamp, sensor_data)
+                        self._async_import_long_term()
+        except Exception as exception:
+            self.metrics.increment(METRIC_UPDATE_FAILURES)
+            _LOGGER.error(f"Update failed: {exception}")
+            raise UpdateFailed() from exception
+
+    def _record_sample(self, timestamp: float, values) -> list[float]:
+        """Store the raw reading, feed the filtered reading into the averages and return it."""
+        self._samples.append(timestamp, values)
+        filtered = []
+        for key, value in zip(CHANNELS, values):
+            outlier_filter = self._filters.get(key)
+            if outlier_filter is not None:
+                value = outlier_filter.filter(value)
+            self._averages[key].add(value, timestamp)
+            filtered.append(value)
+        self._co2_slope.add(filtered[0], timestamp)
+        return filtered
+
+    @callback
+    def _async_import_long_term(self) -> None:
+        """Import the completed hours, retrying every few minutes while the recorder is unavailable."""
+        if not self._hourly.pending or self._serial is None:
+            return
+        now = time.monotonic()
+        if self._last_import_attempt is not None and now - self._last_import_attempt < LONG_TERM_RETRY_INTERVAL:
+            return
+        if async_import_hourly(self.hass, self._hourly, self._serial, self._statistics_name):
+            self._last_import_attempt = None
+        else:
+            self._last_import_attempt = now
+
+    def _derived_data(self) -> dict:
+        """Dew point and absolute humidity of the averaged readings and the CO2 trend in ppm per minute."""
+        temperature = self._averages[TEMP_KEY].mean
+        humidity = self._averages[HUMIDITY_KEY].mean
+        slope = self._co2_slope.slope
+        derived = {
+            DEW_POINT_KEY: dew_point(temperature, humidity),
+            ABSOLUTE_HUMIDITY_KEY: absolute_humidity(temperature, humidity),
+            CO2_RATE_KEY: slope * 60 if slope is not None else None,
+        }
+        return {key: round(value, DERIVED_DIGITS[key]) if value is not None else None
+                for key, value in derived.items()}
+
+    def _publish_data(self) -> dict:
+        """Build the entity data from the moving averages and the statistics since the last publish."""
+        data = {key: round(self._averages[key].mean, self._digits[key]) for key in CHANNELS}
+        data.update(self._derived_data())
+        data[STATISTICS_KEY] = {
+            key: self._period_statistics[key].as_dict(self._digits[key]) for key in CHANNELS
+        }
+        for statistics in self._period_statistics.values():
+            statistics.reset()
+        self._last_publish = time.monotonic()
+        return data
+
+    async def async_setup(self) -> None:
+        try:
+            _LOGGER.debug("Setting up SCD4x coordinator")
+            self._serial = await self._api.async_initialize()
+        except Exception as exception:
+            await self._api.async_stop()
+            raise ConfigEntryError from exception
+
+        if self._sample_file is not None:
+            await self._async_restore_samples()
+
+        self._async_subscribe_pressure()
+
+    @callback
+    def _async_subscribe_pressure(self) -> None:
+        if self._unsub_pressure is not None:
+            self._unsub_pressure()
+            self._unsub_pressure = None
+        if self._api.pressure is not None:
+            self._api.pressure.add_state(self.hass.states.get(self._pressure_entity))
+            self._unsub_pressure = async_track_state_change_event(self.hass, self._pressure_entity,
+                                                                  self._async_pressure_changed)
+
+    @callback
+    def _async_pressure_changed(self, event: Event) -> None:
+        """Only smooth the new pressure, the write happens with the next reading."""
+        self._api.pressure.add_state(event.data.get("new_state"))
+
+    async def async_set_averaging(self, mode: str, window: Optional[int]) -> None:
+        """Resize the moving averages and the CO2 trend, keeping the most recent samples which fit."""
+        self._moving_average_mode = mode
+        self._moving_average_window = window if window is not None and window > 0 else 1
+        self._rebuild_averages()
+
+        capacity = window_capacity(mode, self._moving_average_window)
+        if self._sample_file is not None and self._sample_file.capacity != capacity:
+            sample_file, self._sample_file = self._sample_file, None
+            await self.hass.async_add_executor_job(sample_file.close)
+            self._sample_file = SampleFile(sample_file.path, capacity, len(CHANNELS))
+            try:
+                # Rewrites the file with the newest records which fit.
+                await self.hass.async_add_executor_job(self._sample_file.open)
+            except OSError as exception:
+                _LOGGER.warning(f"Unable to resize sample file {sample_file.path}: {exception}")
+                self._sample_file = None
+
+    def _rebuild_averages(self) -> None:
+        """Refill the averages and the CO2 trend from the raw readings, passed through fresh outlier filters.
+
+        Readings older than the oldest raw reading in the buffer are taken over from the previous averages.
+        """
+        mode, window = self._moving_average_mode, self._moving_average_window
+        seconds = window_seconds(mode, window, self.sample_interval)
+        averages = {key: create_moving_average(mode, window, self.sample_interval) for key in CHANNELS}
+        slope = IncrementalSlope(window_capacity(mode, window), seconds)
+
+        oldest = next(self._samples.rows(), (math.inf,))[0]
+        for key, previous in self._averages.items():
+            for timestamp, value in previous:
+                if timestamp < oldest:
+                    averages[key].add(value, timestamp)
+        for timestamp, value in self._co2_slope:
+            if timestamp < oldest:
+                slope.add(value, timestamp)
+
+        filters = _outlier_filters(*self._filter_settings)
+        for timestamp, *values in self._samples.rows(since=time.time() - seconds):
+            for key, value in zip(CHANNELS, values):
+                outlier_filter = filters.get(key)
+                if outlier_filter is not None:
+                    value = outlier_filter.filter(value)
+                averages[key].add(value, timestamp)
+                if key == CO2_KEY:
+                    slope.add(value, timestamp)
+        self._averages = averages
+        self._co2_slope = slope
+
+    def set_filters(self, mode: str, filters: dict[str, tuple[int, float]]) -> None:
+        self._filter_settings = (mode, filters)
+        self._filters = _outlier_filters(mode, filters)
+
+    def set_deadbands(self, deadbands: dict[str, float], max_silence: Optional[float]) -> None:
+        """Change the deadbands in place, so the last published values still count."""
+        for key, deadband in deadbands.items():
+            if key in self._deadbands:
+                self._deadbands[key].deadband = deadband
+                self._deadbands[key].max_silence = max_silence
+            else:
+                self._deadbands[key] = DeadbandFilter(deadband, max_silence)
+
+    def set_digits(self, digits: dict[str, int]) -> None:
+        self._digits = {**CHANNEL_DIGITS, **digits}
+
+    async def async_set_publish_interval(self, publish_interval: Optional[float]) -> None:
+        self._publish_interval = publish_interval if publish_interval else None
+        if self._sampling is not None:
+            # Single shots follow the publish interval, so the averages weigh the samples anew.
+            self._sampling.configure(publish_interval or DEFAULT_SINGLE_SHOT_INTERVAL)
+            await self.async_set_averaging(self._moving_average_mode, self._moving_average_window)
+
+    async def async_set_pressure(self, entity: Optional[str], threshold: float, interval: float) -> None:
+        """Follow another pressure entity or change how often the pressure is written."""
+        pressure = self._api.pressure
+        if entity is not None and entity == self._pressure_entity and pressure is not None:
+            pressure.configure(threshold, interval)
+            return
+
+        self._pressure_entity = entity
+        self._api.pressure = PressureCompensation(threshold, interval) if entity is not None else None
+        self._async_subscribe_pressure()
+        if entity is None and pressure is not None and pressure.written is not None:
+            # Only a reinit brings back the compensation by altitude.
+            await self._api.async_reset()
+
+    async def async_set_device_settings(self, altitude: Optional[int], temperature_offset: Optional[float]) -> None:
+        self._temperature_offset = temperature_offset if temperature_offset is not None else 4
+        await self._api.async_update_settings(altitude, self._temperature_offset)
+
+    @callback
+    def async_republish(self) -> None:
+        """Publish the averages again, e.g. after the window or the rounding changed."""
+        if self.data is not None and all(len(average) for average in self._averages.values()):
+            self.async_set_updated_data(self._publish_data())
+
+    async def _async_restore_samples(self) -> None:
+        """Refill the moving averages with the persisted readings which still fall into the window."""
+        try:
+            records = await self.hass.async_add_executor_job(self._sample_file.open)
+        except OSError as exception:
+            _LOGGER.warning(f"Unable to open sample file {self._sample_file.path}: {exception}")
+            self._sample_file = None
+            return
+
+        now = time.time()
+        cutoff = now - window_seconds(self._moving_average_mode, self._moving_average_window, self.sample_interval)
+        restored = 0
+        for timestamp, *values in records:
+            if timestamp <= cutoff or timestamp > now:
+                continue
+            self._record_sample(timestamp, values)
+            restored += 1
+        _LOGGER.debug(f"Restored {restored} of {len(records)} persisted samples")
+
+
+def _outlier_filters(mode: str, filters: dict[str, tuple[int, float]]) -> dict:
+    return {
+        key: create_outlier_filter(mode, window, threshold, CHANNEL_RESOLUTION[key])
+        for key, (window, threshold) in filters.items()
+    }
+
+
+async def async_stop_coordinators(coordinators: list[SCD4XDataUpdateCoordinator]) -> None:
+    """Stop the coordinators together, one phase after the other.
+
+    The readings in flight are cancelled first, then all devices stop measuring and the buses are
+    released last. Every phase has a deadline, after which whatever still runs is cancelled, so a
+    hung bus delays stopping by the deadlines of the phases, however many entries there are.
+    """
+    halted = [task for task in (coordinator.async_halt() for coordinator in coordinators) if task is not None]
+    await _async_stop_phase("finish reading", halted, HALT_TIMEOUT)
+    await _async_stop_phase("stop measuring", [asyncio.create_task(coordinator.api.async_stop_measurement())
+                                               for coordinator in coordinators], STOP_PHASE_TIMEOUT)
+    await _async_stop_phase("release the bus", [asyncio.create_task(coordinator.async_release())
+                                                for coordinator in coordinators], RELEASE_PHASE_TIMEOUT)
+
+
+async def _async_stop_phase(name: str, tasks: list[asyncio.Task], timeout: float) -> None:
+    """Wait up to timeout for the tasks of one phase and cancel those left over."""
+    if not tasks:
+        return
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in done:
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.warning(f"Unable to {name}: {task.exception()!r}")
+    if pending:
+        _LOGGER.warning(f"{len(pending)} of {len(tasks)} SCD4x sensors did not {name} within {timeout}s, "
+                        f"giving up on them")
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,36 @@
+"""Deadband filter deciding whether a new sensor value is worth a state write."""
+from typing import Optional
+
+
+class DeadbandFilter:
+    """Publishes a value only if it left the deadband around the last published value.
+
+    A value is published anyway once max_silence seconds passed since the last publish.
+    """
+
+    def __init__(self, deadband: float = 0.0, max_silence: Optional[float] = None) -> None:
+        self.deadband = deadband
+        self.max_silence = max_silence
+        self._last_value: Optional[float] = None
+        self._last_publish: Optional[float] = None
+        self.published = 0
+        self.suppressed = 0
+
+    def should_publish(self, value: Optional[float], now: float) -> bool:
+        if (
+                value is None
+                or self._last_value is None
+                or abs(value - self._last_value) > self.deadband
+                or (self.max_silence is not None and now - self._last_publish >= self.max_silence)
+        ):
+            self._last_value = value
+            self._last_publish = now
+            self.published += 1
+            return True
+
+        self.suppressed += 1
+        return False
+
+    def reset(self) -> None:
+        self._last_value = None
+        self._last_publish = None
@@ -0,0 +1,129 @@
+"""Values derived from the SCD4x readings for scd4x_gpio_integration."""
+import math
+from array import array
+from typing import Iterator, Optional
+
+# Magnus formula coefficients over water (Sonntag 1990), valid from -45 to 60 °C
+MAGNUS_A = 17.62
+MAGNUS_B = 243.12
+MAGNUS_SATURATION_HPA = 6.112
+
+# Molar mass of water over the gas constant, in g K / (m³ hPa)
+WATER_VAPOUR_FACTOR = 216.74
+KELVIN = 273.15
+
+# Recompute the running sums from scratch every n additions to stop float drift.
+RESUM_INTERVAL = 4096
+
+
+def dew_point(temperature: float, humidity: float) -> Optional[float]:
+    """Dew point in °C from temperature in °C and relative humidity in %."""
+    if humidity <= 0:
+        return None
+    gamma = math.log(humidity / 100.0) + MAGNUS_A * temperature / (MAGNUS_B + temperature)
+    return MAGNUS_B * gamma / (MAGNUS_A - gamma)
+
+
+def absolute_humidity(temperature: float, humidity: float) -> float:
+    """Absolute humidity in g/m³ from temperature in °C and relative humidity in %."""
+    saturation = MAGNUS_SATURATION_HPA * math.exp(MAGNUS_A * temperature / (MAGNUS_B + temperature))
+    return WATER_VAPOUR_FACTOR * saturation * humidity / 100.0 / (KELVIN + temperature)
+
+
+class IncrementalSlope:
+    """Least squares slope over a sliding window, kept as running sums.
+
+    Adding a sample and reading the slope are O(1). Timestamps are taken relative to an
+    origin which moves with the window, so the sums of squares stay small.
+    """
+
+    def __init__(self, capacity: int, window_seconds: Optional[float] = None) -> None:
+        self._capacity = max(int(capacity), 2)
+        self._window_seconds = window_seconds
+        self._times = array("d", bytes(8 * self._capacity))
+        self._values = array("d", bytes(8 * self._capacity))
+        self._start = 0
+        self._count = 0
+        self._origin = 0.0
+        self._additions = 0
+        self._clear_sums()
+
+    def _clear_sums(self) -> None:
+        self._sum_t = 0.0
+        self._sum_y = 0.0
+        self._sum_tt = 0.0
+        self._sum_ty = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        """Iterate (timestamp, value) pairs from oldest to newest."""
+        for offset in range(self._count):
+            index = (self._start + offset) % self._capacity
+            yield self._times[index] + self._origin, self._values[index]
+
+    def add(self, value: float, timestamp: float) -> None:
+        if self._count == 0:
+            self._origin = timestamp
+        if self._window_seconds is not None:
+            cutoff = timestamp - self._window_seconds
+            while self._count > 0 and self._times[self._start] + self._origin <= cutoff:
+                self._evict()
+        if self._count == self._capacity:
+            self._evict()
+
+        t = timestamp - self._origin
+        index = (self._start + self._count) % self._capacity
+        self._times[index] = t
+        self._values[index] = value
+        self._count += 1
+        self._sum_t += t
+        self._sum_y += value
+        self._sum_tt += t * t
+        self._sum_ty += t * value
+
+        self._additions += 1
+        if self._additions % RESUM_INTERVAL == 0:
+            self._rebase()
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Change of the value per second, None until two samples at different times are known."""
+        n = self._count
+        denominator = n * self._sum_tt - self._sum_t * self._sum_t
+        if n < 2 or denominator <= 1e-9:
+            return None
+        return (n * self._sum_ty - self._sum_t * self._sum_y) / denominator
+
+    def clear(self) -> None:
+        self._start = 0
+        self._count = 0
+        self._clear_sums()
+
+    def _evict(self) -> None:
+        t = self._times[self._start]
+        value = self._values[self._start]
+        self._sum_t -= t
+        self._sum_y -= value
+        self._sum_tt -= t * t
+        self._sum_ty -= t * value
+        self._start = (self._start + 1) % self._capacity
+        self._count -= 1
+        if self._count == 0:
+            self._clear_sums()
+
+    def _rebase(self) -> None:
+        """Move the origin to the oldest sample and recompute the sums."""
+        shift = self._times[self._start]
+        self._origin += shift
+        self._clear_sums()
+        for offset in range(self._count):
+            index = (self._start + offset) % self._capacity
+            t = self._times[index] - shift
+            self._times[index] = t
+            value = self._values[index]
+            self._sum_t += t
+            self._sum_y += value
+            self._sum_tt += t * t
+            self._sum_ty += t * value
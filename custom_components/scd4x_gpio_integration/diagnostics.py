@@ -0,0 +1,28 @@
+"""Diagnostics support for scd4x_gpio_integration."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "data": coordinator.data,
+        "acquisition": coordinator.acquisition_diagnostics,
+        "sampling": coordinator.sampling_diagnostics,
+        "fleet": coordinator.fleet_diagnostics,
+        "metrics": coordinator.metrics.as_dict(),
+        "bus": coordinator.bus_diagnostics,
+        "outliers": coordinator.outlier_diagnostics,
+        "pressure": coordinator.pressure_diagnostics,
+        "long_term_statistics": coordinator.long_term_diagnostics,
+        "samples": {
+            "count": len(coordinator.samples),
+            "capacity": coordinator.samples.capacity,
+            "bytes": coordinator.samples.nbytes,
+        },
+    }
@@ -0,0 +1,57 @@
+"""Discovery of SCD4x sensors on the I2C buses of the host."""
+import asyncio
+import glob
+import logging
+import time
+from typing import Optional
+
+import async_timeout
+from homeassistant.core import HomeAssistant
+
+from .bus import I2cMuxError, MuxChannel, get_bus_manager
+from .const import DOMAIN, DATA_DISCOVERY_CACHE, CONF_I2C
+
+I2C_DEVICE_PATTERN = "/dev/i2c-*"
+
+# A bus without a sensor answers within milliseconds, a measuring sensor has to be stopped first.
+PROBE_TIMEOUT = 3.0
+DISCOVERY_TTL = 60
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+async def async_probe(hass: HomeAssistant, i2cpath: str, mux_channel: Optional[MuxChannel] = None) -> Optional[int]:
+    """Return the serial number of the SCD4x at i2cpath, None if there is none."""
+    # Imports the sensor driver, so only once there is a bus to probe.
+    from .scd4x_api import SCD4xAPI  # pylint: disable=import-outside-toplevel
+
+    api = SCD4xAPI(i2cpath, None, None, get_bus_manager(hass), mux_channel)
+    try:
+        async with async_timeout.timeout(PROBE_TIMEOUT):
+            serial = await api.async_probe()
+    except (asyncio.TimeoutError, OSError, I2cMuxError) as exception:
+        _LOGGER.debug(f"No SCD4x found at {i2cpath}: {exception!r}")
+        return None
+    return serial or None
+
+
+async def async_discover(hass: HomeAssistant, refresh: bool = False) -> dict[str, int]:
+    """Probe all I2C buses concurrently and return the serial number found per path.
+
+    Results are cached for DISCOVERY_TTL seconds.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    cached = domain_data.get(DATA_DISCOVERY_CACHE)
+    if not refresh and cached is not None and time.monotonic() - cached[0] < DISCOVERY_TTL:
+        return cached[1]
+
+    # Buses with a sensor that is already set up are not probed, directly or behind a multiplexer
+    # it is in use, and a probe without a channel would reach whichever channel the mux has selected.
+    configured = {entry.data.get(CONF_I2C) for entry in hass.config_entries.async_entries(DOMAIN)}
+    paths = sorted(set(await hass.async_add_executor_job(glob.glob, I2C_DEVICE_PATTERN)) - configured)
+    serials = await asyncio.gather(*[async_probe(hass, path) for path in paths])
+    found = {path: serial for path, serial in zip(paths, serials) if serial is not None}
+    _LOGGER.debug(f"Probed {len(paths)} I2C buses, found SCD4x sensors at {found}")
+
+    domain_data[DATA_DISCOVERY_CACHE] = (time.monotonic(), found)
+    return found
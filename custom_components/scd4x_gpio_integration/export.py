@@ -0,0 +1,123 @@
+"""Export of the buffered raw readings of scd4x_gpio_integration to a file."""
+import csv
+import struct
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from typing import Optional
+
+from homeassistant.core import HomeAssistant
+
+from .samples import SampleStore
+
+EXPORT_FORMAT_BINARY = "binary"
+EXPORT_FORMAT_COLUMNAR = "columnar"
+EXPORT_FORMAT_CSV = "csv"
+
+EXPORT_CHUNK_SIZE = 4096
+
+# magic, format version, number of channels, followed by the channel names, each length prefixed
+EXPORT_HEADER = struct.Struct("<4sHH")
+EXPORT_VERSION = 1
+
+
+class SampleWriter(ABC):
+    """Writes chunks of samples to a file, all methods block and run in the executor."""
+
+    def __init__(self, path: str, channels: list[str]) -> None:
+        self._path = path
+        self._channels = channels
+        self._file = None
+
+    def open(self) -> None:
+        self._file = open(self._path, "wb")
+
+    @abstractmethod
+    def write(self, timestamps: array, columns: list[array]) -> None:
+        """Write one chunk of timestamps and the matching values of each channel."""
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_header(self, magic: bytes) -> None:
+        self._file.write(EXPORT_HEADER.pack(magic, EXPORT_VERSION, len(self._channels)))
+        for channel in self._channels:
+            name = channel.encode()
+            self._file.write(struct.pack("<B", len(name)) + name)
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class BinaryWriter(SampleWriter):
+    """Header, then one packed little endian record per sample: float64 timestamp, float32 per channel."""
+
+    def open(self) -> None:
+        super().open()
+        self._write_header(b"SCDB")
+        self._record = struct.Struct("<d" + "f" * len(self._channels))
+
+    def write(self, timestamps: array, columns: list[array]) -> None:
+        pack = self._record.pack
+        self._file.write(b"".join(pack(*row) for row in zip(timestamps, *columns)))
+
+
+class ColumnarWriter(SampleWriter):
+    """Header, then one row group per chunk: uint32 row count, the float64 timestamps,
+    then the float32 values of each channel, all little endian."""
+
+    def open(self) -> None:
+        super().open()
+        self._write_header(b"SCDC")
+
+    def write(self, timestamps: array, columns: list[array]) -> None:
+        self._file.write(struct.pack("<I", len(timestamps)))
+        self._file.write(_little_endian(timestamps))
+        for column in columns:
+            self._file.write(_little_endian(column))
+
+
+class CsvWriter(SampleWriter):
+    """Unix timestamp followed by one column per channel."""
+
+    def open(self) -> None:
+        self._file = open(self._path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["timestamp", *self._channels])
+
+    def write(self, timestamps: array, columns: list[array]) -> None:
+        self._writer.writerows(
+            (f"{timestamp:.3f}", *(f"{value:.2f}" for value in values))
+            for timestamp, *values in zip(timestamps, *columns))
+
+
+EXPORT_WRITERS = {
+    EXPORT_FORMAT_BINARY: BinaryWriter,
+    EXPORT_FORMAT_COLUMNAR: ColumnarWriter,
+    EXPORT_FORMAT_CSV: CsvWriter,
+}
+
+
+async def async_export_samples(hass: HomeAssistant, samples: SampleStore, path: str, export_format: str,
+                               since: Optional[float] = None) -> int:
+    """Write the buffered samples to path and return how many were written.
+
+    The chunks are copied on the event loop, which takes microseconds each, and written in
+    the executor, so only one chunk is held in memory and updates continue in between.
+    """
+    writer = EXPORT_WRITERS[export_format](path, samples.channels)
+    written = 0
+    await hass.async_add_executor_job(writer.open)
+    try:
+        for timestamps, columns in samples.chunks(since, EXPORT_CHUNK_SIZE):
+            await hass.async_add_executor_job(writer.write, timestamps, columns)
+            written += len(timestamps)
+    finally:
+        await hass.async_add_executor_job(writer.close)
+    return written
@@ -0,0 +1,96 @@
+"""Integration wide read scheduling across all config entries of scd4x_gpio_integration."""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Hashable
+
+from homeassistant.core import HomeAssistant
+
+from .acquisition import MEASUREMENT_INTERVAL
+from .const import DOMAIN, DATA_FLEET_SCHEDULER
+from .metrics import Metrics, METRIC_FLEET_WAIT
+
+# Device operations running or queued on the bus workers at the same time, across all entries.
+MAX_IN_FLIGHT = 4
+
+
+class FleetScheduler:
+    """Spreads the reads of all entries evenly over the measurement interval.
+
+    Every member owns one slot per interval, at an offset of its index times the interval over
+    the number of members. A read waits for the first slot of its member after the sample is
+    expected, instead of all entries reading in the same tick after starting together. Device
+    operations additionally take one of max_in_flight permits, so a burst, e.g. at startup,
+    reaches the bus workers a few operations at a time.
+    """
+
+    def __init__(self, period: float = MEASUREMENT_INTERVAL, max_in_flight: int = MAX_IN_FLIGHT,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._period = period
+        self._max_in_flight = max_in_flight
+        self._clock = clock
+        self._epoch = clock()
+        self._members: list[Hashable] = []
+        self._permits = asyncio.Semaphore(max_in_flight)
+
+        self.metrics = Metrics()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.operations = 0
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def register(self, member: Hashable) -> None:
+        if member not in self._members:
+            self._members.append(member)
+
+    def unregister(self, member: Hashable) -> None:
+        if member in self._members:
+            self._members.remove(member)
+
+    def offset(self, member: Hashable) -> float:
+        """Offset of the slots of member within the period."""
+        if member not in self._members:
+            return 0.0
+        return self._members.index(member) * self._period / len(self._members)
+
+    def delay(self, member: Hashable, earliest: float, interval: float) -> float:
+        """Seconds until the first slot of member at least earliest seconds from now, slots repeating every interval."""
+        now = self._clock()
+        phase = self._epoch + self.offset(member)
+        slots = math.ceil((now + earliest - phase) / interval)
+        return max(phase + slots * interval - now, 0.0)
+
+    @asynccontextmanager
+    async def operation(self) -> AsyncIterator[None]:
+        """Hold one of the permits for a device operation."""
+        start = self._clock()
+        async with self._permits:
+            self.metrics.record(METRIC_FLEET_WAIT, self._clock() - start)
+            self.in_flight += 1
+            self.operations += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def as_dict(self, member: Hashable = None) -> dict:
+        return {
+            "members": len(self._members),
+            "offset": self.offset(member) if member is not None else None,
+            "max_in_flight": self._max_in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "operations": self.operations,
+            "metrics": self.metrics.as_dict(),
+        }
+
+
+def get_fleet_scheduler(hass: HomeAssistant) -> FleetScheduler:
+    """Return the scheduler shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FLEET_SCHEDULER not in domain_data:
+        domain_data[DATA_FLEET_SCHEDULER] = FleetScheduler()
+    return domain_data[DATA_FLEET_SCHEDULER]
@@ -0,0 +1,125 @@
+"""Hourly long-term statistics of every raw reading of scd4x_gpio_integration.
+
+The recorder compiles its statistics from the recorded states only, which the publish interval
+and the deadbands thin out. The readings are aggregated here instead and imported into the
+recorder as external statistics, one row per channel and hour.
+"""
+import logging
+from collections import deque
+from typing import Optional, Sequence
+
+from homeassistant.const import CONCENTRATION_PARTS_PER_MILLION, PERCENTAGE, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, CO2_KEY, TEMP_KEY, HUMIDITY_KEY
+from .samples import PeriodStatistics
+
+HOUR_SECONDS = 3600
+# Completed hours kept while the recorder is not available, two days.
+MAX_PENDING_HOURS = 48
+
+CHANNEL_UNITS = {
+    CO2_KEY: CONCENTRATION_PARTS_PER_MILLION,
+    TEMP_KEY: UnitOfTemperature.CELSIUS,
+    HUMIDITY_KEY: PERCENTAGE,
+}
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class HourlyStatistics:
+    """Mean, minimum and maximum of every reading per channel and hour.
+
+    Adding a reading is O(1). Hours are completed by the first reading of a later hour and wait
+    for the import, the hour in progress is not imported, so it is lost on a restart.
+    """
+
+    def __init__(self, channels: Sequence[str]) -> None:
+        self._channels = list(channels)
+        self._hour: Optional[int] = None
+        self._current: list[PeriodStatistics] = []
+        self._completed: deque[tuple[int, list[PeriodStatistics]]] = deque(maxlen=MAX_PENDING_HOURS)
+        self.imported_hours = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of completed hours not imported yet."""
+        return len(self._completed)
+
+    def add(self, timestamp: float, values: Sequence[float]) -> None:
+        hour = int(timestamp // HOUR_SECONDS) * HOUR_SECONDS
+        # A reading before the current hour, after the clock was set back, still counts for the current hour.
+        if self._hour is None or hour > self._hour:
+            if self._hour is not None:
+                self._completed.append((self._hour, self._current))
+            self._hour = hour
+            self._current = [PeriodStatistics() for _ in self._channels]
+        for statistics, value in zip(self._current, values):
+            statistics.add(value)
+
+    def statistics(self, key: str) -> list[dict]:
+        """StatisticData of the completed hours of channel key."""
+        column = self._channels.index(key)
+        rows = []
+        for hour, hourly in self._completed:
+            statistics = hourly[column]
+            if statistics.count:
+                rows.append({
+                    "start": dt_util.utc_from_timestamp(hour),
+                    "mean": statistics.total / statistics.count,
+                    "min": statistics.minimum,
+                    "max": statistics.maximum,
+                })
+        return rows
+
+    def clear_completed(self) -> None:
+        self.imported_hours += len(self._completed)
+        self._completed.clear()
+
+    def as_dict(self) -> dict:
+        return {
+            "hour": dt_util.utc_from_timestamp(self._hour).isoformat() if self._hour is not None else None,
+            "pending_hours": self.pending,
+            "imported_hours": self.imported_hours,
+        }
+
+
+def statistic_id(serial: int, key: str) -> str:
+    return f"{DOMAIN}:{serial}_{key}"
+
+
+def async_import_hourly(hass: HomeAssistant, hourly: HourlyStatistics, serial: int, name: str) -> bool:
+    """Import the completed hours into the recorder in one batch per channel.
+
+    Returns False and keeps the hours if the recorder is not loaded, it may still be starting.
+    """
+    if not hourly.pending:
+        return True
+    if "recorder" not in hass.config.components:
+        return False
+
+    # The recorder is a heavy import and optional for this integration.
+    from homeassistant.components.recorder.statistics import (  # pylint: disable=import-outside-toplevel
+        async_add_external_statistics,
+    )
+
+    try:
+        for key, unit in CHANNEL_UNITS.items():
+            metadata = {
+                "has_mean": True,
+                "has_sum": False,
+                "name": f"{name} {key}",
+                "source": DOMAIN,
+                "statistic_id": statistic_id(serial, key),
+                "unit_of_measurement": unit,
+            }
+            async_add_external_statistics(hass, metadata, hourly.statistics(key))
+    except HomeAssistantError as exception:
+        _LOGGER.warning(f"Unable to import long-term statistics: {exception}")
+        return False
+
+    _LOGGER.debug(f"Imported {hourly.pending} hours of long-term statistics for {serial}")
+    hourly.clear_completed()
+    return True
@@ -0,0 +1,109 @@
+"""Low overhead counters and latency histograms for scd4x_gpio_integration."""
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Upper bounds of the histogram buckets in seconds, the last bucket takes everything above.
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+# Histograms
+METRIC_UPDATE = "update"
+METRIC_DATA_READY_WAIT = "data_ready_wait"
+METRIC_EXECUTOR_QUEUE = "executor_queue"
+METRIC_COMMAND_PREFIX = "command_"
+METRIC_RECOVERY_TIME = "recovery_time"
+METRIC_FLEET_WAIT = "fleet_wait"
+
+# Counters
+METRIC_CRC_ERRORS = "crc_errors"
+METRIC_I2C_ERRORS = "i2c_errors"
+METRIC_DATA_READY_RETRIES = "data_ready_retries"
+METRIC_RESPONSIVE_RETRIES = "responsive_retries"
+METRIC_UPDATE_FAILURES = "update_failures"
+METRIC_STATE_WRITES = "state_writes"
+METRIC_STATE_WRITES_SUPPRESSED = "state_writes_suppressed"
+METRIC_RECOVERY_PREFIX = "recovery_"
+METRIC_RECOVERIES = "recoveries"
+METRIC_RECOVERY_FAILURES = "recovery_failures"
+METRIC_PRESSURE_WRITES = "pressure_writes"
+METRIC_PRESSURE_WRITE_FAILURES = "pressure_write_failures"
+
+
+class LatencyHistogram:
+    """Fixed bucket histogram, recording is a bisect and a few additions."""
+
+    __slots__ = ("buckets", "count", "total", "maximum", "last")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        labels = [f"le_{bound * 1000:g}ms" for bound in LATENCY_BUCKETS] + ["inf"]
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.maximum,
+            "last": self.last,
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class Metrics:
+    """Named histograms, counters and init phase durations of one device or bus."""
+
+    def __init__(self) -> None:
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.counters: dict[str, int] = {}
+        self.phases: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def histogram(self, name: str) -> Optional[LatencyHistogram]:
+        return self.histograms.get(name)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        return {
+            "histograms": {name: histogram.as_dict() for name, histogram in self.histograms.items()},
+            "counters": dict(self.counters),
+            "init_phases": dict(self.phases),
+        }
@@ -0,0 +1,205 @@
+"""Moving average aggregators for scd4x_gpio_integration."""
+import math
+import time
+from array import array
+from typing import Iterator, Optional
+
+from .const import AVERAGE_MODE_EMA, AVERAGE_MODE_SECONDS
+
+# The SCD4x never delivers more than one sample per periodic measurement interval,
+# so a window given in seconds never holds more than window / interval samples.
+SAMPLE_PERIOD_SECONDS = 5
+
+# Weight of a sample taken at the same time as the one before it, in seconds.
+MIN_SAMPLE_WEIGHT = 1e-3
+
+# An exponential average is restored from this many spans of samples, older samples weigh less than 0.3 %.
+EMA_RESTORE_SPANS = 3
+
+# Recompute the running sum from scratch every n additions to stop float drift.
+RESUM_INTERVAL = 4096
+
+
+class RingAverage:
+    """Preallocated ring buffer keeping a running sum over the last samples.
+
+    Adding a sample is O(1). If window_seconds is set, samples older than the window
+    are evicted as well, the capacity then only bounds the memory used.
+
+    If interval is set, the mean is weighted by time: every sample counts for the time since the
+    sample before it, at most interval seconds. Closely spaced samples, e.g. of the adaptive
+    sampling while CO2 changes fast, then do not outweigh the rest of the window, and a gap of
+    missed readings does not make the sample after it dominate. Evenly spaced samples weigh the same.
+    """
+
+    def __init__(self, capacity: int, window_seconds: Optional[float] = None,
+                 interval: Optional[float] = None) -> None:
+        self._capacity = max(int(capacity), 1)
+        self._window_seconds = window_seconds
+        self._interval = interval
+        self._values = array("d", bytes(8 * self._capacity))
+        self._timestamps = array("d", bytes(8 * self._capacity))
+        self._weights = array("d", bytes(8 * self._capacity))
+        self._start = 0
+        self._count = 0
+        self._sum = 0.0
+        self._weight_sum = 0.0
+        self._last_timestamp: Optional[float] = None
+        self._additions = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def mean(self) -> Optional[float]:
+        if self._count == 0:
+            return None
+        return self._sum / self._weight_sum
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        """Iterate (timestamp, value) pairs from oldest to newest."""
+        for offset in range(self._count):
+            index = (self._start + offset) % self._capacity
+            yield self._timestamps[index], self._values[index]
+
+    def add(self, value: float, timestamp: Optional[float] = None) -> float:
+        if timestamp is None:
+            timestamp = time.time()
+
+        if self._window_seconds is not None:
+            self.expire(timestamp)
+        if self._count == self._capacity:
+            self._evict()
+
+        weight = 1.0
+        if self._interval is not None:
+            if self._last_timestamp is None:
+                weight = self._interval
+            else:
+                weight = max(min(timestamp - self._last_timestamp, self._interval), MIN_SAMPLE_WEIGHT)
+        self._last_timestamp = timestamp
+
+        index = (self._start + self._count) % self._capacity
+        self._values[index] = value
+        self._timestamps[index] = timestamp
+        self._weights[index] = weight
+        self._count += 1
+        self._sum += weight * value
+        self._weight_sum += weight
+
+        self._additions += 1
+        if self._additions % RESUM_INTERVAL == 0:
+            self._resum()
+
+        return self._sum / self._weight_sum
+
+    def expire(self, now: float) -> None:
+        """Drop samples which fell out of the time window."""
+        if self._window_seconds is None:
+            return
+        cutoff = now - self._window_seconds
+        while self._count > 0 and self._timestamps[self._start] <= cutoff:
+            self._evict()
+
+    def clear(self) -> None:
+        self._start = 0
+        self._count = 0
+        self._sum = 0.0
+        self._weight_sum = 0.0
+        self._last_timestamp = None
+
+    def _evict(self) -> None:
+        weight = self._weights[self._start]
+        self._sum -= weight * self._values[self._start]
+        self._weight_sum -= weight
+        self._start = (self._start + 1) % self._capacity
+        self._count -= 1
+        if self._count == 0:
+            self._sum = 0.0
+            self._weight_sum = 0.0
+
+    def _resum(self) -> None:
+        indices = [(self._start + offset) % self._capacity for offset in range(self._count)]
+        self._sum = math.fsum(self._weights[index] * self._values[index] for index in indices)
+        self._weight_sum = math.fsum(self._weights[index] for index in indices)
+
+
+class ExponentialAverage:
+    """Exponential moving average with a span given in samples.
+
+    If interval is set, the span is taken as samples interval seconds apart and the decay follows
+    the time between the samples instead, so it stays the same however unevenly they are spaced.
+    """
+
+    def __init__(self, span: float, interval: Optional[float] = None) -> None:
+        self._alpha = 2.0 / (max(span, 1) + 1.0)
+        # Time constant with the same decay per interval as alpha per sample, none without smoothing.
+        self._time_constant = interval / -math.log1p(-self._alpha) if interval and self._alpha < 1 else None
+        self._value: Optional[float] = None
+        self._last_timestamp: Optional[float] = None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._value
+
+    def __len__(self) -> int:
+        return 0 if self._value is None else 1
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        if self._value is not None:
+            yield self._last_timestamp, self._value
+
+    def add(self, value: float, timestamp: Optional[float] = None) -> float:
+        if timestamp is None:
+            timestamp = time.time()
+        if self._value is None:
+            self._value = value
+        elif self._time_constant is None:
+            self._value += self._alpha * (value - self._value)
+        else:
+            elapsed = max(timestamp - self._last_timestamp, 0.0)
+            self._value += -math.expm1(-elapsed / self._time_constant) * (value - self._value)
+        self._last_timestamp = timestamp
+        return self._value
+
+    def expire(self, now: float) -> None:
+        pass
+
+    def clear(self) -> None:
+        self._value = None
+        self._last_timestamp = None
+
+
+def window_capacity(mode: str, window: int) -> int:
+    """Number of samples needed to rebuild the aggregator for the configured averaging mode and window."""
+    window = max(int(window), 1)
+    if mode == AVERAGE_MODE_EMA:
+        return EMA_RESTORE_SPANS * window
+    if mode == AVERAGE_MODE_SECONDS:
+        return math.ceil(window / SAMPLE_PERIOD_SECONDS) + 1
+    return window
+
+
+def window_seconds(mode: str, window: int, interval: float = SAMPLE_PERIOD_SECONDS) -> float:
+    """Age after which a sample no longer belongs to the window, given the measurement interval."""
+    window = max(int(window), 1)
+    if mode == AVERAGE_MODE_SECONDS:
+        return window
+    return window_capacity(mode, window) * interval
+
+
+def create_moving_average(mode: str, window: int, interval: Optional[float] = None):
+    """Create the aggregator for the configured averaging mode and window.
+
+    interval is the longest regular time between samples. Given it, the aggregators weigh samples by time.
+    """
+    window = max(int(window), 1)
+    if mode == AVERAGE_MODE_EMA:
+        return ExponentialAverage(window, interval)
+    if mode == AVERAGE_MODE_SECONDS:
+        return RingAverage(window_capacity(mode, window), window_seconds=window, interval=interval)
+    return RingAverage(window, interval=interval)
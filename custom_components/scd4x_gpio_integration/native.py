@@ -0,0 +1,265 @@
+"""Lightweight SCD4x transport issuing I2C_RDWR ioctls on the Linux i2c-dev file descriptor.
+
+The sensirion driver builds command objects, byte strings and response objects for every
+transaction. This transport reuses preallocated buffers and ctypes message structures and
+checks CRCs with a lookup table, so reading a measurement allocates next to nothing.
+"""
+import ctypes
+import errno
+import fcntl
+import os
+import time
+from typing import NamedTuple, Optional
+
+from sensirion_i2c_driver.errors import I2cChecksumError, I2cNackError, I2cTimeoutError, I2cTransceiveError
+from sensirion_i2c_driver.transceiver_v1 import I2cTransceiverV1
+
+from .metrics import Metrics, METRIC_COMMAND_PREFIX, METRIC_CRC_ERRORS, METRIC_I2C_ERRORS
+
+# linux/i2c-dev.h and linux/i2c.h
+I2C_RDWR = 0x0707
+I2C_M_RD = 0x0001
+
+SCD4X_ADDRESS = 0x62
+
+# Largest transfers: a command with one argument word, and three response words.
+TX_BUFFER_SIZE = 5
+RX_BUFFER_SIZE = 9
+
+# Delay between writing a read command and reading its response
+READ_DELAY = 0.001
+
+CRC8_POLYNOMIAL = 0x31
+CRC8_INIT = 0xFF
+
+# Errors the i2c-dev driver reports for an address or data byte that was not acknowledged
+NACK_ERRNOS = (errno.EREMOTEIO, errno.ENXIO, errno.EIO)
+
+
+def _crc8_table() -> bytes:
+    table = bytearray(256)
+    for index in range(256):
+        crc = index
+        for _ in range(8):
+            crc = ((crc << 1) ^ CRC8_POLYNOMIAL) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[index] = crc
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data, crc: int = CRC8_INIT) -> int:
+    table = CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+class _I2cMsg(ctypes.Structure):
+    _fields_ = [("addr", ctypes.c_uint16), ("flags", ctypes.c_uint16), ("len", ctypes.c_uint16),
+                ("buf", ctypes.c_void_p)]
+
+
+class _I2cRdwrIoctlData(ctypes.Structure):
+    _fields_ = [("msgs", ctypes.POINTER(_I2cMsg)), ("nmsgs", ctypes.c_uint32)]
+
+
+class I2cRdwrTransceiver(I2cTransceiverV1):
+    """Transceiver on a /dev/i2c-N file descriptor with preallocated I2C_RDWR requests.
+
+    write() and read_into() are the allocation free primitives used by NativeScd4xDevice,
+    transceive() keeps the sensirion driver and the multiplexer selection working on top.
+    """
+
+    API_VERSION = 1
+
+    def __init__(self, device_file: str) -> None:
+        super().__init__()
+        self._device_file = device_file
+        self._fd: Optional[int] = None
+        self.tx_buffer = bytearray(TX_BUFFER_SIZE)
+        self.rx_buffer = bytearray(RX_BUFFER_SIZE)
+        self._tx_ctypes = (ctypes.c_char * TX_BUFFER_SIZE).from_buffer(self.tx_buffer)
+        self._rx_ctypes = (ctypes.c_char * RX_BUFFER_SIZE).from_buffer(self.rx_buffer)
+        self._write_message = _I2cMsg(0, 0, 0, ctypes.addressof(self._tx_ctypes))
+        self._read_message = _I2cMsg(0, I2C_M_RD, 0, ctypes.addressof(self._rx_ctypes))
+        self._write_request = _I2cRdwrIoctlData(ctypes.pointer(self._write_message), 1)
+        self._read_request = _I2cRdwrIoctlData(ctypes.pointer(self._read_message), 1)
+
+    @property
+    def description(self) -> str:
+        return self._device_file
+
+    @property
+    def channel_count(self) -> None:
+        return None
+
+    def open(self) -> None:
+        self._fd = os.open(self._device_file, os.O_RDWR)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _transfer(self, request: _I2cRdwrIoctlData) -> None:
+        fcntl.ioctl(self._fd, I2C_RDWR, request)
+
+    def write(self, address: int, length: int) -> None:
+        """Write the first length bytes of tx_buffer to address."""
+        self._write_message.addr = address
+        self._write_message.len = length
+        self._transfer(self._write_request)
+
+    def read_into(self, address: int, length: int) -> None:
+        """Read length bytes from address into rx_buffer."""
+        self._read_message.addr = address
+        self._read_message.len = length
+        self._transfer(self._read_request)
+
+    def transceive(self, slave_address, tx_data, rx_length, read_delay, timeout):
+        try:
+            if tx_data:
+                self.tx_buffer[:len(tx_data)] = tx_data
+                self.write(slave_address, len(tx_data))
+            if rx_length:
+                time.sleep(read_delay)
+                self.read_into(slave_address, rx_length)
+                return self.STATUS_OK, None, bytes(self.rx_buffer[:rx_length])
+            return self.STATUS_OK, None, b""
+        except OSError as exception:
+            if exception.errno in NACK_ERRNOS:
+                return self.STATUS_NACK, exception, b""
+            if exception.errno == errno.ETIMEDOUT:
+                return self.STATUS_TIMEOUT, exception, b""
+            return self.STATUS_UNSPECIFIED_ERROR, exception, b""
+
+
+# Metric names built once instead of on every command, same names as the sensirion command classes give
+_COMMAND_METRICS = {
+    name: METRIC_COMMAND_PREFIX + name for name in (
+        "StartPeriodicMeasurement", "StopPeriodicMeasurement", "GetSerialNumber", "GetSensorAltitude",
+        "SetSensorAltitude", "GetTemperatureOffset", "SetTemperatureOffset", "PersistSettings", "Reinit",
+        "GetDataReadyStatus", "ReadMeasurement", "SetAmbientPressure", "StartLowPowerPeriodicMeasurement",
+        "MeasureSingleShot",
+    )
+}
+
+
+class TemperatureOffset(NamedTuple):
+    degrees_celsius: float
+
+
+class NativeScd4xDevice:
+    """The subset of Scd4xI2cDevice used by this integration, on an I2cRdwrTransceiver."""
+
+    def __init__(self, transceiver: I2cRdwrTransceiver, metrics: Metrics, slave_address: int = SCD4X_ADDRESS):
+        self._transceiver = transceiver
+        self._metrics = metrics
+        self._address = slave_address
+        self._tx = transceiver.tx_buffer
+        self._rx = transceiver.rx_buffer
+
+    def _send(self, name: str, command: int, argument: Optional[int] = None,
+              words: int = 0, post_processing_time: float = 0.0) -> None:
+        """Send command, optionally with one argument word, and read words response words into rx_buffer."""
+        tx = self._tx
+        tx[0] = command >> 8
+        tx[1] = command & 0xFF
+        length = 2
+        if argument is not None:
+            tx[2] = argument >> 8
+            tx[3] = argument & 0xFF
+            tx[4] = CRC8_TABLE[CRC8_TABLE[CRC8_INIT ^ tx[2]] ^ tx[3]]
+            length = 5
+
+        start = time.perf_counter()
+        try:
+            self._transceiver.write(self._address, length)
+            if words:
+                time.sleep(READ_DELAY)
+                self._transceiver.read_into(self._address, 3 * words)
+                self._check_crc(words)
+            elif post_processing_time:
+                time.sleep(post_processing_time)
+        except OSError as exception:
+            if not isinstance(exception, I2cChecksumError):
+                self._metrics.increment(METRIC_I2C_ERRORS)
+                if exception.errno in NACK_ERRNOS:
+                    raise I2cNackError(exception, None) from exception
+                if exception.errno == errno.ETIMEDOUT:
+                    raise I2cTimeoutError(exception, None) from exception
+                raise I2cTransceiveError(exception, None, str(exception)) from exception
+            raise
+        finally:
+            self._metrics.record(_COMMAND_METRICS[name], time.perf_counter() - start)
+
+    def _check_crc(self, words: int) -> None:
+        rx = self._rx
+        table = CRC8_TABLE
+        for offset in range(0, 3 * words, 3):
+            expected = table[table[CRC8_INIT ^ rx[offset]] ^ rx[offset + 1]]
+            if rx[offset + 2] != expected:
+                self._metrics.increment(METRIC_CRC_ERRORS)
+                raise I2cChecksumError(rx[offset + 2], expected, bytes(rx[:3 * words]))
+
+    def _word(self, index: int) -> int:
+        return (self._rx[3 * index] << 8) | self._rx[3 * index + 1]
+
+    def start_periodic_measurement(self) -> None:
+        self._send("StartPeriodicMeasurement", 0x21B1, post_processing_time=0.001)
+
+    def start_low_power_periodic_measurement(self) -> None:
+        self._send("StartLowPowerPeriodicMeasurement", 0x21AC, post_processing_time=0.001)
+
+    def measure_single_shot(self) -> None:
+        """Start a single shot, without waiting for it. Data ready is set once the sample is taken."""
+        self._send("MeasureSingleShot", 0x219D)
+
+    def stop_periodic_measurement(self) -> None:
+        self._send("StopPeriodicMeasurement", 0x3F86, post_processing_time=0.5)
+
+    def send_stop_periodic_measurement(self) -> None:
+        """Stop the periodic measurement, without waiting the 500 ms the device takes to process it."""
+        self._send("StopPeriodicMeasurement", 0x3F86)
+
+    def read_serial_number(self) -> int:
+        self._send("GetSerialNumber", 0x3682, words=3)
+        return (self._word(0) << 32) | (self._word(1) << 16) | self._word(2)
+
+    def get_sensor_altitude(self) -> int:
+        self._send("GetSensorAltitude", 0x2322, words=1)
+        return self._word(0)
+
+    def set_sensor_altitude(self, altitude: int) -> None:
+        self._send("SetSensorAltitude", 0x2427, int(altitude), post_processing_time=0.001)
+
+    def get_temperature_offset(self) -> TemperatureOffset:
+        self._send("GetTemperatureOffset", 0x2318, words=1)
+        return TemperatureOffset(175.0 * self._word(0) / 65536.0)
+
+    def set_temperature_offset(self, degrees_celsius: float) -> None:
+        self._send("SetTemperatureOffset", 0x241D, round(degrees_celsius * 65536.0 / 175.0),
+                   post_processing_time=0.001)
+
+    def set_ambient_pressure(self, ambient_pressure: int) -> None:
+        self._send("SetAmbientPressure", 0xE000, int(ambient_pressure), post_processing_time=0.001)
+
+    def persist_settings(self) -> None:
+        self._send("PersistSettings", 0x3615, post_processing_time=0.8)
+
+    def reinit(self) -> None:
+        self._send("Reinit", 0x3646, post_processing_time=0.02)
+
+    def get_data_ready_status(self) -> bool:
+        self._send("GetDataReadyStatus", 0xE4B8, words=1)
+        return (self._word(0) & 0x07FF) != 0
+
+    def measurement_if_ready(self) -> Optional[tuple[float, float, float]]:
+        """Read CO2, temperature and humidity if a new measurement is available."""
+        if not self.get_data_ready_status():
+            return None
+        self._send("ReadMeasurement", 0xEC05, words=3)
+        return (self._word(0), -45.0 + 175.0 * self._word(1) / 65536.0, 100.0 * self._word(2) / 65536.0)
+
@@ -0,0 +1,209 @@
+"""Streaming outlier rejection ahead of the moving averages for scd4x_gpio_integration."""
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Optional
+
+from .const import FILTER_MODE_HAMPEL, FILTER_MODE_MEDIAN
+
+# Scales the median absolute deviation to the standard deviation of normally distributed data.
+MAD_SCALE = 1.4826
+
+# The Hampel filter only judges a value once the window holds this many samples.
+HAMPEL_MIN_SAMPLES = 3
+
+
+class SlidingMedian:
+    """Median of the last window values, kept in two heaps with lazy deletion.
+
+    The lower half lives in a max heap, the upper half in a min heap. Values leaving the
+    window are only marked and dropped once they reach the top of a heap, so adding a value
+    is O(log n) instead of a sort of the window. Marked values buried in a heap, e.g. the
+    old minimums of a rising signal, are purged by rebuilding the heaps once they make up
+    half of them, which is amortized O(log n) as well.
+    """
+
+    def __init__(self, window: int) -> None:
+        self._window = max(int(window), 1)
+        self._values: deque[float] = deque()
+        self._low: list[float] = []  # negated values
+        self._high: list[float] = []
+        self._low_size = 0
+        self._high_size = 0
+        self._delayed: dict[float, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def median(self) -> Optional[float]:
+        if not self._values:
+            return None
+        if self._low_size > self._high_size:
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2.0
+
+    def add(self, value: float) -> float:
+        """Add value, dropping the oldest value if the window is full, and return the median."""
+        if len(self._values) == self._window:
+            self._remove(self._values.popleft())
+        self._values.append(value)
+
+        if not self._low or value <= -self._low[0]:
+            heapq.heappush(self._low, -value)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, value)
+            self._high_size += 1
+        self._rebalance()
+        if len(self._low) + len(self._high) > 2 * len(self._values) + 2:
+            self._rebuild()
+        return self.median
+
+    def _remove(self, value: float) -> None:
+        self._delayed[value] = self._delayed.get(value, 0) + 1
+        if value <= -self._low[0]:
+            self._low_size -= 1
+            if value == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if self._high and value == self._high[0]:
+                self._prune(self._high, 1)
+        self._rebalance()
+
+    def _rebalance(self) -> None:
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+    def _rebuild(self) -> None:
+        ordered = sorted(self._values)
+        self._low_size = (len(ordered) + 1) // 2
+        self._high_size = len(ordered) - self._low_size
+        self._low = [-value for value in ordered[:self._low_size]]
+        self._high = ordered[self._low_size:]
+        heapq.heapify(self._low)
+        self._delayed.clear()
+
+    def _prune(self, heap: list[float], sign: int) -> None:
+        """Pop values marked as deleted off the top of heap."""
+        while heap:
+            value = sign * heap[0]
+            pending = self._delayed.get(value)
+            if not pending:
+                return
+            if pending == 1:
+                del self._delayed[value]
+            else:
+                self._delayed[value] = pending - 1
+            heapq.heappop(heap)
+
+
+class SortedWindow:
+    """The last window values in arrival order and in sorted order, for order statistics by rank.
+
+    A value finds its place by bisection and the sorted list shifts with one memmove, which up
+    to windows of ten thousand values costs about as much as the heap operations of SlidingMedian.
+    """
+
+    def __init__(self, window: int) -> None:
+        self._window = max(int(window), 1)
+        self._values: deque[float] = deque()
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def median(self) -> Optional[float]:
+        count = len(self._sorted)
+        if not count:
+            return None
+        return (self._sorted[(count - 1) // 2] + self._sorted[count // 2]) / 2.0
+
+    def add(self, value: float) -> None:
+        """Add value, dropping the oldest value if the window is full."""
+        if len(self._values) == self._window:
+            del self._sorted[bisect_left(self._sorted, self._values.popleft())]
+        self._values.append(value)
+        insort(self._sorted, value)
+
+    def mad(self) -> float:
+        """Median absolute deviation of the window from its median.
+
+        The deviations of the values below the median, read downwards from it, and of those above,
+        read upwards, form two sorted sequences, so their median is found by bisection in O(log n).
+        """
+        median = self.median
+        count = len(self._sorted)
+        split = bisect_right(self._sorted, median)
+        return (self._deviation((count - 1) // 2, median, split) + self._deviation(count // 2, median, split)) / 2.0
+
+    def _deviation(self, rank: int, median: float, split: int) -> float:
+        """The rank-th smallest absolute deviation from median, values below split lie at or below it."""
+        values = self._sorted
+        # Take below deviations from the lower side and rank + 1 - below from the upper side.
+        low = max(0, rank + 1 - (len(values) - split))
+        high = min(rank + 1, split)
+        while low < high:
+            below = (low + high) // 2
+            if median - values[split - 1 - below] < values[split + rank - below] - median:
+                low = below + 1
+            else:
+                high = below
+        above = rank + 1 - low
+        return max(median - values[split - low] if low else 0.0, values[split + above - 1] - median if above else 0.0)
+
+
+class MedianFilter:
+    """Replaces each value by the median of the window."""
+
+    def __init__(self, window: int) -> None:
+        self._median = SlidingMedian(window)
+
+    def filter(self, value: float) -> float:
+        return self._median.add(value)
+
+
+class HampelFilter:
+    """Replaces values further than threshold scaled MADs from the window median by the median.
+
+    The MAD of a small window scatters, at a threshold of 3 a window of 11 still replaces about
+    3% of plain Gaussian noise, a window of 101 about 0.5%.
+    """
+
+    def __init__(self, window: int, threshold: float, resolution: float = 0.0) -> None:
+        self._window = SortedWindow(window)
+        self._threshold = threshold
+        # Lower bound of the MAD, a constant signal would otherwise reject every change.
+        self._resolution = resolution
+        self.rejected = 0
+
+    def filter(self, value: float) -> float:
+        self._window.add(value)
+        median = self._window.median
+        if len(self._window) < HAMPEL_MIN_SAMPLES:
+            return value
+        if abs(value - median) > self._threshold * MAD_SCALE * max(self._window.mad(), self._resolution):
+            self.rejected += 1
+            return median
+        return value
+
+
+def create_outlier_filter(mode: str, window: int, threshold: float, resolution: float = 0.0):
+    """Create the filter for the configured mode, None if the window is too small to filter anything."""
+    if window is None or window < HAMPEL_MIN_SAMPLES:
+        return None
+    if mode == FILTER_MODE_MEDIAN:
+        return MedianFilter(window)
+    if mode == FILTER_MODE_HAMPEL:
+        return HampelFilter(window, threshold, resolution)
+    return None
@@ -0,0 +1,98 @@
+"""Ambient pressure compensation from a pressure entity for scd4x_gpio_integration."""
+import logging
+from typing import Optional
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, STATE_UNAVAILABLE, STATE_UNKNOWN, UnitOfPressure
+from homeassistant.core import State
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util.unit_conversion import PressureConverter
+
+from .moving_average import ExponentialAverage
+
+# Range of ambient pressure the SCD4x accepts, in hPa.
+PRESSURE_MIN = 700
+PRESSURE_MAX = 1200
+
+# Span of the exponential average over the updates of the pressure entity.
+PRESSURE_SMOOTHING_SPAN = 5
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def pressure_from_state(state: Optional[State]) -> Optional[float]:
+    """Pressure of an entity state in hPa, None if it is unavailable or not a pressure."""
+    if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return None
+    try:
+        value = float(state.state)
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) or UnitOfPressure.HPA
+        return PressureConverter.convert(value, unit, UnitOfPressure.HPA)
+    except (ValueError, HomeAssistantError) as exception:
+        _LOGGER.debug(f"Ignoring pressure {state.state} of {state.entity_id}: {exception}")
+        return None
+
+
+class PressureCompensation:
+    """Smoothed ambient pressure and the decision when the device needs it again.
+
+    Updates of the entity only change the smoothed value. The acquisition cycle asks for the
+    pending value and writes it in the same bus submission as the next reading, so a write never
+    costs an extra round trip. A value is pending once it moved threshold hPa away from the
+    value on the device and the last write is at least interval seconds ago.
+    """
+
+    def __init__(self, threshold: float, interval: float) -> None:
+        self._average = ExponentialAverage(PRESSURE_SMOOTHING_SPAN)
+        self._threshold = threshold
+        self._interval = interval
+        self._last_write: Optional[float] = None
+        self.written: Optional[int] = None
+        self.writes = 0
+
+    def configure(self, threshold: float, interval: float) -> None:
+        self._threshold = threshold
+        self._interval = interval
+
+    @property
+    def smoothed(self) -> Optional[float]:
+        return self._average.mean
+
+    def add(self, pressure: float) -> None:
+        if not PRESSURE_MIN <= pressure <= PRESSURE_MAX:
+            _LOGGER.debug(f"Ignoring ambient pressure {pressure:.1f} hPa outside of the sensor range")
+            return
+        self._average.add(pressure)
+
+    def add_state(self, state: Optional[State]) -> None:
+        pressure = pressure_from_state(state)
+        if pressure is not None:
+            self.add(pressure)
+
+    def pending(self, now: float) -> Optional[int]:
+        """The pressure to write to the device in hPa, None if the device is up to date or rate limited."""
+        smoothed = self._average.mean
+        if smoothed is None:
+            return None
+        if self.written is not None:
+            if abs(smoothed - self.written) < self._threshold:
+                return None
+            if self._last_write is not None and now - self._last_write < self._interval:
+                return None
+        return round(smoothed)
+
+    def confirm(self, pressure: int, now: float) -> None:
+        """Record that pressure was written to the device."""
+        self.written = pressure
+        self._last_write = now
+        self.writes += 1
+
+    def invalidate(self) -> None:
+        """Forget the value on the device, e.g. after a reinit dropped it, so it is written right away."""
+        self.written = None
+
+    def as_dict(self) -> dict:
+        return {
+            "smoothed": round(self.smoothed, 1) if self.smoothed is not None else None,
+            "written": self.written,
+            "writes": self.writes,
+        }
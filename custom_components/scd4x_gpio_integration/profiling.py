@@ -0,0 +1,288 @@
+"""On-demand profiling of the acquisition path of scd4x_gpio_integration.
+
+While a profile runs, the event loop thread runs under cProfile, every device operation on the
+bus workers under a profiler of its own, the stages of the update record their wall and CPU time,
+a task measures how late the event loop wakes it up and tracemalloc traces the allocations. While
+no profile runs, a stage costs one attribute check and a shared null context. cProfile traces
+every call instead of sampling the stacks, which the standard library offers no profiler for, so
+the profiled updates run slower than the others.
+"""
+import asyncio
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Iterator, Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_PROFILER
+
+# Stages of an update
+STAGE_UPDATE = "update"
+STAGE_READ = "read"
+STAGE_RECORD = "record"
+STAGE_PUBLISH = "publish"
+STAGE_EXECUTOR_PREFIX = "executor_"
+
+# Seconds between wake ups of the event loop lag sampler, and the lag counted as blocking.
+LAG_SAMPLE_INTERVAL = 0.01
+LAG_BLOCKING_THRESHOLD = 0.05
+TRACEMALLOC_FRAMES = 16
+SUMMARY_TOP = 20
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_INACTIVE = nullcontext()
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class StageTimes:
+    """Wall and CPU time spent in one stage."""
+
+    __slots__ = ("count", "wall", "cpu", "max_wall")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+
+    def add(self, wall: float, cpu: float) -> None:
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max_wall = max(self.max_wall, wall)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "mean_wall": self.wall / self.count if self.count else None,
+            "max_wall": self.max_wall,
+        }
+
+
+class Profiler:
+    """Profiles the acquisition path of all entries for a limited time.
+
+    CPU times of the stages on the event loop are those of the loop thread while the stage runs,
+    so they include other tasks the loop ran while the stage awaited.
+    """
+
+    def __init__(self) -> None:
+        self.active = False
+        self._lock = threading.Lock()
+        self._stages: dict[str, StageTimes] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._executor_profiles: list[cProfile.Profile] = []
+        self._lags: list[float] = []
+        self._lag_task: Optional[asyncio.Task] = None
+        self._started_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+
+    def stage(self, name: str) -> ContextManager:
+        """Time the block as stage name while a profile runs."""
+        if not self.active:
+            return _INACTIVE
+        return self._timed(name)
+
+    def job(self, method: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a blocking device operation, so it is profiled on the thread running it."""
+        if not self.active:
+            return method
+        return functools.partial(self._run_job, method)
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def _add(self, name: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = StageTimes()
+            stage.add(wall, cpu)
+
+    def _run_job(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+        name = STAGE_EXECUTOR_PREFIX + getattr(method, "__name__", type(method).__name__)
+        profile: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # From Python 3.12 on, the profiler of the event loop already sees every thread.
+            profile = None
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._executor_profiles.append(profile)
+
+    def start(self) -> None:
+        """Start profiling, on the event loop."""
+        if self.active:
+            raise RuntimeError("A profile is already running")
+        self._stages = {}
+        self._executor_profiles = []
+        self._lags = []
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._snapshot = _package_snapshot()
+        self._lag_task = asyncio.get_running_loop().create_task(self._async_sample_lag())
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Another profiler is active on the thread, stop what was started for this one.
+            self._lag_task.cancel()
+            self._lag_task = None
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self._profile = None
+            self._snapshot = None
+            raise
+        self._started = time.perf_counter()
+        self.active = True
+
+    async def async_stop(self) -> tuple[pstats.Stats, tracemalloc.Snapshot, dict]:
+        """Stop profiling and return the merged statistics, the last allocation snapshot and a summary."""
+        self.active = False
+        self._profile.disable()
+        duration = time.perf_counter() - self._started
+        self._lag_task.cancel()
+        try:
+            await self._lag_task
+        except asyncio.CancelledError:
+            pass
+
+        snapshot = _package_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            for profile in self._executor_profiles:
+                stats.add(profile)
+        summary = {
+            "duration": duration,
+            "stages": {name: stage.as_dict() for name, stage in sorted(self._stages.items())},
+            "event_loop": _lag_summary(self._lags),
+            "functions": _top_functions(stats),
+            "allocations": _top_allocations(snapshot, self._snapshot),
+        }
+        self._profile = None
+        self._executor_profiles = []
+        self._snapshot = None
+        return stats, snapshot, summary
+
+    async def _async_sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            self._lags.append(max(loop.time() - start - LAG_SAMPLE_INTERVAL, 0.0))
+
+
+def _package_snapshot() -> tracemalloc.Snapshot:
+    """Allocation snapshot of the traces allocated by code of the integration."""
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, "*"), all_frames=True)])
+
+
+def _lag_summary(lags: list[float]) -> dict:
+    if not lags:
+        return {"samples": 0}
+    ordered = sorted(lags)
+    blocking = [lag for lag in lags if lag >= LAG_BLOCKING_THRESHOLD]
+    return {
+        "samples": len(lags),
+        "mean_lag": sum(lags) / len(lags),
+        "p99_lag": ordered[min(int(0.99 * len(ordered)), len(ordered) - 1)],
+        "max_lag": ordered[-1],
+        "blocked": sum(blocking),
+        "blocked_count": len(blocking),
+    }
+
+
+def _top_functions(stats: pstats.Stats) -> list[dict]:
+    """Functions of the integration with the highest cumulative time."""
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        if filename.startswith(PACKAGE_DIR):
+            rows.append({
+                "function": f"{os.path.relpath(filename, PACKAGE_DIR)}:{line}({name})",
+                "calls": calls,
+                "time": own,
+                "cumulative": cumulative,
+            })
+    rows.sort(key=lambda row: row["cumulative"], reverse=True)
+    return rows[:SUMMARY_TOP]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, start: tracemalloc.Snapshot) -> list[dict]:
+    """Lines of the integration whose allocated memory grew most during the profile."""
+    return [
+        {
+            "line": f"{os.path.relpath(stat.traceback[0].filename, PACKAGE_DIR)}:{stat.traceback[0].lineno}",
+            "size": stat.size,
+            "size_diff": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in snapshot.compare_to(start, "lineno")[:SUMMARY_TOP]
+    ]
+
+
+def write_profile(path: str, stats: pstats.Stats, snapshot: tracemalloc.Snapshot, summary: dict) -> list[str]:
+    """Write path.pstats, path.tracemalloc and path.json, in the executor, and return their names.
+
+    The pstats file opens in snakeviz, flameprof or gprof2dot, the snapshot loads with
+    tracemalloc.Snapshot.load.
+    """
+    filenames = [f"{path}.pstats", f"{path}.tracemalloc", f"{path}.json"]
+    stats.dump_stats(filenames[0])
+    snapshot.dump(filenames[1])
+    with open(filenames[2], "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+    return filenames
+
+
+async def async_profile(hass: HomeAssistant, duration: float, path: str) -> dict:
+    """Profile the integration for duration seconds, write the results next to path and return the summary."""
+    profiler = get_profiler(hass)
+    profiler.start()
+    _LOGGER.info(f"Profiling for {duration}s")
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        stats, snapshot, summary = await profiler.async_stop()
+    summary["files"] = await hass.async_add_executor_job(write_profile, path, stats, snapshot, summary)
+    return summary
+
+
+def get_profiler(hass: HomeAssistant) -> Profiler:
+    """Return the profiler shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PROFILER not in domain_data:
+        domain_data[DATA_PROFILER] = Profiler()
+    return domain_data[DATA_PROFILER]
@@ -0,0 +1,101 @@
+"""Escalating in-place recovery from I2C faults for scd4x_gpio_integration."""
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional, TypeVar
+
+import async_timeout
+
+from .metrics import Metrics, METRIC_RECOVERIES, METRIC_RECOVERY_FAILURES, METRIC_RECOVERY_PREFIX, METRIC_RECOVERY_TIME
+
+# Recovery steps, from cheapest to most intrusive.
+RECOVERY_RETRY = "retry"
+RECOVERY_REOPEN = "reopen"
+RECOVERY_RESET = "reset"
+
+# Backoff before each step after the first, full jitter between half and all of it.
+BACKOFF_BASE = 0.1
+BACKOFF_MAX = 5.0
+
+_T = TypeVar("_T")
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class RecoveryStep(NamedTuple):
+    """Action bringing the bus or device back, None for a plain retry, and how often to try it."""
+
+    name: str
+    action: Optional[Callable[[], Awaitable[None]]]
+    attempts: int
+
+
+def backoff_delay(attempt: int, rng: random.Random = random) -> float:
+    return rng.uniform(0.5, 1.0) * min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+
+
+class FaultRecovery:
+    """Walks the recovery steps until a read succeeds, without tearing down the caller.
+
+    Every step is followed by a read. The whole walk gives up once deadline seconds have passed.
+    Counts of each step and the time to recover are recorded in the metrics.
+    """
+
+    def __init__(self, steps: list[RecoveryStep], metrics: Metrics,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep, rng: random.Random = random,
+                 deadline: Optional[float] = None) -> None:
+        self._steps = steps
+        self._metrics = metrics
+        self._sleep = sleep
+        self._rng = rng
+        self._deadline = deadline
+        self.recovering = False
+        self.last_step: Optional[str] = None
+
+    async def async_recover(self, read: Callable[[], Awaitable[_T]], fault: Exception,
+                            first_step: str = RECOVERY_RETRY) -> _T:
+        """Recover from fault, starting with first_step, and return the result of the first successful read.
+
+        Raises the last fault once all steps failed, asyncio.TimeoutError once the deadline passed.
+        """
+        start = time.monotonic()
+        attempt = 0
+        self.recovering = True
+        _LOGGER.warning(f"I2C fault, starting recovery at {first_step}: {fault!r}")
+        deadline = async_timeout.timeout(self._deadline)
+        try:
+            async with deadline:
+                names = [step.name for step in self._steps]
+                for step in self._steps[names.index(first_step):]:
+                    for _ in range(step.attempts):
+                        if attempt > 0:
+                            await self._sleep(backoff_delay(attempt - 1, self._rng))
+                        attempt += 1
+                        self._metrics.increment(METRIC_RECOVERY_PREFIX + step.name)
+                        self.last_step = step.name
+                        try:
+                            if step.action is not None:
+                                await step.action()
+                            result = await read()
+                        except Exception as exception:  # pylint: disable=broad-except
+                            _LOGGER.debug(f"Recovery step {step.name} failed: {exception!r}")
+                            fault = exception
+                            continue
+
+                        elapsed = time.monotonic() - start
+                        self._metrics.increment(METRIC_RECOVERIES)
+                        self._metrics.record(METRIC_RECOVERY_TIME, elapsed)
+                        _LOGGER.info(f"Recovered from I2C fault by {step.name} after {elapsed:.2f}s")
+                        return result
+        except asyncio.TimeoutError:
+            if not deadline.expired:
+                raise
+            self._metrics.increment(METRIC_RECOVERY_FAILURES)
+            _LOGGER.warning(f"Gave up recovery at {self.last_step} after {self._deadline}s, last fault: {fault!r}")
+            raise
+        finally:
+            self.recovering = False
+
+        self._metrics.increment(METRIC_RECOVERY_FAILURES)
+        raise fault
@@ -0,0 +1,129 @@
+"""Memory-mapped file keeping the latest readings of scd4x_gpio_integration across restarts."""
+import logging
+import mmap
+import os
+import struct
+import zlib
+from typing import Optional, Sequence
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+MAGIC = b"SCD4"
+FORMAT_VERSION = 1
+
+# magic, format version, number of channels, capacity in records, crc32 of the preceding fields
+HEADER = struct.Struct("<4sHHII")
+
+# Seed of the record checksums, a zeroed record must not carry a valid checksum.
+RECORD_CRC_SEED = 0x5CD4
+
+
+def _record_struct(channels: int) -> struct.Struct:
+    """Timestamp, one float per channel and a crc32 of the preceding fields."""
+    return struct.Struct("<d" + "f" * channels + "I")
+
+
+class SampleFile:
+    """Fixed size ring of timestamped readings in a memory-mapped file.
+
+    Records carry their own checksum, so a record torn by a crash is skipped on load
+    instead of invalidating the file. Writes only touch the page cache, the kernel
+    writes them back to disk, there is no fsync per sample.
+    """
+
+    def __init__(self, path: str, capacity: int, channels: int) -> None:
+        self._path = path
+        self._capacity = max(int(capacity), 1)
+        self._channels = channels
+        self._record = _record_struct(channels)
+        self._size = HEADER.size + self._record.size * self._capacity
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._next = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def open(self) -> list[tuple]:
+        """Open or create the file and return its valid records ordered by timestamp.
+
+        Blocking, run it in the executor.
+        """
+        records = self._read_existing()
+
+        rebuild = not os.path.exists(self._path) or os.path.getsize(self._path) != self._size
+        self._file = open(self._path, "r+b" if not rebuild else "w+b")
+        if rebuild:
+            self._file.truncate(self._size)
+        self._mmap = mmap.mmap(self._file.fileno(), self._size)
+
+        if rebuild or self._mmap[:HEADER.size] != self._header():
+            self._mmap[:] = bytes(self._size)
+            self._mmap[:HEADER.size] = self._header()
+            records = records[-self._capacity:]
+            for record in records:
+                self.append(record[0], record[1:])
+        else:
+            self._next = self._newest_index(records) + 1 if records else 0
+        return records
+
+    def _header(self) -> bytes:
+        fields = HEADER.pack(MAGIC, FORMAT_VERSION, self._channels, self._capacity, 0)[:-4]
+        return fields + struct.pack("<I", zlib.crc32(fields))
+
+    def _read_existing(self) -> list[tuple]:
+        """Valid records of an existing file with the same channels, whatever its capacity."""
+        try:
+            with open(self._path, "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return []
+
+        if len(content) < HEADER.size:
+            return []
+        magic, version, channels, capacity, checksum = HEADER.unpack_from(content)
+        if (magic != MAGIC or version != FORMAT_VERSION or channels != self._channels
+                or checksum != zlib.crc32(content[:HEADER.size - 4])):
+            _LOGGER.warning(f"Discarding incompatible sample file {self._path}")
+            return []
+
+        records = []
+        for offset in range(HEADER.size, min(len(content), HEADER.size + capacity * self._record.size)
+                            - self._record.size + 1, self._record.size):
+            *record, checksum = self._record.unpack_from(content, offset)
+            if record[0] > 0 and checksum == zlib.crc32(
+                    content[offset:offset + self._record.size - 4], RECORD_CRC_SEED):
+                records.append(tuple(record))
+        records.sort(key=lambda record: record[0])
+        return records
+
+    def _newest_index(self, records: list[tuple]) -> int:
+        newest = records[-1][0]
+        for index in range(self._capacity):
+            if self._record.unpack_from(self._mmap, HEADER.size + index * self._record.size)[0] == newest:
+                return index
+        return -1
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        if self._mmap is None:
+            return
+        offset = HEADER.size + self._next * self._record.size
+        payload = self._record.pack(timestamp, *values, 0)[:-4]
+        self._mmap[offset:offset + self._record.size] = payload + struct.pack(
+            "<I", zlib.crc32(payload, RECORD_CRC_SEED))
+        self._next = (self._next + 1) % self._capacity
+
+    def close(self) -> None:
+        """Write back and close the file, blocking."""
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,124 @@
+"""Compact storage of raw sensor readings for scd4x_gpio_integration."""
+import math
+from array import array
+from bisect import bisect_left
+from typing import Iterator, Optional, Sequence
+
+
+class SampleStore:
+    """Preallocated ring of timestamped readings, one float32 column per channel.
+
+    Each sample takes 8 bytes for the timestamp plus 4 bytes per channel.
+    """
+
+    def __init__(self, capacity: int, channels: Sequence[str]) -> None:
+        self._capacity = max(int(capacity), 1)
+        self._channels = list(channels)
+        self._timestamps = array("d", bytes(8 * self._capacity))
+        self._columns = [array("f", bytes(4 * self._capacity)) for _ in self._channels]
+        self._start = 0
+        self._count = 0
+        self._appended = 0
+
+    @property
+    def appended(self) -> int:
+        """Number of samples appended so far, which is also the sequence number of the next sample."""
+        return self._appended
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def channels(self) -> list[str]:
+        return self._channels
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        if self._count == self._capacity:
+            self._start = (self._start + 1) % self._capacity
+            self._count -= 1
+
+        index = (self._start + self._count) % self._capacity
+        self._timestamps[index] = timestamp
+        for column, value in zip(self._columns, values):
+            column[index] = value
+        self._count += 1
+        self._appended += 1
+
+    def _index_since(self, timestamp: float) -> int:
+        """Offset of the first sample at or after timestamp, timestamps are ascending."""
+        return bisect_left(range(self._count), timestamp,
+                           key=lambda offset: self._timestamps[(self._start + offset) % self._capacity])
+
+    def rows(self, since: Optional[float] = None) -> Iterator[tuple]:
+        """Iterate (timestamp, value per channel...) from oldest to newest."""
+        first = 0 if since is None else self._index_since(since)
+        for offset in range(first, self._count):
+            index = (self._start + offset) % self._capacity
+            yield (self._timestamps[index], *(column[index] for column in self._columns))
+
+    def chunks(self, since: Optional[float] = None,
+               chunk_size: int = 4096) -> Iterator[tuple[array, list[array]]]:
+        """Yield copies of (timestamps, columns) in chunks, from oldest to newest.
+
+        Only the samples present when the iteration starts are returned. The store may be
+        appended to between chunks, samples overwritten in the meantime are skipped.
+        """
+        sequence = self._appended - self._count + (0 if since is None else self._index_since(since))
+        end = self._appended
+        while True:
+            sequence = max(sequence, self._appended - self._count)
+            count = min(chunk_size, end - sequence)
+            if count <= 0:
+                return
+            first = (self._start + sequence - (self._appended - self._count)) % self._capacity
+            yield self._copy(self._timestamps, first, count), [
+                self._copy(column, first, count) for column in self._columns]
+            sequence += count
+
+    def _copy(self, values: array, first: int, count: int) -> array:
+        last = first + count
+        if last <= self._capacity:
+            return values[first:last]
+        return values[first:] + values[:last - self._capacity]
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.itemsize * self._capacity + sum(
+            column.itemsize * self._capacity for column in self._columns)
+
+
+class PeriodStatistics:
+    """Running mean, minimum, maximum and count of one channel since the last reset."""
+
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def as_dict(self, digits: int) -> dict:
+        if self.count == 0:
+            return {"mean": None, "min": None, "max": None, "count": 0}
+        return {
+            "mean": round(self.total / self.count, digits),
+            "min": round(self.minimum, digits),
+            "max": round(self.maximum, digits),
+            "count": self.count,
+        }
@@ -1,161 +1,466 @@
 import asyncio
-import functools
 import logging
+import math
+import time
 import traceback
-from typing import Optional
+from typing import Callable, Optional, TypeVar, Union
 
 import async_timeout
-from sensirion_i2c_driver import LinuxI2cTransceiver, I2cConnection
+from sensirion_i2c_driver.errors import I2cChecksumError, I2cError
 from sensirion_i2c_scd import Scd4xI2cDevice
+from sensirion_i2c_scd.scd4x.commands import Scd4xI2cCmdMeasureSingleShot, Scd4xI2cCmdStopPeriodicMeasurement
+from sensirion_i2c_scd.scd4x.data_types import Scd4xPowerMode
+
+from .acquisition import AcquisitionScheduler, measurement_interval
+from .bus import I2cBusManager, I2cBusWorker, I2cMuxError, MuxChannel
+from .const import (
+    TRANSPORT_SENSIRION, MEASUREMENT_MODE_PERIODIC, MEASUREMENT_MODE_LOW_POWER, SINGLE_SHOT_MODES,
+)
+from .fleet import FleetScheduler
+from .profiling import Profiler
+from .metrics import (
+    Metrics, METRIC_COMMAND_PREFIX, METRIC_CRC_ERRORS, METRIC_I2C_ERRORS, METRIC_RESPONSIVE_RETRIES,
+    METRIC_DATA_READY_WAIT, METRIC_DATA_READY_RETRIES, METRIC_PRESSURE_WRITES, METRIC_PRESSURE_WRITE_FAILURES,
+)
+from .native import I2cRdwrTransceiver, NativeScd4xDevice
+from .pressure import PressureCompensation
+from .recovery import FaultRecovery, RecoveryStep, RECOVERY_RETRY, RECOVERY_REOPEN, RECOVERY_RESET
 
 TIMEOUT = 30
+# Bounds of the phases of stopping, stopping the measurement and releasing the bus, on a hung bus.
+STOP_TIMEOUT = 5
+RELEASE_TIMEOUT = 5
+# A probe gives up on closing a hung bus sooner, the config flow waits for it.
+PROBE_RELEASE_TIMEOUT = 1
+# A reading taking longer than this many measurement intervals means the device stopped measuring.
+READ_TIMEOUT_INTERVALS = 3
+
+# Attempts of each recovery step
+RETRY_ATTEMPTS = 2
+REOPEN_ATTEMPTS = 1
+RESET_ATTEMPTS = 2
+# Deadline of the whole recovery of one update, like the timeout of an update before there was recovery.
+RECOVERY_TIMEOUT = TIMEOUT
+
+# Deadline and interval for polling the device until it responds after stop or reinit.
+READY_DEADLINE = 2.0
+READY_POLL_INTERVAL = 0.01
+
+DEFAULT_ALTITUDE = 0
+DEFAULT_TEMPERATURE_OFFSET = 4.0
+# The offset is stored in ticks of 175 / 65536 degrees, so compare with some tolerance.
+TEMPERATURE_OFFSET_TOLERANCE = 0.01
+
+_T = TypeVar("_T")
+
+Scd4xDevice = Union[Scd4xI2cDevice, NativeScd4xDevice]
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 HEADERS = {"Content-type": "application/json; charset=UTF-8"}
 
 
-async def run_async(method):
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, method)
+class InstrumentedScd4xI2cDevice(Scd4xI2cDevice):
+    """Scd4xI2cDevice recording the latency of each command and failed transfers."""
 
+    def __init__(self, connection, metrics: Metrics, slave_address=0x62):
+        super().__init__(connection, slave_address)
+        self._metrics = metrics
 
-async def stop_periodic_measurement(scd4x: Scd4xI2cDevice):
-    await run_async(functools.partial(Scd4xI2cDevice.stop_periodic_measurement, self=scd4x))
-
-
-async def reinit(scd4x: Scd4xI2cDevice):
-    await run_async(functools.partial(Scd4xI2cDevice.reinit, self=scd4x))
-
-
-async def read_serial_number(scd4x: Scd4xI2cDevice) -> int:
-    return await run_async(functools.partial(Scd4xI2cDevice.read_serial_number, self=scd4x))
-
-
-async def start_periodic_measurement(scd4x: Scd4xI2cDevice):
-    await run_async(functools.partial(Scd4xI2cDevice.start_periodic_measurement, self=scd4x))
-
-
-async def get_data_ready_status(scd4x: Scd4xI2cDevice) -> bool:
-    return await run_async(functools.partial(Scd4xI2cDevice.get_data_ready_status, self=scd4x))
-
-
-async def read_measurement(scd4x: Scd4xI2cDevice) -> tuple:
-    return await run_async(functools.partial(Scd4xI2cDevice.read_measurement, self=scd4x))
-
-
-async def set_sensor_altitude(scd4x: Scd4xI2cDevice, sensor_altitude):
-    await run_async(functools.partial(Scd4xI2cDevice.set_sensor_altitude, self=scd4x, sensor_altitude=sensor_altitude))
-
-
-async def get_sensor_altitude(scd4x: Scd4xI2cDevice) -> int:
-    return await run_async(functools.partial(Scd4xI2cDevice.get_sensor_altitude, self=scd4x))
-
-
-async def set_temperature_offset(scd4x: Scd4xI2cDevice, temperature_offset):
-    await run_async(
-        functools.partial(Scd4xI2cDevice.set_temperature_offset, self=scd4x, t_offset=temperature_offset))
-
-
-async def get_temperature_offset(scd4x: Scd4xI2cDevice) -> float:
-    return await run_async(functools.partial(Scd4xI2cDevice.get_temperature_offset, self=scd4x))
-
+    def measurement_if_ready(self) -> Optional[tuple[float, float, float]]:
+        """Read CO2, temperature and humidity if a new measurement is available."""
+        if not self.get_data_ready_status():
+            return None
 
-async def persist_settings(scd4x: Scd4xI2cDevice):
-    await run_async(functools.partial(Scd4xI2cDevice.persist_settings, self=scd4x))
+        co2, temp, humidity = self.read_measurement()
+        return co2.co2, temp.degrees_celsius, humidity.percent_rh
+
+    def start_low_power_periodic_measurement(self) -> None:
+        self.start_periodic_measurement(Scd4xPowerMode.LOW)
+
+    def measure_single_shot(self) -> None:
+        """Start a single shot, without blocking the bus for the five seconds it takes."""
+        self.execute(Scd4xI2cCmdMeasureSingleShot(), wait_post_process=False)
+
+    def send_stop_periodic_measurement(self) -> None:
+        """Stop the periodic measurement, without waiting the 500 ms the device takes to process it."""
+        self.execute(Scd4xI2cCmdStopPeriodicMeasurement(), wait_post_process=False)
+
+    def execute(self, command, wait_post_process=True):
+        start = time.perf_counter()
+        try:
+            if not wait_post_process:
+                return self.connection.execute(self.slave_address, command, wait_post_process=False)
+            return super().execute(command)
+        except I2cChecksumError:
+            self._metrics.increment(METRIC_CRC_ERRORS)
+            raise
+        except I2cError:
+            self._metrics.increment(METRIC_I2C_ERRORS)
+            raise
+        finally:
+            self._metrics.record(METRIC_COMMAND_PREFIX + type(command).__name__.removeprefix("Scd4xI2cCmd"),
+                                 time.perf_counter() - start)
+
+
+# Composite device operations. Each of them runs as a single submission on the bus worker thread.
+
+def wait_until_responsive(method: Callable[[], _T], deadline: float = READY_DEADLINE,
+                          metrics: Optional[Metrics] = None) -> _T:
+    """Call method until the device acknowledges it, instead of sleeping a fixed time."""
+    end = time.monotonic() + deadline
+    while True:
+        try:
+            return method()
+        except I2cError:
+            if time.monotonic() >= end:
+                raise
+            if metrics is not None:
+                metrics.increment(METRIC_RESPONSIVE_RETRIES)
+            time.sleep(READY_POLL_INTERVAL)
+
+
+def start_measurement(scd4x: Scd4xDevice, mode: str) -> None:
+    """Start the periodic measurement of mode. In the single shot modes the device stays idle between shots."""
+    if mode == MEASUREMENT_MODE_LOW_POWER:
+        scd4x.start_low_power_periodic_measurement()
+    elif mode not in SINGLE_SHOT_MODES:
+        scd4x.start_periodic_measurement()
+
+
+def initialize_device(scd4x: Scd4xDevice, altitude: Optional[int], temperature_offset: Optional[float],
+                      metrics: Optional[Metrics] = None, mode: str = MEASUREMENT_MODE_PERIODIC) -> int:
+    """Bring the device into the measurement mode, writing and persisting only settings that changed."""
+    metrics = metrics if metrics is not None else Metrics()
+
+    with metrics.phase("stop"):
+        _LOGGER.debug("Stopping periodic measurements.")
+        # The device may still process the stop of the previous setup, e.g. on a reload.
+        wait_until_responsive(scd4x.stop_periodic_measurement, metrics=metrics)
+
+    with metrics.phase("serial_number"):
+        _LOGGER.debug("Reading serial number.")
+        serial = wait_until_responsive(scd4x.read_serial_number, metrics=metrics)
+        _LOGGER.debug(f"Serial Number {serial}")
+
+    with metrics.phase("settings"):
+        changed = _apply_settings(scd4x, altitude, temperature_offset)
+
+    with metrics.phase("persist"):
+        if changed:
+            _LOGGER.debug("Persisting changed settings and reinitializing device.")
+            scd4x.persist_settings()
+            scd4x.reinit()
+            wait_until_responsive(scd4x.read_serial_number, metrics=metrics)
+        else:
+            _LOGGER.debug("Device settings already match, skipping persist and reinit.")
+
+    with metrics.phase("start"):
+        _LOGGER.debug(f"Starting {mode} measurements.")
+        start_measurement(scd4x, mode)
+    return serial
+
+
+def _apply_settings(scd4x: Scd4xDevice, altitude: Optional[int], temperature_offset: Optional[float]) -> bool:
+    changed = False
+
+    saved_altitude = scd4x.get_sensor_altitude()
+    target_altitude = altitude if altitude is not None else DEFAULT_ALTITUDE
+    if target_altitude != saved_altitude:
+        _LOGGER.debug(f"Setting altitude from {saved_altitude} to {target_altitude}")
+        scd4x.set_sensor_altitude(target_altitude)
+        changed = True
+
+    saved_temperature_offset = scd4x.get_temperature_offset().degrees_celsius
+    target_temperature_offset = temperature_offset if temperature_offset is not None else DEFAULT_TEMPERATURE_OFFSET
+    if not math.isclose(target_temperature_offset, saved_temperature_offset, abs_tol=TEMPERATURE_OFFSET_TOLERANCE):
+        _LOGGER.debug(f"Setting temperature offset from {saved_temperature_offset} to {target_temperature_offset}")
+        scd4x.set_temperature_offset(target_temperature_offset)
+        changed = True
+    return changed
+
+
+def update_device_settings(scd4x: Scd4xDevice, altitude: Optional[int], temperature_offset: Optional[float],
+                           mode: str = MEASUREMENT_MODE_PERIODIC) -> bool:
+    """Write changed settings to a measuring device and persist them, without the reinit of initialize_device.
+
+    The settings can only be written while the device is idle, so the measurement pauses for the
+    duration of the writes.
+    """
+    if mode not in SINGLE_SHOT_MODES:
+        scd4x.stop_periodic_measurement()
+    try:
+        changed = _apply_settings(scd4x, altitude, temperature_offset)
+        if changed:
+            scd4x.persist_settings()
+        return changed
+    finally:
+        start_measurement(scd4x, mode)
+
+
+def probe_device(scd4x: Scd4xDevice) -> int:
+    """Read the serial number, which takes milliseconds unless the device is busy measuring.
+
+    A measuring device is stopped for the read and left idle. Only devices without an entry are
+    probed, and the setup of the entry starts the measurement mode it is configured for. The
+    device cannot tell whether it measured in low power or in high power periodic mode.
+    """
+    try:
+        return scd4x.read_serial_number()
+    except I2cError:
+        # Raises as well if there is no device at all.
+        scd4x.get_data_ready_status()
+
+    scd4x.stop_periodic_measurement()
+    return wait_until_responsive(scd4x.read_serial_number)
+
+
+def reset_device(scd4x: Scd4xDevice, metrics: Optional[Metrics] = None,
+                 mode: str = MEASUREMENT_MODE_PERIODIC) -> None:
+    """Soft reset the device, reloading its settings from EEPROM, and restart the measurement."""
+    wait_until_responsive(scd4x.stop_periodic_measurement, metrics=metrics)
+    wait_until_responsive(scd4x.reinit, metrics=metrics)
+    wait_until_responsive(scd4x.read_serial_number, metrics=metrics)
+    start_measurement(scd4x, mode)
+
+
+def read_measurement_if_ready(scd4x: Scd4xDevice) -> Optional[tuple[float, float, float]]:
+    return scd4x.measurement_if_ready()
+
+
+def read_measurement_and_compensate(scd4x: Scd4xDevice, ambient_pressure: int
+                                    ) -> tuple[Optional[tuple[float, float, float]], bool]:
+    """Read a measurement if one is ready, then write the ambient pressure within the same submission.
+
+    The write follows the read so it never delays a reading. A failed write does not spoil the
+    reading, it is reported and repeated on the next cycle.
+    """
+    measurement = scd4x.measurement_if_ready()
+    try:
+        scd4x.set_ambient_pressure(ambient_pressure)
+    except I2cError as exception:
+        _LOGGER.debug(f"Unable to set ambient pressure: {exception!r}")
+        return measurement, False
+    return measurement, True
+
+
+def create_device(bus: I2cBusWorker, metrics: Metrics) -> Scd4xDevice:
+    """Create the device on the transport the bus was opened with."""
+    if isinstance(bus.transceiver, I2cRdwrTransceiver):
+        return NativeScd4xDevice(bus.transceiver, metrics)
+    return InstrumentedScd4xI2cDevice(bus.connection, metrics)
 
 
 class SCD4xAPI:
-    def __init__(self, i2cpath: str, altitude: Optional[int], temperature_offset: Optional[float]) -> None:
+    def __init__(self, i2cpath: str, altitude: Optional[int], temperature_offset: Optional[float],
+                 bus_manager: Optional[I2cBusManager] = None, mux_channel: Optional[MuxChannel] = None,
+                 transport: str = TRANSPORT_SENSIRION, pressure: Optional[PressureCompensation] = None,
+                 fleet: Optional[FleetScheduler] = None, mode: str = MEASUREMENT_MODE_PERIODIC,
+                 profiler: Optional[Profiler] = None) -> None:
         _LOGGER.info("Initializing SCD4x API")
         self._scd4x = None
-        self._i2c_connection = None
-        self._i2c_transceiver = None
+        self._bus_manager = bus_manager if bus_manager is not None else I2cBusManager()
+        self._bus: Optional[I2cBusWorker] = None
+        self._mux_channel = mux_channel
+        self._transport = transport
         self._connection_established = False
         self._i2cpath = i2cpath
         self._altitude = altitude
         self._temperature_offset = temperature_offset
+        self._pressure = pressure
+        self._fleet = fleet
+        self._profiler = profiler
+        self._mode = mode
+        self._scheduler = AcquisitionScheduler(measurement_interval(mode))
+        self._metrics = Metrics()
+        self._recovery = FaultRecovery([
+            RecoveryStep(RECOVERY_RETRY, None, RETRY_ATTEMPTS),
+            RecoveryStep(RECOVERY_REOPEN, self._async_reopen, REOPEN_ATTEMPTS),
+            RecoveryStep(RECOVERY_RESET, self._async_reset, RESET_ATTEMPTS),
+        ], self._metrics, deadline=RECOVERY_TIMEOUT)
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    @property
+    def scheduler(self) -> AcquisitionScheduler:
+        return self._scheduler
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def single_shot(self) -> bool:
+        """Whether every reading starts its own measurement."""
+        return self._mode in SINGLE_SHOT_MODES
+
+    @property
+    def recovery(self) -> FaultRecovery:
+        return self._recovery
+
+    @property
+    def pressure(self) -> Optional[PressureCompensation]:
+        return self._pressure
+
+    @pressure.setter
+    def pressure(self, pressure: Optional[PressureCompensation]) -> None:
+        self._pressure = pressure
+
+    @property
+    def bus(self) -> Optional[I2cBusWorker]:
+        return self._bus
+
+    def seconds_until_next_sample(self) -> float:
+        return self._scheduler.seconds_until_next_sample()
 
     async def async_initialize(self) -> int:
         async with async_timeout.timeout(TIMEOUT):
             _LOGGER.debug("Initialize API called.")
-            _LOGGER.debug("Creating i2c transceiver.")
-            self._i2c_transceiver = LinuxI2cTransceiver(self._i2cpath)
-            _LOGGER.debug("Try opening connection via i2c transceiver.")
-            self._i2c_transceiver.open()
+            _LOGGER.debug("Acquiring i2c bus.")
+            self._bus = await self._bus_manager.async_acquire(self._i2cpath, self._transport)
 
-            _LOGGER.debug("Creating i2c connection.")
-            self._i2c_connection = I2cConnection(self._i2c_transceiver)
             _LOGGER.debug("Creating scd4x i2c device.")
-            self._scd4x = Scd4xI2cDevice(self._i2c_connection)
+            self._scd4x = create_device(self._bus, self._metrics)
 
-            _LOGGER.debug("Stopping periodic measurements.")
-            await stop_periodic_measurement(self._scd4x)
-            await asyncio.sleep(1)
+            serial = await self._async_run(initialize_device, self._scd4x, self._altitude,
+                                           self._temperature_offset, self._metrics, self._mode)
+            self._scheduler.reset()
+            if self._pressure is not None:
+                self._pressure.invalidate()
 
-            _LOGGER.debug("Reading serial number.")
-            serial = await read_serial_number(self._scd4x)
-            _LOGGER.debug(f"Serial Number {serial}")
-
-            should_save = False
-
-            saved_altitude = await get_sensor_altitude(self._scd4x)
-            altitude = self._altitude if self._altitude is not None else 0
-            if altitude is not saved_altitude:
-                _LOGGER.debug(f"Setting altitude to {self._altitude}")
-                await set_sensor_altitude(self._scd4x, self._altitude)
-                should_save = True
-
-            saved_temperature_offset = get_temperature_offset(self._scd4x)
-            temperature_offset = self._temperature_offset if self._temperature_offset is not None else 4.0
-            if temperature_offset is not saved_temperature_offset:
-                _LOGGER.debug(f"Setting temperature offset to {self._temperature_offset}")
-                await set_temperature_offset(self._scd4x, self._temperature_offset)
-                should_save = True
+            self._connection_established = True
+            return serial
 
-            if should_save is True:
-                await persist_settings(self._scd4x)
+    async def async_probe(self) -> int:
+        """Return the serial number of the device without initializing it."""
+        bus = await self._bus_manager.async_acquire(self._i2cpath, self._transport)
+        try:
+            scd4x = create_device(bus, self._metrics)
+            return await bus.async_run(probe_device, scd4x, channel=self._mux_channel)
+        finally:
+            # Also after the probe timed out, when the close queues up behind the hung probe.
+            await self._async_release_bus(bus, PROBE_RELEASE_TIMEOUT)
+
+    async def async_update_settings(self, altitude: Optional[int], temperature_offset: Optional[float]) -> None:
+        """Write altitude and temperature offset to the running device if they changed."""
+        if altitude == self._altitude and temperature_offset == self._temperature_offset:
+            return
+        self._altitude = altitude
+        self._temperature_offset = temperature_offset
+        if not self._connection_established:
+            return
 
-            _LOGGER.debug("Reinitializing device.")
-            await reinit(self._scd4x)
-            await asyncio.sleep(5)
+        async with async_timeout.timeout(TIMEOUT):
+            changed = await self._async_run(update_device_settings, self._scd4x, altitude, temperature_offset,
+                                            self._mode)
+        _LOGGER.debug(f"Device settings {'updated' if changed else 'already up to date'}")
+        self._scheduler.reset()
 
-            await start_periodic_measurement(self._scd4x)
-            _LOGGER.debug("Starting periodic measurements.")
+    async def async_reset(self) -> None:
+        """Soft reset the device, which drops settings that were not persisted, e.g. the ambient pressure."""
+        if self._connection_established:
+            async with async_timeout.timeout(TIMEOUT):
+                await self._async_reset()
 
-            await asyncio.sleep(1)
+    async def async_stop(self) -> None:
+        await self.async_stop_measurement()
+        await self.async_release()
 
-            self._connection_established = True
-            return serial
+    async def async_stop_measurement(self) -> None:
+        """Stop the periodic measurement, giving up after STOP_TIMEOUT on a hung bus."""
+        self._connection_established = False
+        # An idle device finishes a single shot in progress on its own.
+        if self._scd4x is None or self._bus is None or self.single_shot:
+            return
+
+        _LOGGER.debug("Stop API called.")
+        try:
+            async with async_timeout.timeout(STOP_TIMEOUT):
+                # Not within the cap of the fleet, the stops of a hung bus would hold the permits of the others.
+                await self._bus.async_run(self._scd4x.send_stop_periodic_measurement, channel=self._mux_channel)
+        except Exception as exception:
+            _LOGGER.warning(f"Unable to stop SCD4x periodic measurements: {exception!r}"
+                            f"\r\n{traceback.format_exception(exception)}")
+
+    async def async_release(self) -> None:
+        """Release the bus, closing the transceiver if no other device uses it, within RELEASE_TIMEOUT."""
+        bus, self._bus = self._bus, None
+        self._connection_established = False
+        if bus is not None:
+            await self._async_release_bus(bus, RELEASE_TIMEOUT)
 
-    async def async_stop(self) -> None:
-        async with async_timeout.timeout(TIMEOUT):
-            _LOGGER.debug("Stop API called.")
-            try:
-                if self._scd4x is not None:
-                    await stop_periodic_measurement(self._scd4x)
-            except Exception as exception:
-                _LOGGER.warning(f"Unable to stop SCD4x periodic measurements: {exception}"
-                                f"\r\n{traceback.format_exception(exception)}")
-            try:
-                if self._i2c_transceiver is not None:
-                    self._i2c_transceiver.close()
-            except Exception as exception:
-                _LOGGER.warning(f"Unable to close i2c transceiver: {exception}"
-                                f"\r\n{traceback.format_exception(exception)}")
-            finally:
-                self._connection_established = False
+    async def _async_release_bus(self, bus: I2cBusWorker, timeout: float) -> None:
+        try:
+            async with async_timeout.timeout(timeout):
+                await self._bus_manager.async_release(bus)
+        except Exception as exception:
+            _LOGGER.warning(f"Unable to close i2c transceiver: {exception!r}"
+                            f"\r\n{traceback.format_exception(exception)}")
 
     async def async_read_data(self) -> Optional[tuple[float, float, float]]:
         if not self._connection_established:
             return None
 
-        async with async_timeout.timeout(TIMEOUT):
-
-            while not await get_data_ready_status(self._scd4x):
-                await asyncio.sleep(0.2)
-
-            _LOGGER.debug("Data ready, getting data")
-            co2, temp, humidity = await read_measurement(self._scd4x)
-            _LOGGER.debug(f"Data available: {co2.co2};{temp.degrees_celsius};{humidity.percent_rh}")
-            return co2.co2, temp.degrees_celsius, humidity.percent_rh
+        try:
+            return await self._async_read_measurement()
+        except (I2cError, I2cMuxError) as exception:
+            # Transient CRC errors and NACKs are most likely gone on the next attempt.
+            return await self._recovery.async_recover(self._async_read_measurement, exception, RECOVERY_RETRY)
+        except asyncio.TimeoutError as exception:
+            # The bus works, but no data arrives: the device lost its state, e.g. after a brownout.
+            return await self._recovery.async_recover(self._async_read_measurement, exception, RECOVERY_RESET)
+
+    async def _async_run(self, method: Callable[..., _T], *args, batched: bool = False) -> _T:
+        """Run a device operation on the bus worker, within the cap on operations in flight of the fleet.
+
+        Reads are only batched without a fleet. The fleet spreads the reads of all entries over the
+        interval, so a batch window would find nothing to coalesce and hold a permit while it waits.
+        """
+        if self._profiler is not None:
+            method = self._profiler.job(method)
+        if self._fleet is None:
+            run = self._bus.async_run_batched if batched else self._bus.async_run
+            return await run(method, *args, channel=self._mux_channel)
+        async with self._fleet.operation():
+            return await self._bus.async_run(method, *args, channel=self._mux_channel)
+
+    async def _async_reopen(self) -> None:
+        await self._bus.async_reopen()
+
+    async def _async_reset(self) -> None:
+        await self._async_run(reset_device, self._scd4x, self._metrics, self._mode)
+        self._scheduler.reset()
+        if self._pressure is not None:
+            # The reinit reloaded the settings from EEPROM, without the ambient pressure.
+            self._pressure.invalidate()
+
+    async def _async_read_measurement(self) -> tuple[float, float, float]:
+        async with async_timeout.timeout(READ_TIMEOUT_INTERVALS * self._scheduler.interval):
+            if self.single_shot:
+                await self._async_run(self._scd4x.measure_single_shot)
+                self._scheduler.trigger()
+            co2, temp, humidity = await self._scheduler.async_acquire(self._async_read_if_ready)
+            self._metrics.record(METRIC_DATA_READY_WAIT, self._scheduler.last_wait)
+            if self._scheduler.last_polls > 1:
+                self._metrics.increment(METRIC_DATA_READY_RETRIES, self._scheduler.last_polls - 1)
+            _LOGGER.debug(f"Data ready after {self._scheduler.last_wait:.3f}s and "
+                          f"{self._scheduler.last_polls} polls")
+            _LOGGER.debug(f"Data available: {co2};{temp};{humidity}")
+            return co2, temp, humidity
+
+    async def _async_read_if_ready(self) -> Optional[tuple[float, float, float]]:
+        ambient_pressure = self._pressure.pending(time.monotonic()) if self._pressure is not None else None
+        if ambient_pressure is None:
+            return await self._async_run(read_measurement_if_ready, self._scd4x, batched=True)
+
+        measurement, written = await self._async_run(read_measurement_and_compensate, self._scd4x, ambient_pressure,
+                                                     batched=True)
+        if written:
+            _LOGGER.debug(f"Ambient pressure set to {ambient_pressure} hPa")
+            self._pressure.confirm(ambient_pressure, time.monotonic())
+            self._metrics.increment(METRIC_PRESSURE_WRITES)
+        else:
+            self._metrics.increment(METRIC_PRESSURE_WRITE_FAILURES)
+        return measurement
@@ -1,5 +1,6 @@
 """Sensor platform for scd4x_gpio_integration."""
 import logging
+from typing import Callable, Optional
 
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -11,8 +12,10 @@ from homeassistant.const import (
     TEMP_CELSIUS,
     CONCENTRATION_PARTS_PER_MILLION,
     PERCENTAGE,
+    EntityCategory,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -22,9 +25,45 @@ from .const import (
     DOMAIN,
     TEMP_KEY,
     CO2_KEY,
-    HUMIDITY_KEY, CONF_SERIAL, HUMIDITY_ICON, CO2_ICON, CONF_DEVICE_NAME,
+    HUMIDITY_KEY, CONF_SERIAL, HUMIDITY_ICON, CO2_ICON, CONF_DEVICE_NAME, UPDATE_TIME_KEY, DATA_READY_WAIT_KEY,
+    CRC_ERRORS_KEY, I2C_ERRORS_KEY, LATENCY_ICON, ERROR_ICON, SUPPRESSED_WRITES_KEY, SUPPRESSED_ICON, STATISTICS_KEY,
+    RECOVERIES_KEY, CONF_DERIVED_SENSORS, DEW_POINT_KEY, ABSOLUTE_HUMIDITY_KEY, CO2_RATE_KEY, DEW_POINT_ICON,
+    ABSOLUTE_HUMIDITY_ICON, CO2_RATE_ICON, ABSOLUTE_HUMIDITY_UNIT, CO2_RATE_UNIT,
 )
 from .entity import SCD4XEntity
+from .metrics import (
+    Metrics, METRIC_UPDATE, METRIC_DATA_READY_WAIT, METRIC_CRC_ERRORS, METRIC_I2C_ERRORS,
+    METRIC_STATE_WRITES_SUPPRESSED, METRIC_RECOVERIES,
+)
+
+
+def _last_milliseconds(name: str) -> Callable[[Metrics], Optional[float]]:
+    def value(metrics: Metrics) -> Optional[float]:
+        histogram = metrics.histogram(name)
+        return round(histogram.last * 1000, 1) if histogram is not None else None
+    return value
+
+
+def _counter(name: str) -> Callable[[Metrics], Optional[float]]:
+    return lambda metrics: metrics.counters.get(name, 0)
+
+
+# key, unit, icon, value
+DIAGNOSTIC_SENSORS = [
+    (UPDATE_TIME_KEY, UnitOfTime.MILLISECONDS, LATENCY_ICON, _last_milliseconds(METRIC_UPDATE)),
+    (DATA_READY_WAIT_KEY, UnitOfTime.MILLISECONDS, LATENCY_ICON, _last_milliseconds(METRIC_DATA_READY_WAIT)),
+    (CRC_ERRORS_KEY, None, ERROR_ICON, _counter(METRIC_CRC_ERRORS)),
+    (I2C_ERRORS_KEY, None, ERROR_ICON, _counter(METRIC_I2C_ERRORS)),
+    (SUPPRESSED_WRITES_KEY, None, SUPPRESSED_ICON, _counter(METRIC_STATE_WRITES_SUPPRESSED)),
+    (RECOVERIES_KEY, None, ERROR_ICON, _counter(METRIC_RECOVERIES)),
+]
+
+# key, device class, unit, icon
+DERIVED_SENSORS = [
+    (DEW_POINT_KEY, SensorDeviceClass.TEMPERATURE, TEMP_CELSIUS, DEW_POINT_ICON),
+    (ABSOLUTE_HUMIDITY_KEY, None, ABSOLUTE_HUMIDITY_UNIT, ABSOLUTE_HUMIDITY_ICON),
+    (CO2_RATE_KEY, None, CO2_RATE_UNIT, CO2_RATE_ICON),
+]
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -69,10 +108,21 @@ async def async_setup_entry(
         ),
     ]
 
+    if entry.data.get(CONF_DERIVED_SENSORS, False):
+        sensors.extend(
+            Scd4xSensor(hass, coordinator, entry, key, entry.data.get(CONF_DEVICE_NAME), device_class, unit, icon)
+            for key, device_class, unit, icon in DERIVED_SENSORS
+        )
+
     _LOGGER.debug(sensors[0].device_info)
     _LOGGER.debug(sensors[1].device_info)
     _LOGGER.debug(sensors[2].device_info)
 
+    sensors.extend(
+        Scd4xDiagnosticSensor(hass, coordinator, entry, key, entry.data.get(CONF_DEVICE_NAME), unit, icon, value)
+        for key, unit, icon, value in DIAGNOSTIC_SENSORS
+    )
+
     async_add_entities(sensors)
 
 
@@ -97,8 +147,19 @@ class Scd4xSensor(SCD4XEntity, SensorEntity):
         self._serial = self.config_entry.data[CONF_SERIAL]
         self._icon = icon
         self._name = name
+        self._last_available: Optional[bool] = None
         self.entity_id = generate_entity_id("sensor.{}", "{0}_{1}".format(name, key), hass=hass)
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if availability changed or the value left the deadband."""
+        available = self.available
+        if available == self._last_available and (
+                not available or not self.coordinator.async_should_write_state(self._key, self.native_value)):
+            return
+        self._last_available = available
+        self.async_write_ha_state()
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -114,6 +175,13 @@ class Scd4xSensor(SCD4XEntity, SensorEntity):
         """Return the native value of the sensor."""
         return self.coordinator.data[self._key]
 
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes, including mean, min and max of the raw readings since the last update."""
+        attributes = super().extra_state_attributes
+        attributes.update(self.coordinator.data.get(STATISTICS_KEY, {}).get(self._key, {}))
+        return attributes
+
     @property
     def icon(self):
         """Return the icon of the sensor."""
@@ -130,3 +198,63 @@ class Scd4xSensor(SCD4XEntity, SensorEntity):
     @property
     def device_class(self):
         return self._device_class
+
+
+class Scd4xDiagnosticSensor(SCD4XEntity, SensorEntity):
+    """scd4x_gpio_integration diagnostic sensor exposing the integration's own metrics."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+            self,
+            hass,
+            coordinator,
+            config_entry,
+            key: str,
+            name: str,
+            unit_of_measurement: Optional[str],
+            icon: str,
+            value: Callable[[Metrics], Optional[float]],
+    ):
+        super().__init__(coordinator, config_entry)
+        self._key = key
+        self._unit_of_measurement = unit_of_measurement
+        self._icon = icon
+        self._name = name
+        self._value = value
+        self.entity_id = generate_entity_id("sensor.{}", "{0}_{1}".format(name, key), hass=hass)
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} {self._key}"
+
+    @property
+    def unique_id(self):
+        """Return a unique ID to use for this entity."""
+        return f"{self._serial}_{self._key}"
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        return self._value(self.coordinator.metrics)
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return self._icon
+
+    @property
+    def state_class(self) -> SensorStateClass | str | None:
+        if self._unit_of_measurement is None:
+            return SensorStateClass.TOTAL_INCREASING
+        return SensorStateClass.MEASUREMENT
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        return self._unit_of_measurement
+
+    @property
+    def device_class(self):
+        return SensorDeviceClass.DURATION if self._unit_of_measurement is not None else None
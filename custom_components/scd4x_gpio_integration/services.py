@@ -0,0 +1,76 @@
+"""Services of scd4x_gpio_integration."""
+import logging
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+
+from .const import (DOMAIN, SERVICE_EXPORT_SAMPLES, ATTR_CONFIG_ENTRY_ID, ATTR_FILENAME, ATTR_FORMAT, ATTR_SINCE,
+                    SERVICE_PROFILE, ATTR_DURATION, DEFAULT_PROFILE_DURATION, MAX_PROFILE_DURATION,
+                    DEFAULT_PROFILE_FILENAME, DATA_PROFILER)
+from .export import EXPORT_FORMAT_COLUMNAR, EXPORT_WRITERS, async_export_samples
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+EXPORT_SAMPLES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Required(ATTR_FILENAME): cv.string,
+    vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_COLUMNAR): vol.In(list(EXPORT_WRITERS)),
+    vol.Optional(ATTR_SINCE): cv.datetime,
+})
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION):
+        vol.All(vol.Coerce(float), vol.Range(min=1, max=MAX_PROFILE_DURATION)),
+    vol.Optional(ATTR_FILENAME, default=DEFAULT_PROFILE_FILENAME): cv.string,
+})
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_export(call: ServiceCall) -> ServiceResponse:
+        entry = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+        coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id) if entry and entry.domain == DOMAIN else None
+        if coordinator is None:
+            raise HomeAssistantError(f"No loaded SCD4x sensor with config entry {call.data[ATTR_CONFIG_ENTRY_ID]}")
+
+        filename = hass.config.path(call.data[ATTR_FILENAME])
+        if not hass.config.is_allowed_path(filename):
+            raise HomeAssistantError(f"Writing to {filename} is not allowed")
+
+        since = call.data.get(ATTR_SINCE)
+        if since is not None:
+            since = dt_util.as_utc(since).timestamp()
+
+        _LOGGER.debug(f"Exporting samples to {filename} as {call.data[ATTR_FORMAT]}")
+        written = await async_export_samples(hass, coordinator.samples, filename, call.data[ATTR_FORMAT], since)
+        _LOGGER.info(f"Exported {written} samples to {filename}")
+        return {"samples": written, "filename": filename}
+
+    async def async_profile_updates(call: ServiceCall) -> ServiceResponse:
+        # cProfile, pstats and tracemalloc are only needed once someone asks for a profile.
+        from .profiling import async_profile  # pylint: disable=import-outside-toplevel
+
+        profiler = hass.data.get(DOMAIN, {}).get(DATA_PROFILER)
+        if profiler is not None and profiler.active:
+            raise HomeAssistantError("A profile is already running")
+
+        path = hass.config.path(call.data[ATTR_FILENAME])
+        if not hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Writing to {path} is not allowed")
+
+        try:
+            summary = await async_profile(hass, call.data[ATTR_DURATION], path)
+        except ValueError as exception:
+            # cProfile refuses to run along with another profiler of the event loop thread.
+            raise HomeAssistantError(f"Unable to profile: {exception}") from exception
+        _LOGGER.info(f"Wrote profile to {', '.join(summary['files'])}")
+        return summary
+
+    hass.services.async_register(DOMAIN, SERVICE_EXPORT_SAMPLES, async_export, schema=EXPORT_SAMPLES_SCHEMA,
+                                 supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_profile_updates, schema=PROFILE_SCHEMA,
+                                 supports_response=SupportsResponse.OPTIONAL)
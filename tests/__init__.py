@@ -0,0 +1 @@
+"""Tests of scd4x_gpio_integration."""
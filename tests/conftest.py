@@ -0,0 +1,42 @@
+"""Fixtures of the scd4x_gpio_integration tests."""
+import threading
+
+import pytest
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager
+from custom_components.scd4x_gpio_integration.const import DOMAIN, DATA_BUS_MANAGER
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+# Seconds to wait for the bus worker threads to end after a test.
+WORKER_JOIN_TIMEOUT = 5.0
+
+
+@pytest.fixture(autouse=True)
+def join_bus_workers():
+    """Wait for the bus worker threads, closing a worker does not wait for its thread to end."""
+    yield
+    for thread in threading.enumerate():
+        if thread.name.startswith("scd4x_i2c"):
+            thread.join(WORKER_JOIN_TIMEOUT)
+
+
+@pytest.fixture
+def bus() -> SimulatedI2cBus:
+    return SimulatedI2cBus(seed=1)
+
+
+@pytest.fixture
+def device(bus: SimulatedI2cBus) -> SimulatedScd4x:
+    device = SimulatedScd4x(interval=0.2)
+    bus.add_device(device)
+    return device
+
+
+@pytest.fixture
+def bus_manager(hass, bus: SimulatedI2cBus) -> I2cBusManager:
+    """Bus manager of hass serving every path from the simulated bus."""
+    manager = I2cBusManager(lambda path: bus)
+    hass.data[DOMAIN] = {DATA_BUS_MANAGER: manager}
+    return manager
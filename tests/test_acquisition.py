@@ -0,0 +1,122 @@
+"""Reads scheduled after the expected sample of the sensor, and the interval between single shots."""
+import math
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from custom_components.scd4x_gpio_integration import acquisition
+from custom_components.scd4x_gpio_integration.acquisition import (
+    ADAPTIVE_MIN_INTERVAL, ADAPTIVE_RATE_WINDOW, INITIAL_POLL_DELAY, MAX_POLL_DELAY, READY_MARGIN, RESYNC_EVERY,
+    RESYNC_LEAD, AcquisitionScheduler, SingleShotSampling,
+)
+
+INTERVAL = 5.0
+
+
+class SensorClock:
+    """A sensor taking a sample every period from phase, on a fake clock advanced by the sleeps."""
+
+    def __init__(self, phase: float, period: float = INTERVAL) -> None:
+        self.now = 0.0
+        self.phase = phase
+        self.period = period
+        self.read_sample = -1
+
+    def latest_sample(self) -> int:
+        return math.floor((self.now - self.phase) / self.period)
+
+    async def sleep(self, delay: float) -> None:
+        self.now += delay
+
+    async def try_read(self) -> Optional[float]:
+        sample = self.latest_sample()
+        if sample <= self.read_sample:
+            return None
+        self.read_sample = sample
+        return self.phase + sample * self.period
+
+
+@pytest.fixture
+def sensor(monkeypatch) -> SensorClock:
+    sensor = SensorClock(phase=2.3)
+    monkeypatch.setattr(acquisition, "asyncio", SimpleNamespace(sleep=sensor.sleep))
+    return sensor
+
+
+async def test_phase_learned(sensor) -> None:
+    """The first read polls for the sample, later ones wake after it and find data ready."""
+    scheduler = AcquisitionScheduler(INTERVAL, clock=lambda: sensor.now)
+    assert await scheduler.async_acquire(sensor.try_read) == sensor.phase
+    assert scheduler.last_polls > 1
+
+    polled = 0
+    for _ in range(4 * RESYNC_EVERY):
+        sample = await scheduler.async_acquire(sensor.try_read)
+        assert sensor.now - sample < RESYNC_LEAD
+        assert scheduler.last_wait == pytest.approx(INTERVAL, abs=RESYNC_LEAD)
+        polled += scheduler.last_polls > 1
+    # Only the early wakes that check the phase poll more than once.
+    assert polled <= 4
+
+
+async def test_poll_backoff_bounded(sensor) -> None:
+    """A sample long overdue is polled for with doubling delays up to MAX_POLL_DELAY."""
+    scheduler = AcquisitionScheduler(INTERVAL, clock=lambda: sensor.now)
+    sensor.read_sample = sensor.latest_sample()
+    sensor.phase = 20.0
+    await scheduler.async_acquire(sensor.try_read)
+    delays = [min(INITIAL_POLL_DELAY * 2 ** poll, MAX_POLL_DELAY) for poll in range(scheduler.last_polls - 1)]
+    assert sensor.now == pytest.approx(sum(delays))
+    assert sensor.now - 20.0 < MAX_POLL_DELAY
+
+
+async def test_fast_sensor_clock(sensor) -> None:
+    """A sensor clock running faster than ours is caught by the periodic early wake."""
+    sensor.period = INTERVAL - RESYNC_LEAD / RESYNC_EVERY / 2
+    scheduler = AcquisitionScheduler(INTERVAL, clock=lambda: sensor.now)
+    for _ in range(200):
+        sample = await scheduler.async_acquire(sensor.try_read)
+        assert sensor.now - sample < MAX_POLL_DELAY
+    assert scheduler.total_polls / scheduler.readings < 1.5
+
+
+async def test_single_shot_trigger(sensor) -> None:
+    """A triggered shot is expected one interval later, and reset forgets the phase."""
+    scheduler = AcquisitionScheduler(INTERVAL, clock=lambda: sensor.now)
+    sensor.now = 10.0
+    scheduler.trigger()
+    assert scheduler.next_wake() == pytest.approx(10.0 + INTERVAL + READY_MARGIN)
+    assert scheduler.seconds_until_next_sample() == pytest.approx(INTERVAL + READY_MARGIN)
+    scheduler.interval = 30.0
+    assert scheduler.next_wake() == 10.0
+
+
+def test_single_shot_fixed() -> None:
+    sampling = SingleShotSampling(60.0)
+    for index in range(5):
+        assert sampling.add(400.0 + 100 * index, 60.0 * index) == 60.0
+    assert not sampling.fast and sampling.shots == 5
+
+
+def test_single_shot_adaptive() -> None:
+    """Fast changes drop to the shortest interval, which then doubles per shot back to the configured one."""
+    sampling = SingleShotSampling(2 * ADAPTIVE_RATE_WINDOW, adaptive=True)
+    timestamp = 0.0
+    intervals = []
+    for co2 in (400.0, 400.0, 600.0, 800.0, 1000.0):
+        intervals.append(sampling.add(co2, timestamp))
+        timestamp += intervals[-1]
+    # Even shots further apart than the trend window see the trend of the last two.
+    assert intervals == [2 * ADAPTIVE_RATE_WINDOW] * 2 + [ADAPTIVE_MIN_INTERVAL] * 3
+    assert sampling.fast and sampling.fast_shots == 3
+
+    intervals = []
+    while sampling.fast:
+        intervals.append(sampling.add(1000.0, timestamp))
+        timestamp += intervals[-1]
+    assert intervals[-5:] == [ADAPTIVE_MIN_INTERVAL * 2 ** power for power in range(1, 5)] + [2 * ADAPTIVE_RATE_WINDOW]
+
+    sampling.configure(60.0)
+    assert sampling.interval == 60.0 and sampling.max_interval == 60.0
+    assert not sampling.fast
@@ -0,0 +1,110 @@
+"""I2C bus workers and the sharing of one bus by the sensors behind a multiplexer."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.bus_sharing import MUX_ADDRESS, SENSORS, create_bus
+from benchmarks.simulator import SimulatedI2cBus
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, I2cBusWorker, MuxChannel
+from custom_components.scd4x_gpio_integration.metrics import Metrics
+from custom_components.scd4x_gpio_integration.scd4x_api import create_device, read_measurement_if_ready
+
+CYCLES = 5
+
+
+async def test_shared_bus_behind_mux() -> None:
+    """Entries on one path share a worker, which serializes their channel selects and reads."""
+    bus = create_bus()
+    manager = I2cBusManager(lambda path: bus)
+    channels = [MuxChannel(MUX_ADDRESS, channel) for channel in range(SENSORS)]
+    workers = [await manager.async_acquire("/dev/i2c-1") for _ in channels]
+    assert len(set(workers)) == 1
+    devices = [create_device(worker, Metrics()) for worker in workers]
+
+    try:
+        for _ in range(CYCLES):
+            results = await asyncio.gather(*[
+                worker.async_run_batched(read_measurement_if_ready, device, channel=channel)
+                for worker, device, channel in zip(workers, devices, channels)
+            ])
+            assert [result[0] for result in results] == [400 + channel.channel for channel in channels]
+    finally:
+        for worker in workers:
+            await manager.async_release(worker)
+
+    assert bus.interleaved == 0
+    assert bus.channel_switches <= CYCLES * SENSORS
+
+
+async def test_worker_serializes_off_the_loop(bus) -> None:
+    """Operations run one at a time on the thread of the worker, never on the event loop."""
+    worker = I2cBusWorker("/dev/i2c-1", lambda path: bus)
+    await worker.async_open()
+    running = []
+    overlaps = []
+
+    def operation() -> str:
+        running.append(None)
+        overlaps.append(len(running) > 1)
+        time.sleep(0.01)
+        running.pop()
+        return threading.current_thread().name
+
+    try:
+        names = await asyncio.gather(*[worker.async_run(operation) for _ in range(5)])
+    finally:
+        await worker.async_close()
+
+    assert threading.current_thread().name not in names
+    assert all(name.startswith("scd4x_i2c_dev_i2c-1") for name in names)
+    assert len(set(names)) == 1
+    assert not any(overlaps)
+    assert worker.submissions == 5 + 2
+
+
+async def test_manager_references() -> None:
+    """A path keeps its worker until the last user released it."""
+    buses = []
+
+    def transceiver_factory(path: str) -> SimulatedI2cBus:
+        buses.append(SimulatedI2cBus())
+        return buses[-1]
+
+    manager = I2cBusManager(transceiver_factory)
+    first = await manager.async_acquire("/dev/i2c-1")
+    second = await manager.async_acquire("/dev/i2c-1")
+    other = await manager.async_acquire("/dev/i2c-2")
+    assert first is second and first is not other
+    assert len(buses) == 2
+
+    await manager.async_release(first)
+    assert manager.workers["/dev/i2c-1"] is first and first.connection is not None
+    await manager.async_release(second)
+    await manager.async_release(second)
+    assert "/dev/i2c-1" not in manager.workers and first.connection is None
+    assert manager.workers["/dev/i2c-2"] is other
+    await manager.async_release(other)
+
+
+async def test_failed_open_closes_worker() -> None:
+    def transceiver_factory(path: str) -> SimulatedI2cBus:
+        raise OSError(f"No such device {path}")
+
+    manager = I2cBusManager(transceiver_factory)
+    with pytest.raises(OSError):
+        await manager.async_acquire("/dev/i2c-9")
+    assert not manager.workers
+
+
+async def test_reopen_coalesced(bus) -> None:
+    """Devices failing together on one bus reopen its transceiver once."""
+    worker = I2cBusWorker("/dev/i2c-1", lambda path: bus)
+    await worker.async_open()
+    try:
+        await asyncio.gather(*[worker.async_reopen() for _ in range(4)])
+    finally:
+        await worker.async_close()
+    assert worker.reopens == 1
+    assert bus.opens == 2
@@ -0,0 +1,52 @@
+"""Averaging of the readings in SCD4XDataUpdateCoordinator."""
+import time
+
+from custom_components.scd4x_gpio_integration.const import (
+    CO2_KEY, AVERAGE_MODE_EMA, AVERAGE_MODE_SAMPLES, FILTER_MODE_HAMPEL,
+)
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator
+
+READINGS = 40
+
+
+def _coordinator(hass, mode: str, window: int, **kwargs) -> SCD4XDataUpdateCoordinator:
+    """Coordinator which took READINGS readings at its regular interval, CO2 counting up from 400."""
+    coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, window, None, mode, **kwargs)
+    start = time.time() - (READINGS - 1) * coordinator.sample_interval
+    for index in range(READINGS):
+        timestamp = start + index * coordinator.sample_interval
+        coordinator._record_sample(timestamp, (400.0 + index, 21.0, 40.0))  # pylint: disable=protected-access
+    return coordinator
+
+
+def _co2(coordinator: SCD4XDataUpdateCoordinator) -> list[float]:
+    return [value for _, value in coordinator._averages[CO2_KEY]]  # pylint: disable=protected-access
+
+
+async def test_enlarge_window(hass) -> None:
+    """A larger window is filled with the buffered readings the smaller one had already dropped."""
+    coordinator = _coordinator(hass, AVERAGE_MODE_SAMPLES, 5)
+    assert _co2(coordinator) == [435.0, 436.0, 437.0, 438.0, 439.0]
+
+    await coordinator.async_set_averaging(AVERAGE_MODE_SAMPLES, 20)
+    assert _co2(coordinator) == [420.0 + index for index in range(20)]
+    assert len(coordinator._co2_slope) == 20  # pylint: disable=protected-access
+
+
+async def test_from_ema(hass) -> None:
+    """Switching from the exponential average, which keeps a single value, restores the window."""
+    coordinator = _coordinator(hass, AVERAGE_MODE_EMA, 5)
+    await coordinator.async_set_averaging(AVERAGE_MODE_SAMPLES, 10)
+    assert _co2(coordinator) == [430.0 + index for index in range(10)]
+
+
+async def test_refiltered(hass) -> None:
+    """Rebuilt averages hold the filtered readings, not the raw spikes of the buffer."""
+    coordinator = _coordinator(hass, AVERAGE_MODE_SAMPLES, 5, filter_mode=FILTER_MODE_HAMPEL,
+                               filters={CO2_KEY: (7, 3.0)})
+    coordinator._record_sample(time.time(), (5000.0, 21.0, 40.0))  # pylint: disable=protected-access
+    assert max(_co2(coordinator)) < 5000.0
+
+    await coordinator.async_set_averaging(AVERAGE_MODE_SAMPLES, 30)
+    assert len(_co2(coordinator)) == 30
+    assert max(_co2(coordinator)) < 5000.0
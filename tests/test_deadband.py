@@ -0,0 +1,48 @@
+"""Suppression of state writes inside the deadband of a channel."""
+from custom_components.scd4x_gpio_integration.const import CO2_KEY, HUMIDITY_KEY
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator
+from custom_components.scd4x_gpio_integration.deadband import DeadbandFilter
+from custom_components.scd4x_gpio_integration.metrics import METRIC_STATE_WRITES, METRIC_STATE_WRITES_SUPPRESSED
+
+MAX_SILENCE = 60.0
+
+
+def test_deadband() -> None:
+    """Values are compared against the last published one, so a slow drift is still published."""
+    deadband = DeadbandFilter(5.0)
+    published = [value for value in (400.0, 403.0, 406.0, 409.0, 411.5, 408.0, 407.0)
+                 if deadband.should_publish(value, 0.0)]
+    assert published == [400.0, 406.0, 411.5]
+    assert (deadband.published, deadband.suppressed) == (3, 4)
+
+
+def test_max_silence() -> None:
+    deadband = DeadbandFilter(5.0, MAX_SILENCE)
+    assert deadband.should_publish(400.0, 0.0)
+    assert not deadband.should_publish(400.0, MAX_SILENCE - 1)
+    assert deadband.should_publish(400.0, MAX_SILENCE)
+    assert not deadband.should_publish(400.0, 2 * MAX_SILENCE - 1)
+
+
+def test_unknown_always_published() -> None:
+    """A missing value, and the first value after it, are always published."""
+    deadband = DeadbandFilter(5.0)
+    assert deadband.should_publish(400.0, 0.0)
+    assert deadband.should_publish(None, 1.0)
+    assert deadband.should_publish(400.0, 2.0)
+    deadband.reset()
+    assert deadband.should_publish(400.0, 3.0)
+
+
+async def test_coordinator_counts_writes(hass) -> None:
+    coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 5, None, deadbands={CO2_KEY: 10.0})
+    for value in (400.0, 405.0, 415.0):
+        coordinator.async_should_write_state(CO2_KEY, value)
+    assert coordinator.async_should_write_state(HUMIDITY_KEY, 40.0)
+    assert coordinator.metrics.counters[METRIC_STATE_WRITES] == 3
+    assert coordinator.metrics.counters[METRIC_STATE_WRITES_SUPPRESSED] == 1
+
+    # Changed options keep the last published value.
+    coordinator.set_deadbands({CO2_KEY: 20.0}, MAX_SILENCE)
+    assert not coordinator.async_should_write_state(CO2_KEY, 430.0)
+    assert coordinator.async_should_write_state(CO2_KEY, 436.0)
@@ -0,0 +1,68 @@
+"""Values derived from the readings."""
+import random
+import statistics
+
+import pytest
+
+from custom_components.scd4x_gpio_integration.derived import (
+    KELVIN, RESUM_INTERVAL, IncrementalSlope, absolute_humidity, dew_point,
+)
+
+
+@pytest.mark.parametrize("temperature, humidity, expected", [(20.0, 50.0, 9.26), (25.0, 80.0, 21.31)])
+def test_dew_point(temperature, humidity, expected) -> None:
+    assert dew_point(temperature, humidity) == pytest.approx(expected, abs=0.01)
+
+
+@pytest.mark.parametrize("temperature, humidity", [(0.0, 30.0), (-10.0, 70.0), (35.0, 15.0)])
+def test_dew_point_saturates(temperature, humidity) -> None:
+    """Cooled to the dew point the same amount of water vapour saturates the air."""
+    point = dew_point(temperature, humidity)
+    assert point < temperature
+    assert absolute_humidity(point, 100.0) * (KELVIN + point) == pytest.approx(
+        absolute_humidity(temperature, humidity) * (KELVIN + temperature))
+
+
+def test_dew_point_saturated() -> None:
+    assert dew_point(21.5, 100.0) == pytest.approx(21.5)
+    assert dew_point(21.5, 0.0) is None
+
+
+@pytest.mark.parametrize("temperature, humidity, expected", [(20.0, 50.0, 8.65), (30.0, 100.0, 30.36)])
+def test_absolute_humidity(temperature, humidity, expected) -> None:
+    """Within the 0.35 % the Magnus formula deviates from the tables."""
+    assert absolute_humidity(temperature, humidity) == pytest.approx(expected, rel=0.0035)
+
+
+def test_slope_matches_regression() -> None:
+    rng = random.Random(1)
+    slope = IncrementalSlope(20)
+    times, values = [], []
+    for index in range(50):
+        timestamp = 1700000000.0 + 5 * index + rng.uniform(-1, 1)
+        value = 400.0 + 0.2 * index + rng.gauss(0, 3)
+        slope.add(value, timestamp)
+        times.append(timestamp)
+        values.append(value)
+        if index:
+            expected = statistics.linear_regression(times[-20:], values[-20:]).slope
+            assert slope.slope == pytest.approx(expected, rel=1e-6)
+
+
+def test_slope_window_seconds() -> None:
+    """Samples older than the window no longer count."""
+    slope = IncrementalSlope(100, window_seconds=30.0)
+    for timestamp in range(0, 60, 5):
+        slope.add(0.0 if timestamp < 30 else float(timestamp), float(timestamp))
+    assert [timestamp for timestamp, _ in slope] == [30.0, 35.0, 40.0, 45.0, 50.0, 55.0]
+    assert slope.slope == pytest.approx(1.0)
+    assert IncrementalSlope(5).slope is None
+
+
+def test_slope_rebased() -> None:
+    """Moving the origin with the window keeps the sums exact over many additions."""
+    slope = IncrementalSlope(10)
+    for index in range(RESUM_INTERVAL + 5):
+        slope.add(400.0 + 0.5 * index, 1700000000.0 + index)
+    assert slope.slope == pytest.approx(0.5, rel=1e-9)
+    assert [timestamp for timestamp, _ in slope][-1] == 1700000000.0 + RESUM_INTERVAL + 4
@@ -0,0 +1,77 @@
+"""Discovery of SCD4x sensors on the I2C buses."""
+import threading
+import time
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.simulator import CMD_START_LOW_POWER_PERIODIC_MEASUREMENT, SimulatedI2cBus, SimulatedScd4x
+from custom_components.scd4x_gpio_integration import discovery, scd4x_api
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel
+from custom_components.scd4x_gpio_integration.const import (
+    DOMAIN, DATA_BUS_MANAGER, CONF_I2C, CONF_MUX_ADDRESS, CONF_MUX_CHANNEL,
+)
+from custom_components.scd4x_gpio_integration.discovery import async_discover, async_probe
+
+MUX_ADDRESS = 0x70
+PROBE_TIMEOUT = 0.2
+
+
+class HungI2cBus(SimulatedI2cBus):
+    """Bus whose transactions do not return until released, like a device holding the clock low."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.released = threading.Event()
+
+    def transceive(self, slave_address, tx_data, rx_length, read_delay, timeout):
+        self.released.wait()
+        return super().transceive(slave_address, tx_data, rx_length, read_delay, timeout)
+
+
+async def test_probe_mux_failure(hass, bus, device, bus_manager) -> None:
+    """A multiplexer that does not answer means no sensor, not an error of the flow."""
+    bus.wedge()
+    assert await async_probe(hass, "/dev/i2c-1", MuxChannel(MUX_ADDRESS, 0)) is None
+
+
+async def test_discover_skips_configured_buses(hass) -> None:
+    """Buses with a configured sensor, also behind a multiplexer, are left alone."""
+    buses = {"/dev/i2c-1": SimulatedI2cBus(), "/dev/i2c-2": SimulatedI2cBus()}
+    buses["/dev/i2c-1"].add_device(SimulatedScd4x(serial=1), MUX_ADDRESS, 0)
+    buses["/dev/i2c-2"].add_device(SimulatedScd4x(serial=2))
+    hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: buses[path])}
+    MockConfigEntry(domain=DOMAIN, data={CONF_I2C: "/dev/i2c-1", CONF_MUX_ADDRESS: MUX_ADDRESS,
+                                         CONF_MUX_CHANNEL: 0}).add_to_hass(hass)
+
+    with patch("custom_components.scd4x_gpio_integration.discovery.glob.glob", return_value=list(buses)):
+        found = await async_discover(hass, refresh=True)
+
+    assert found == {"/dev/i2c-2": 2}
+    assert buses["/dev/i2c-1"].transactions == 0
+
+
+async def test_probe_hung_bus(hass, monkeypatch) -> None:
+    """The probe of a bus which never answers gives up, closing the bus included, within its bounds."""
+    monkeypatch.setattr(discovery, "PROBE_TIMEOUT", PROBE_TIMEOUT)
+    monkeypatch.setattr(scd4x_api, "PROBE_RELEASE_TIMEOUT", PROBE_TIMEOUT)
+    bus = HungI2cBus()
+    bus.add_device(SimulatedScd4x())
+    hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: bus)}
+
+    start = time.monotonic()
+    try:
+        assert await async_probe(hass, "/dev/i2c-1") is None
+    finally:
+        bus.released.set()
+    assert time.monotonic() - start < 2 * PROBE_TIMEOUT + 0.5
+
+
+async def test_probe_leaves_device_idle(hass, bus, bus_manager) -> None:
+    """A measuring device is stopped for the probe and not restarted in another mode."""
+    device = SimulatedScd4x(serial=3)
+    bus.add_device(device)
+    device.handle(CMD_START_LOW_POWER_PERIODIC_MEASUREMENT, b"")
+
+    assert await async_probe(hass, "/dev/i2c-1") == 3
+    assert not device.measuring
@@ -0,0 +1,84 @@
+"""Export of the buffered raw readings."""
+import csv
+import struct
+from array import array
+
+import pytest
+
+from custom_components.scd4x_gpio_integration import export
+from custom_components.scd4x_gpio_integration.export import (
+    EXPORT_FORMAT_BINARY, EXPORT_FORMAT_COLUMNAR, EXPORT_FORMAT_CSV, EXPORT_HEADER, EXPORT_VERSION,
+    async_export_samples,
+)
+from custom_components.scd4x_gpio_integration.samples import SampleStore
+
+CHANNELS = ["co2", "temperature", "humidity"]
+SAMPLES = 10
+CHUNK_SIZE = 4
+
+
+@pytest.fixture
+def samples(monkeypatch) -> SampleStore:
+    """Store holding SAMPLES readings, exported in chunks of CHUNK_SIZE."""
+    monkeypatch.setattr(export, "EXPORT_CHUNK_SIZE", CHUNK_SIZE)
+    samples = SampleStore(SAMPLES, CHANNELS)
+    for index in range(SAMPLES + 2):
+        samples.append(1700000000.0 + 5 * index, (400.0 + index, 21.25, 40.5))
+    return samples
+
+
+def _read_header(content: bytes, magic: bytes) -> int:
+    file_magic, version, channels = EXPORT_HEADER.unpack_from(content)
+    assert (file_magic, version, channels) == (magic, EXPORT_VERSION, len(CHANNELS))
+    offset = EXPORT_HEADER.size
+    names = []
+    for _ in range(channels):
+        names.append(content[offset + 1:offset + 1 + content[offset]].decode())
+        offset += 1 + content[offset]
+    assert names == CHANNELS
+    return offset
+
+
+async def test_binary(hass, samples, tmp_path) -> None:
+    path = tmp_path / "samples.bin"
+    assert await async_export_samples(hass, samples, str(path), EXPORT_FORMAT_BINARY) == SAMPLES
+    content = path.read_bytes()
+    offset = _read_header(content, b"SCDB")
+    assert list(struct.iter_unpack("<dfff", content[offset:])) == list(samples.rows())
+
+
+async def test_columnar(hass, samples, tmp_path) -> None:
+    """One row group per chunk, each with the timestamps followed by the values of every channel."""
+    path = tmp_path / "samples.scdc"
+    assert await async_export_samples(hass, samples, str(path), EXPORT_FORMAT_COLUMNAR) == SAMPLES
+    content = path.read_bytes()
+    offset = _read_header(content, b"SCDC")
+
+    rows = []
+    groups = 0
+    while offset < len(content):
+        (count,) = struct.unpack_from("<I", content, offset)
+        offset += 4
+        columns = []
+        for typecode in "dfff":
+            column = array(typecode)
+            column.frombytes(content[offset:offset + column.itemsize * count])
+            offset += column.itemsize * count
+            columns.append(column)
+        rows.extend(zip(*columns))
+        groups += 1
+    assert groups == 3
+    assert rows == list(samples.rows())
+
+
+async def test_csv_since(hass, samples, tmp_path) -> None:
+    path = tmp_path / "samples.csv"
+    since = 1700000000.0 + 5 * 9
+    assert await async_export_samples(hass, samples, str(path), EXPORT_FORMAT_CSV, since) == 3
+    with open(path, encoding="utf-8", newline="") as file:
+        assert list(csv.reader(file)) == [
+            ["timestamp", *CHANNELS],
+            ["1700000045.000", "409.00", "21.25", "40.50"],
+            ["1700000050.000", "410.00", "21.25", "40.50"],
+            ["1700000055.000", "411.00", "21.25", "40.50"],
+        ]
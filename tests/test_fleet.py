@@ -0,0 +1,60 @@
+"""Reads of all entries spread over the measurement interval."""
+import asyncio
+
+from benchmarks.simulator import SimulatedScd4x
+from custom_components.scd4x_gpio_integration.bus import MuxChannel
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator
+from custom_components.scd4x_gpio_integration.fleet import FleetScheduler
+
+MUX_ADDRESS = 0x70
+SENSORS = 4
+INTERVAL = 0.2
+
+
+def test_slots() -> None:
+    """Members get evenly spaced offsets and wait for the next slot after the expected sample."""
+    now = [100.0]
+    fleet = FleetScheduler(period=4.0, clock=lambda: now[0])
+    for member in "abcd":
+        fleet.register(member)
+    assert [fleet.offset(member) for member in "abcd"] == [0.0, 1.0, 2.0, 3.0]
+
+    now[0] += 0.5
+    assert fleet.delay("a", 0.0, 4.0) == 3.5
+    assert fleet.delay("b", 0.0, 4.0) == 0.5
+    assert fleet.delay("b", 1.0, 4.0) == 4.5
+    fleet.unregister("a")
+    assert fleet.offset("b") == 0.0
+
+
+async def test_operations_capped() -> None:
+    fleet = FleetScheduler(max_in_flight=2)
+
+    async def operation() -> None:
+        async with fleet.operation():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[operation() for _ in range(6)])
+    assert fleet.operations == 6
+    assert fleet.peak_in_flight == 2
+    assert fleet.in_flight == 0
+
+
+async def test_staggered_reads_skip_batch_window(hass, bus, bus_manager) -> None:
+    """Reads spaced by the fleet go straight to the bus worker instead of waiting for a batch."""
+    coordinators = []
+    for channel in range(SENSORS):
+        bus.add_device(SimulatedScd4x(serial=channel + 1, interval=INTERVAL), MUX_ADDRESS, channel)
+        coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 10, None,
+                                                 mux_channel=MuxChannel(MUX_ADDRESS, channel))
+        coordinator.api.scheduler.interval = INTERVAL
+        await coordinator.async_setup()
+        coordinators.append(coordinator)
+    try:
+        await asyncio.sleep(INTERVAL)
+        await asyncio.gather(*[coordinator.async_refresh() for coordinator in coordinators])
+        assert all(coordinator.last_update_success for coordinator in coordinators)
+        assert bus_manager.workers["/dev/i2c-1"].batches == 0
+    finally:
+        for coordinator in coordinators:
+            await coordinator.async_stop()
@@ -0,0 +1,29 @@
+"""The sensirion driver is only loaded when an entry is set up."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.import_time import PACKAGE, STAGES
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def _loaded_sensirion_modules(modules: list[str]) -> list[str]:
+    """Sensirion modules a fresh interpreter has loaded after importing modules."""
+    code = (f"import importlib, sys\n"
+            f"for name in {modules!r}: importlib.import_module(name)\n"
+            f"print(' '.join(name for name in sys.modules if name.startswith('sensirion')))\n")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize("stage", ["integration", "config flow"])
+def test_driver_not_imported(stage) -> None:
+    assert _loaded_sensirion_modules(STAGES[stage]) == []
+
+
+def test_driver_imported_on_setup() -> None:
+    assert "sensirion_i2c_driver" in _loaded_sensirion_modules(STAGES["entry setup"])
+    assert _loaded_sensirion_modules([f"{PACKAGE}.bus", f"{PACKAGE}.discovery"]) == []
@@ -0,0 +1,45 @@
+"""Options of a running config entry."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.scd4x_gpio_integration import _entry_config, async_update_options
+from custom_components.scd4x_gpio_integration.const import (
+    DOMAIN, CONF_I2C, CONF_AVERAGE_WINDOW, CONF_MEASUREMENT_MODE, MEASUREMENT_MODE_PERIODIC,
+    CONF_LONG_TERM_STATISTICS, CONF_PUBLISH_INTERVAL,
+)
+
+
+def _running_entry(hass) -> tuple[MockConfigEntry, MagicMock]:
+    """Entry of an older version without the newer settings, with its running coordinator."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_I2C: "/dev/i2c-1", CONF_AVERAGE_WINDOW: 60})
+    entry.add_to_hass(hass)
+    coordinator = MagicMock(entry_config=_entry_config(entry), async_set_publish_interval=AsyncMock())
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+    return entry, coordinator
+
+
+async def test_saving_defaults_does_not_reload(hass) -> None:
+    """Options saved with the default of settings the entry lacked change nothing."""
+    entry, coordinator = _running_entry(hass)
+    hass.config_entries.async_update_entry(entry, options={
+        CONF_MEASUREMENT_MODE: MEASUREMENT_MODE_PERIODIC, CONF_LONG_TERM_STATISTICS: False})
+
+    with patch("custom_components.scd4x_gpio_integration.async_reload_entry") as reload:
+        await async_update_options(hass, entry)
+
+    reload.assert_not_called()
+    coordinator.async_republish.assert_not_called()
+
+
+async def test_live_option_applied_without_reload(hass) -> None:
+    entry, coordinator = _running_entry(hass)
+    hass.config_entries.async_update_entry(entry, options={
+        CONF_MEASUREMENT_MODE: MEASUREMENT_MODE_PERIODIC, CONF_PUBLISH_INTERVAL: 30})
+
+    with patch("custom_components.scd4x_gpio_integration.async_reload_entry") as reload:
+        await async_update_options(hass, entry)
+
+    reload.assert_not_called()
+    coordinator.async_set_publish_interval.assert_awaited_once_with(30)
+    assert coordinator.entry_config[CONF_PUBLISH_INTERVAL] == 30
@@ -0,0 +1,70 @@
+"""Initialization of the device on setup."""
+import time
+
+import pytest
+from sensirion_i2c_driver import I2cConnection
+from sensirion_i2c_driver.errors import I2cError
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedScd4x
+from custom_components.scd4x_gpio_integration import scd4x_api
+from custom_components.scd4x_gpio_integration.metrics import METRIC_RESPONSIVE_RETRIES, Metrics
+from custom_components.scd4x_gpio_integration.scd4x_api import (
+    DEFAULT_TEMPERATURE_OFFSET, InstrumentedScd4xI2cDevice, initialize_device, update_device_settings,
+)
+
+ALTITUDE = 350
+# Longer than the driver waits after a stop command.
+STOP_DURATION = 1.0
+
+
+def _device(device: SimulatedScd4x) -> InstrumentedScd4xI2cDevice:
+    bus = SimulatedI2cBus()
+    bus.add_device(device)
+    return InstrumentedScd4xI2cDevice(I2cConnection(bus), Metrics())
+
+
+def test_cold_then_warm_start() -> None:
+    """Changed settings are persisted once, a warm start with the same settings writes nothing."""
+    device = SimulatedScd4x()
+    assert initialize_device(_device(device), ALTITUDE, DEFAULT_TEMPERATURE_OFFSET) == device.serial
+    assert device.eeprom["altitude"] == ALTITUDE
+    assert (device.persist_count, device.reinit_count) == (1, 1)
+    assert device.measuring
+
+    device.brownout()
+    start = time.monotonic()
+    initialize_device(_device(device), ALTITUDE, DEFAULT_TEMPERATURE_OFFSET)
+    assert time.monotonic() - start < 1.0
+    assert (device.persist_count, device.reinit_count) == (1, 1)
+    assert device.measuring
+
+
+def test_defaults_match_factory_settings() -> None:
+    """Unset settings compare to the factory defaults, the offset within the resolution of the device."""
+    device = SimulatedScd4x()
+    initialize_device(_device(device), None, None)
+    assert (device.persist_count, device.reinit_count) == (0, 0)
+
+
+def test_waits_for_stop() -> None:
+    """A device still stopping is polled until it responds, up to the deadline."""
+    device = SimulatedScd4x(stop_duration=STOP_DURATION)
+    metrics = Metrics()
+    scd4x = _device(device)
+    initialize_device(scd4x, None, None, metrics)
+    assert metrics.counters[METRIC_RESPONSIVE_RETRIES] > 0
+
+    scd4x.stop_periodic_measurement()
+    with pytest.raises(I2cError):
+        scd4x_api.wait_until_responsive(scd4x.read_serial_number, deadline=0.1)
+
+
+def test_update_settings_keeps_measuring() -> None:
+    device = SimulatedScd4x()
+    scd4x = _device(device)
+    initialize_device(scd4x, None, None)
+    assert update_device_settings(scd4x, ALTITUDE, None)
+    assert not update_device_settings(scd4x, ALTITUDE, None)
+    assert device.eeprom["altitude"] == ALTITUDE
+    assert device.persist_count == 1 and device.reinit_count == 0
+    assert device.measuring
@@ -0,0 +1,61 @@
+"""Hourly long-term statistics of the raw readings."""
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.scd4x_gpio_integration.const import CO2_KEY, HUMIDITY_KEY, TEMP_KEY
+from custom_components.scd4x_gpio_integration.long_term import (
+    HOUR_SECONDS, MAX_PENDING_HOURS, HourlyStatistics, async_import_hourly,
+)
+
+CHANNELS = (CO2_KEY, TEMP_KEY, HUMIDITY_KEY)
+# 2024-01-01 00:00 UTC
+START = 1704067200
+
+
+def test_hours() -> None:
+    """Readings are bucketed by UTC hour, an hour completes with the first reading of a later one."""
+    hourly = HourlyStatistics(CHANNELS)
+    for offset, co2 in ((0, 400.0), (1800, 500.0), (HOUR_SECONDS - 1, 600.0), (HOUR_SECONDS, 900.0)):
+        hourly.add(START + offset, (co2, 21.0, 40.0))
+    assert hourly.pending == 1
+    assert hourly.statistics(CO2_KEY) == [{
+        "start": datetime(2024, 1, 1, tzinfo=timezone.utc), "mean": 500.0, "min": 400.0, "max": 600.0,
+    }]
+    assert hourly.statistics(TEMP_KEY)[0]["mean"] == 21.0
+
+    # Hours without readings are skipped, not imported empty.
+    hourly.add(START + 3 * HOUR_SECONDS, (400.0, 21.0, 40.0))
+    assert [row["start"].hour for row in hourly.statistics(CO2_KEY)] == [0, 1]
+
+
+def test_clock_set_back() -> None:
+    """A reading from an earlier hour counts for the current one, it does not reopen a completed hour."""
+    hourly = HourlyStatistics(CHANNELS)
+    hourly.add(START + HOUR_SECONDS, (400.0, 21.0, 40.0))
+    hourly.add(START + 10, (800.0, 21.0, 40.0))
+    hourly.add(START + 2 * HOUR_SECONDS, (400.0, 21.0, 40.0))
+    assert hourly.statistics(CO2_KEY) == [{
+        "start": datetime(2024, 1, 1, 1, tzinfo=timezone.utc), "mean": 600.0, "min": 400.0, "max": 800.0,
+    }]
+
+
+def test_pending_bounded() -> None:
+    hourly = HourlyStatistics(CHANNELS)
+    for hour in range(MAX_PENDING_HOURS + 5):
+        hourly.add(START + hour * HOUR_SECONDS, (400.0 + hour, 21.0, 40.0))
+    assert hourly.pending == MAX_PENDING_HOURS
+    assert hourly.statistics(CO2_KEY)[0]["mean"] == 400.0 + 4
+
+    hourly.clear_completed()
+    assert hourly.pending == 0 and hourly.imported_hours == MAX_PENDING_HOURS
+
+
+@pytest.mark.parametrize("hours", [0, 2])
+async def test_import_waits_for_recorder(hass, hours) -> None:
+    """Without the recorder the completed hours are kept for a later import."""
+    hourly = HourlyStatistics(CHANNELS)
+    for hour in range(hours + 1):
+        hourly.add(START + hour * HOUR_SECONDS, (400.0, 21.0, 40.0))
+    assert async_import_hourly(hass, hourly, 0x0123456789AB, "SCD41") == (hours == 0)
+    assert hourly.pending == hours
@@ -0,0 +1,107 @@
+"""Moving average aggregators."""
+import math
+import random
+import statistics
+
+import pytest
+
+from custom_components.scd4x_gpio_integration.const import AVERAGE_MODE_EMA, AVERAGE_MODE_SAMPLES, AVERAGE_MODE_SECONDS
+from custom_components.scd4x_gpio_integration.moving_average import (
+    EMA_RESTORE_SPANS, RESUM_INTERVAL, ExponentialAverage, RingAverage, create_moving_average, window_capacity,
+)
+
+INTERVAL = 5.0
+
+
+def test_ring_mean_of_last_samples() -> None:
+    rng = random.Random(1)
+    average = RingAverage(10)
+    values = []
+    for index in range(50):
+        value = rng.uniform(400.0, 2000.0)
+        values.append(value)
+        assert average.add(value, float(index)) == pytest.approx(statistics.fmean(values[-10:]))
+    assert len(average) == 10
+    assert [value for _, value in average] == values[-10:]
+
+
+def test_ring_window_seconds() -> None:
+    """Samples older than the window leave it, however much capacity is left."""
+    average = RingAverage(100, window_seconds=10.0)
+    for timestamp in range(0, 20, 2):
+        average.add(float(timestamp), float(timestamp))
+    assert [timestamp for timestamp, _ in average] == [10.0, 12.0, 14.0, 16.0, 18.0]
+
+    average.expire(27.0)
+    assert [timestamp for timestamp, _ in average] == [18.0]
+    average.expire(40.0)
+    assert len(average) == 0 and average.mean is None
+
+
+def test_ring_time_weighted() -> None:
+    """Every sample counts for the time since the one before, at most the interval."""
+    evenly = RingAverage(10, interval=INTERVAL)
+    for index, value in enumerate((400.0, 500.0, 600.0)):
+        evenly.add(value, index * INTERVAL)
+    assert evenly.mean == pytest.approx(500.0)
+
+    # Four readings within a second after a steady reading only count for that second.
+    burst = RingAverage(10, interval=INTERVAL)
+    burst.add(400.0, 0.0)
+    burst.add(400.0, INTERVAL)
+    for index in range(4):
+        burst.add(1000.0, INTERVAL + 0.25 * (index + 1))
+    assert burst.mean == pytest.approx((400.0 * 2 * INTERVAL + 1000.0 * 1.0) / (2 * INTERVAL + 1.0))
+
+    # A gap of missed readings does not make the next one weigh more than an interval.
+    gap = RingAverage(10, interval=INTERVAL)
+    gap.add(400.0, 0.0)
+    gap.add(800.0, 10 * INTERVAL)
+    assert gap.mean == pytest.approx(600.0)
+
+
+def test_ring_resum() -> None:
+    """The running sums are recomputed exactly every RESUM_INTERVAL additions."""
+    rng = random.Random(2)
+    average = RingAverage(7, interval=INTERVAL)
+    timestamp = 0.0
+    for _ in range(3 * RESUM_INTERVAL):
+        timestamp += rng.uniform(0.1, 2 * INTERVAL)
+        average.add(rng.choice((0.1, 1e9, 1e-9)), timestamp)
+
+    weights = _weights(average)
+    weighted = math.fsum(weight * value for weight, (_, value) in zip(weights, average))
+    assert average._sum == weighted  # pylint: disable=protected-access
+    assert average.mean == pytest.approx(weighted / math.fsum(weights))
+
+
+def _weights(average: RingAverage) -> list[float]:
+    """Weights of the samples in the ring, oldest first."""
+    start, capacity = average._start, average.capacity  # pylint: disable=protected-access
+    return [average._weights[(start + offset) % capacity]  # pylint: disable=protected-access
+            for offset in range(len(average))]
+
+
+def test_ema_time_based() -> None:
+    """Evenly spaced samples decay like the sample based average, a skipped sample like two steps."""
+    by_samples = ExponentialAverage(9)
+    by_time = ExponentialAverage(9, INTERVAL)
+    for index, value in enumerate((400.0, 800.0, 600.0, 900.0)):
+        assert by_time.add(value, index * INTERVAL) == pytest.approx(by_samples.add(value, index * INTERVAL))
+
+    skipped = ExponentialAverage(9, INTERVAL)
+    stepped = ExponentialAverage(9, INTERVAL)
+    skipped.add(400.0, 0.0)
+    stepped.add(400.0, 0.0)
+    skipped.add(800.0, 2 * INTERVAL)
+    stepped.add(800.0, INTERVAL)
+    stepped.add(800.0, 2 * INTERVAL)
+    assert skipped.mean == pytest.approx(stepped.mean)
+    assert len(skipped) == 1 and list(skipped) == [(2 * INTERVAL, skipped.mean)]
+
+
+def test_create_moving_average() -> None:
+    assert isinstance(create_moving_average(AVERAGE_MODE_EMA, 10), ExponentialAverage)
+    assert create_moving_average(AVERAGE_MODE_SAMPLES, 10).capacity == 10
+    assert create_moving_average(AVERAGE_MODE_SECONDS, 60).capacity == window_capacity(AVERAGE_MODE_SECONDS, 60)
+    assert window_capacity(AVERAGE_MODE_EMA, 10) == EMA_RESTORE_SPANS * 10
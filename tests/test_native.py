@@ -0,0 +1,70 @@
+"""Native I2C_RDWR transport against the sensirion driver."""
+import random
+
+import pytest
+from sensirion_i2c_driver import I2cConnection
+from sensirion_i2c_driver.crc_calculator import CrcCalculator
+from sensirion_i2c_driver.errors import I2cChecksumError, I2cNackError
+
+from benchmarks.simulator import SimulatedI2cBus, SimulatedRdwrTransceiver, SimulatedScd4x
+from custom_components.scd4x_gpio_integration.metrics import METRIC_CRC_ERRORS, METRIC_I2C_ERRORS, Metrics
+from custom_components.scd4x_gpio_integration.native import CRC8_INIT, CRC8_POLYNOMIAL, NativeScd4xDevice, crc8
+from custom_components.scd4x_gpio_integration.scd4x_api import InstrumentedScd4xI2cDevice
+
+
+@pytest.fixture
+def scd4x() -> SimulatedScd4x:
+    return SimulatedScd4x(interval=0, co2=1234, temperature=23.71, humidity=51.3)
+
+
+def _devices(scd4x: SimulatedScd4x) -> tuple[SimulatedI2cBus, NativeScd4xDevice, InstrumentedScd4xI2cDevice]:
+    bus = SimulatedI2cBus()
+    bus.add_device(scd4x)
+    native = NativeScd4xDevice(SimulatedRdwrTransceiver(bus), Metrics())
+    return bus, native, InstrumentedScd4xI2cDevice(I2cConnection(bus), Metrics())
+
+
+def test_crc8() -> None:
+    calculator = CrcCalculator(8, CRC8_POLYNOMIAL, CRC8_INIT)
+    rng = random.Random(1)
+    for _ in range(200):
+        data = bytes(rng.randrange(256) for _ in range(2))
+        assert crc8(data) == calculator(data)
+    # Example of the SCD4x datasheet.
+    assert crc8(b"\xbe\xef") == 0x92
+
+
+def test_conversions_match_driver(scd4x) -> None:
+    _, native, sensirion = _devices(scd4x)
+    assert native.read_serial_number() == sensirion.read_serial_number() == scd4x.serial
+
+    native.set_sensor_altitude(350)
+    native.set_temperature_offset(5.3)
+    assert native.get_sensor_altitude() == sensirion.get_sensor_altitude() == 350
+    assert native.get_temperature_offset().degrees_celsius == pytest.approx(
+        sensirion.get_temperature_offset().degrees_celsius)
+    assert native.get_temperature_offset().degrees_celsius == pytest.approx(5.3, abs=175 / 65536)
+
+    native.start_periodic_measurement()
+    expected = sensirion.measurement_if_ready()
+    assert native.measurement_if_ready() == pytest.approx(expected)
+    assert expected == pytest.approx((1234, 23.71, 51.3), abs=0.01)
+
+
+def test_errors(scd4x) -> None:
+    """Transfer errors raise the exceptions of the sensirion driver and are counted."""
+    bus = SimulatedI2cBus()
+    bus.add_device(scd4x)
+    metrics = Metrics()
+    native = NativeScd4xDevice(SimulatedRdwrTransceiver(bus), metrics)
+
+    bus.corrupt_next(1)
+    with pytest.raises(I2cChecksumError):
+        native.read_serial_number()
+    assert metrics.counters[METRIC_CRC_ERRORS] == 1
+
+    bus.fail_next(1)
+    with pytest.raises(I2cNackError):
+        native.get_sensor_altitude()
+    assert metrics.counters[METRIC_I2C_ERRORS] == 1
+    assert native.read_serial_number() == scd4x.serial
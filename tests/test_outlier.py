@@ -0,0 +1,57 @@
+"""Sliding-window median and Hampel outlier filters."""
+import random
+import statistics
+
+import pytest
+
+from custom_components.scd4x_gpio_integration.outlier import HampelFilter, SlidingMedian, SortedWindow
+
+SAMPLES = 20000
+SPIKE_PROBABILITY = 0.01
+
+
+def noise(count: int, seed: int = 1) -> list[float]:
+    """CO2 readings of a steady room, Gaussian noise of 3 ppm rounded like the sensor."""
+    rng = random.Random(seed)
+    return [round(600 + rng.gauss(0.0, 3.0)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 11, 50])
+def test_order_statistics(window) -> None:
+    """Median and MAD of the window match a sort of the window, also with repeated values."""
+    rng = random.Random(window)
+    sliding = SlidingMedian(window)
+    ordered = SortedWindow(window)
+    values = []
+    for _ in range(500):
+        value = rng.choice((rng.randint(0, 5), rng.gauss(0.0, 10.0)))
+        values.append(value)
+        current = values[-window:]
+        median = statistics.median(current)
+        assert sliding.add(value) == median
+        ordered.add(value)
+        assert ordered.median == median
+        assert ordered.mad() == pytest.approx(statistics.median(abs(item - median) for item in current))
+
+
+@pytest.mark.parametrize(("window", "max_rate"), [(11, 0.05), (101, 0.01), (1001, 0.01)])
+def test_hampel_false_positives(window, max_rate) -> None:
+    """Clean noise is passed through, apart from the tail any threshold cuts off."""
+    hampel = HampelFilter(window, 3.0, 1.0)
+    for value in noise(SAMPLES):
+        hampel.filter(value)
+    assert hampel.rejected / SAMPLES < max_rate
+
+
+def test_hampel_rejects_spikes() -> None:
+    rng = random.Random(2)
+    hampel = HampelFilter(101, 3.0, 1.0)
+    spikes = 0
+    for value in noise(SAMPLES):
+        if rng.random() < SPIKE_PROBABILITY:
+            spikes += 1
+            spike = value + rng.choice((-1, 1)) * rng.uniform(200.0, 2000.0)
+            assert hampel.filter(spike) != spike
+        else:
+            hampel.filter(value)
+    assert spikes <= hampel.rejected < spikes + SAMPLES * 0.01
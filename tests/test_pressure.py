@@ -0,0 +1,87 @@
+"""Ambient pressure compensation from a pressure entity."""
+import pytest
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, STATE_UNAVAILABLE, UnitOfPressure
+from homeassistant.core import State
+from sensirion_i2c_driver import I2cConnection
+
+from benchmarks.simulator import CMD_SET_AMBIENT_PRESSURE, DeviceNack, SimulatedI2cBus, SimulatedScd4x
+from custom_components.scd4x_gpio_integration.metrics import Metrics
+from custom_components.scd4x_gpio_integration.pressure import PressureCompensation, pressure_from_state
+from custom_components.scd4x_gpio_integration.scd4x_api import (
+    InstrumentedScd4xI2cDevice, read_measurement_and_compensate,
+)
+
+THRESHOLD = 2.0
+INTERVAL = 60.0
+
+
+def _state(value: str, unit=None) -> State:
+    return State("sensor.pressure", value, {ATTR_UNIT_OF_MEASUREMENT: unit} if unit else {})
+
+
+@pytest.mark.parametrize("state, expected", [
+    (_state("1013.25", UnitOfPressure.HPA), 1013.25),
+    (_state("101.325", UnitOfPressure.KPA), 1013.25),
+    (_state("29.92", UnitOfPressure.INHG), 1013.2),
+    (_state("1013.25"), 1013.25),
+    (_state(STATE_UNAVAILABLE, UnitOfPressure.HPA), None),
+    (_state("high", UnitOfPressure.HPA), None),
+    (_state("1013", "furlongs"), None),
+    (None, None),
+])
+def test_pressure_from_state(state, expected) -> None:
+    pressure = pressure_from_state(state)
+    assert pressure == (pytest.approx(expected, abs=0.1) if expected is not None else None)
+
+
+def test_threshold_and_rate_limit() -> None:
+    """The first value is written right away, later ones only if they moved and the last write is old enough."""
+    compensation = PressureCompensation(THRESHOLD, INTERVAL)
+    assert compensation.pending(0.0) is None
+    compensation.add(1000.0)
+    assert compensation.pending(0.0) == 1000
+    compensation.confirm(1000, 0.0)
+
+    compensation.add(1001.0)
+    assert compensation.pending(INTERVAL) is None
+    for _ in range(10):
+        compensation.add(1010.0)
+    assert compensation.pending(INTERVAL - 1) is None
+    assert compensation.pending(INTERVAL) == round(compensation.smoothed)
+
+    compensation.invalidate()
+    assert compensation.pending(1.0) == round(compensation.smoothed)
+
+
+def test_smoothed_in_range() -> None:
+    """Single outliers are smoothed, values outside of the range of the sensor ignored."""
+    compensation = PressureCompensation(THRESHOLD, INTERVAL)
+    for pressure in (1000.0, 1000.0, 1006.0, 50.0, 1500.0):
+        compensation.add(pressure)
+    assert compensation.smoothed == pytest.approx(1002.0)
+
+
+def test_written_with_reading() -> None:
+    device = SimulatedScd4x(interval=0)
+    bus = SimulatedI2cBus()
+    bus.add_device(device)
+    scd4x = InstrumentedScd4xI2cDevice(I2cConnection(bus), Metrics())
+    scd4x.start_periodic_measurement()
+
+    measurement, written = read_measurement_and_compensate(scd4x, 987)
+    assert measurement is not None and written
+    assert device.ambient_pressure == 987
+
+    # A failed write keeps the reading.
+    device.handle = _nack_pressure(device.handle)
+    measurement, written = read_measurement_and_compensate(scd4x, 990)
+    assert measurement is not None and not written
+    assert device.ambient_pressure == 987
+
+
+def _nack_pressure(handle):
+    def nack_pressure(command: int, payload: bytes):
+        if command == CMD_SET_AMBIENT_PRESSURE:
+            raise DeviceNack()
+        return handle(command, payload)
+    return nack_pressure
@@ -0,0 +1,36 @@
+"""On-demand profiling of the acquisition path."""
+import os
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.scd4x_gpio_integration.profiling import STAGE_READ, Profiler, async_profile, get_profiler
+
+
+async def test_start_with_other_profiler() -> None:
+    """A profiler already active on the thread leaves nothing of the failed start running."""
+    profiler = Profiler()
+    # From Python 3.12 on, cProfile refuses to run along with another profiler.
+    with patch("cProfile.Profile.enable", side_effect=ValueError("Another profiling tool is already active")):
+        with pytest.raises(ValueError):
+            profiler.start()
+
+    assert not profiler.active
+    assert not tracemalloc.is_tracing()
+    assert profiler.stage(STAGE_READ) is profiler.stage(STAGE_READ)
+
+
+async def test_profile(hass, tmp_path) -> None:
+    """Stages are timed while the profile runs and the files are written."""
+    profiler = get_profiler(hass)
+    path = str(tmp_path / "profile")
+    profiler.start()
+    with profiler.stage(STAGE_READ):
+        pass
+    stats, snapshot, summary = await profiler.async_stop()
+    assert summary["stages"][STAGE_READ]["count"] == 1
+    assert not profiler.active and not tracemalloc.is_tracing()
+
+    summary = await async_profile(hass, 0.05, path)
+    assert all(os.path.exists(filename) for filename in summary["files"])
@@ -0,0 +1,85 @@
+"""Fault injection against the in-place recovery of SCD4XDataUpdateCoordinator."""
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.recovery import brownout, crc_errors, nack_burst, wedged_bus
+from custom_components.scd4x_gpio_integration import scd4x_api
+from custom_components.scd4x_gpio_integration.const import CO2_KEY
+from custom_components.scd4x_gpio_integration.coordinator import SCD4XDataUpdateCoordinator
+from custom_components.scd4x_gpio_integration.metrics import (
+    METRIC_RECOVERY_PREFIX, METRIC_RECOVERIES, METRIC_RECOVERY_FAILURES,
+)
+from custom_components.scd4x_gpio_integration.recovery import RECOVERY_RETRY, RECOVERY_REOPEN, RECOVERY_RESET
+
+# Readings before the fault, and the failed updates a recovery may take at most.
+WARMUP_READINGS = 3
+MAX_FAILED_UPDATES = 3
+STEPS = (RECOVERY_RETRY, RECOVERY_REOPEN, RECOVERY_RESET)
+RECOVERY_TIMEOUT = 1.0
+# Seconds every transaction of a bus takes which has become too slow to ever deliver a reading.
+SLOW_BUS_LATENCY = 0.5
+
+
+async def _async_read(coordinator: SCD4XDataUpdateCoordinator) -> bool:
+    await asyncio.sleep(coordinator.api.seconds_until_next_sample())
+    await coordinator.async_refresh()
+    return coordinator.last_update_success
+
+
+@pytest.mark.parametrize(("inject", "step"), [
+    (nack_burst, RECOVERY_RETRY),
+    (crc_errors, RECOVERY_RETRY),
+    (wedged_bus, RECOVERY_REOPEN),
+    (brownout, RECOVERY_RESET),
+])
+async def test_recovers_in_place(hass, bus, device, bus_manager, inject, step) -> None:
+    """The fault is cleared by the expected step and the moving average keeps its readings."""
+    coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 60, None)
+    coordinator.api.scheduler.interval = device.interval
+    await coordinator.async_setup()
+    try:
+        for _ in range(WARMUP_READINGS):
+            assert await _async_read(coordinator)
+        window = len(coordinator._averages[CO2_KEY])  # pylint: disable=protected-access
+        assert window == WARMUP_READINGS
+
+        inject(bus, device)
+        failed = 0
+        while not await _async_read(coordinator):
+            failed += 1
+            assert failed < MAX_FAILED_UPDATES, "the sensor did not recover"
+
+        assert coordinator.api.recovery.last_step == step
+        counters = coordinator.metrics.counters
+        assert counters.get(METRIC_RECOVERY_PREFIX + step, 0) >= 1
+        assert counters.get(METRIC_RECOVERIES, 0) == 1
+        for later in STEPS[STEPS.index(step) + 1:]:
+            assert counters.get(METRIC_RECOVERY_PREFIX + later, 0) == 0
+        assert len(coordinator._averages[CO2_KEY]) == window + 1  # pylint: disable=protected-access
+    finally:
+        await coordinator.async_stop()
+
+
+async def test_recovery_deadline(hass, bus, device, bus_manager, monkeypatch) -> None:
+    """A bus too slow for any step to succeed fails the update once the recovery deadline passed."""
+    monkeypatch.setattr(scd4x_api, "RECOVERY_TIMEOUT", RECOVERY_TIMEOUT)
+    coordinator = SCD4XDataUpdateCoordinator(hass, "/dev/i2c-1", None, 60, None)
+    coordinator.api.scheduler.interval = device.interval
+    await coordinator.async_setup()
+    try:
+        assert await _async_read(coordinator)
+
+        bus.latency = SLOW_BUS_LATENCY
+        start = time.monotonic()
+        assert not await _async_read(coordinator)
+        elapsed = time.monotonic() - start
+
+        # The first read times out after three intervals, the recovery after its deadline.
+        assert elapsed < scd4x_api.READ_TIMEOUT_INTERVALS * device.interval + RECOVERY_TIMEOUT + SLOW_BUS_LATENCY
+        assert coordinator.metrics.counters.get(METRIC_RECOVERY_FAILURES) == 1
+        assert not coordinator.api.recovery.recovering
+    finally:
+        bus.latency = 0.0
+        await coordinator.async_stop()
@@ -0,0 +1,73 @@
+"""Memory-mapped file keeping the latest readings across restarts."""
+import pytest
+
+from custom_components.scd4x_gpio_integration.sample_file import HEADER, SampleFile, _record_struct
+
+CHANNELS = 3
+
+
+def _write(path: str, capacity: int, timestamps) -> SampleFile:
+    sample_file = SampleFile(path, capacity, CHANNELS)
+    sample_file.open()
+    for timestamp in timestamps:
+        sample_file.append(float(timestamp), (400.0 + timestamp, 21.5, 40.0))
+    return sample_file
+
+
+def _timestamps(records: list[tuple]) -> list[float]:
+    return [record[0] for record in records]
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "samples.bin")
+
+
+def test_reopen(path) -> None:
+    """Records come back ordered, and appending continues after the newest one."""
+    _write(path, 4, range(1, 7)).close()
+
+    sample_file = SampleFile(path, 4, CHANNELS)
+    records = sample_file.open()
+    assert _timestamps(records) == [3.0, 4.0, 5.0, 6.0]
+    assert records[-1] == (6.0, 406.0, 21.5, 40.0)
+    sample_file.append(7.0, (407.0, 21.5, 40.0))
+    sample_file.close()
+
+    sample_file = SampleFile(path, 4, CHANNELS)
+    assert _timestamps(sample_file.open()) == [4.0, 5.0, 6.0, 7.0]
+    sample_file.close()
+
+
+@pytest.mark.parametrize("capacity, expected", [(8, [3.0, 4.0, 5.0, 6.0]), (2, [5.0, 6.0])])
+def test_resize(path, capacity, expected) -> None:
+    """A changed capacity rewrites the file with the latest records that fit."""
+    _write(path, 4, range(1, 7)).close()
+
+    sample_file = SampleFile(path, capacity, CHANNELS)
+    assert _timestamps(sample_file.open()) == expected
+    sample_file.append(7.0, (407.0, 21.5, 40.0))
+    sample_file.close()
+
+    sample_file = SampleFile(path, capacity, CHANNELS)
+    assert _timestamps(sample_file.open()) == (expected + [7.0])[-capacity:]
+    sample_file.close()
+
+
+def test_torn_record_skipped(path) -> None:
+    _write(path, 4, range(1, 4)).close()
+    with open(path, "r+b") as file:
+        file.seek(HEADER.size + _record_struct(CHANNELS).size + 2)
+        file.write(b"\xff")
+
+    sample_file = SampleFile(path, 4, CHANNELS)
+    assert _timestamps(sample_file.open()) == [1.0, 3.0]
+    sample_file.close()
+
+
+def test_other_channels_discarded(path) -> None:
+    _write(path, 4, range(1, 4)).close()
+
+    sample_file = SampleFile(path, 4, CHANNELS + 1)
+    assert sample_file.open() == []
+    sample_file.close()
@@ -0,0 +1,68 @@
+"""Buffer of the raw readings and the statistics published with the downsampled values."""
+import pytest
+
+from custom_components.scd4x_gpio_integration.samples import PeriodStatistics, SampleStore
+
+CHANNELS = ("co2", "temperature")
+
+
+def _store(capacity: int, samples: int) -> SampleStore:
+    store = SampleStore(capacity, CHANNELS)
+    for index in range(samples):
+        store.append(float(index), (400.0 + index, 21.5))
+    return store
+
+
+def test_ring() -> None:
+    """A full store drops the oldest samples."""
+    store = _store(5, 8)
+    assert len(store) == 5 and store.appended == 8
+    assert list(store.rows()) == [(float(index), 400.0 + index, 21.5) for index in range(3, 8)]
+    assert [row[0] for row in store.rows(since=5.0)] == [5.0, 6.0, 7.0]
+    assert [row[0] for row in store.rows(since=5.5)] == [6.0, 7.0]
+    assert list(store.rows(since=8.0)) == []
+    assert store.nbytes == 5 * (8 + 4 * len(CHANNELS))
+
+
+def test_float32_columns() -> None:
+    store = SampleStore(2, CHANNELS)
+    store.append(1700000000.123, (412.0, 21.37))
+    timestamp, co2, temperature = next(store.rows())
+    assert timestamp == 1700000000.123
+    assert co2 == 412.0
+    assert temperature == pytest.approx(21.37, abs=1e-5)
+
+
+@pytest.mark.parametrize("since", [None, 4.0])
+def test_chunks_wrap(since) -> None:
+    """Chunks copy the ring in order across its end."""
+    store = _store(7, 10)
+    rows = list(store.rows(since))
+    timestamps = []
+    for chunk_timestamps, columns in store.chunks(since, chunk_size=3):
+        assert len(columns) == len(CHANNELS)
+        assert all(len(column) == len(chunk_timestamps) for column in columns)
+        timestamps.extend(chunk_timestamps)
+    assert timestamps == [row[0] for row in rows]
+
+
+def test_chunks_appended_meanwhile() -> None:
+    """Samples appended while iterating are left out, those overwritten meanwhile are skipped."""
+    store = _store(6, 6)
+    timestamps = []
+    for index, (chunk_timestamps, columns) in enumerate(store.chunks(chunk_size=2)):
+        timestamps.extend(chunk_timestamps)
+        if index == 0:
+            for timestamp in (6.0, 7.0, 8.0):
+                store.append(timestamp, (0.0, 0.0))
+    assert timestamps == [0.0, 1.0, 3.0, 4.0, 5.0]
+
+
+def test_period_statistics() -> None:
+    statistics = PeriodStatistics()
+    assert statistics.as_dict(1) == {"mean": None, "min": None, "max": None, "count": 0}
+    for value in (21.04, 20.96, 21.51):
+        statistics.add(value)
+    assert statistics.as_dict(1) == {"mean": 21.2, "min": 21.0, "max": 21.5, "count": 3}
+    statistics.reset()
+    assert statistics.count == 0
@@ -0,0 +1,70 @@
+"""Stopping all sensors together with slow and hung transceivers."""
+import asyncio
+import threading
+import time
+
+from benchmarks.blocking import BlockingI2cBus, LoopMonitor
+from benchmarks.simulator import SimulatedScd4x
+from custom_components.scd4x_gpio_integration import coordinator as coordinator_module
+from custom_components.scd4x_gpio_integration.bus import I2cBusManager, MuxChannel
+from custom_components.scd4x_gpio_integration.const import DOMAIN, DATA_BUS_MANAGER
+from custom_components.scd4x_gpio_integration.coordinator import (
+    SCD4XDataUpdateCoordinator, async_stop_coordinators,
+)
+
+BUSES = 2
+SENSORS_PER_BUS = 4
+MUX_ADDRESS = 0x70
+INTERVAL = 0.2
+BLOCK = 0.005
+PHASE_TIMEOUT = 0.5
+# Longest CPU time one callback may keep the loop busy, generous for slow test machines.
+MAX_BLOCK = 0.02
+
+
+async def test_stop_with_hung_bus(hass, monkeypatch, caplog) -> None:
+    """The transceivers never run on the loop, and a hung bus delays stopping only by the phase deadlines.
+
+    The timeouts of the single operations keep their defaults, so only the deadlines of the phases
+    can end the stop in time.
+    """
+    monkeypatch.setattr(coordinator_module, "HALT_TIMEOUT", PHASE_TIMEOUT)
+    monkeypatch.setattr(coordinator_module, "STOP_PHASE_TIMEOUT", PHASE_TIMEOUT)
+    monkeypatch.setattr(coordinator_module, "RELEASE_PHASE_TIMEOUT", PHASE_TIMEOUT)
+    loop_thread = threading.get_ident()
+    buses = {f"/dev/i2c-{index + 1}": BlockingI2cBus(BLOCK, loop_thread) for index in range(BUSES)}
+    hass.data[DOMAIN] = {DATA_BUS_MANAGER: I2cBusManager(lambda path: buses[path])}
+    coordinators = []
+    for index in range(BUSES * SENSORS_PER_BUS):
+        path = f"/dev/i2c-{index // SENSORS_PER_BUS + 1}"
+        channel = index % SENSORS_PER_BUS
+        buses[path].add_device(SimulatedScd4x(serial=index + 1, interval=INTERVAL, stop_duration=INTERVAL),
+                               MUX_ADDRESS, channel)
+        coordinator = SCD4XDataUpdateCoordinator(hass, path, None, 10, None,
+                                                 mux_channel=MuxChannel(MUX_ADDRESS, channel))
+        coordinator.api.scheduler.interval = INTERVAL
+        coordinators.append(coordinator)
+
+    monitor = LoopMonitor()
+    monitor.start()
+    try:
+        await asyncio.gather(*[coordinator.async_setup() for coordinator in coordinators])
+        for coordinator in coordinators:
+            coordinator.async_start_acquisition()
+        await asyncio.sleep(3 * INTERVAL)
+
+        buses["/dev/i2c-1"].hang()
+        start = time.perf_counter()
+        await async_stop_coordinators(coordinators)
+        duration = time.perf_counter() - start
+    finally:
+        max_block, _ = await monitor.stop()
+        for bus in buses.values():
+            bus.release()
+
+    assert all(coordinator.metrics.histogram(coordinator_module.METRIC_UPDATE) is not None
+               for coordinator in coordinators)
+    assert sum(bus.loop_calls for bus in buses.values()) == 0
+    assert max_block < MAX_BLOCK
+    assert duration < 3 * PHASE_TIMEOUT + INTERVAL
+    assert "did not stop measuring within" in caplog.text